@@ -1,25 +1,39 @@
+import threading
 from flask import Flask
 from flask_cors import CORS
-from .database.db import Base, engine
+from .database.db import engine
+from app.database import migrations
 from app.routes import all_blueprints
 from flask_mail import Mail
 from app.config import Config
+from app.utils.json_provider import FastJSONProvider
+from app.utils.sql_instrumentation import init_sql_instrumentation
+from app.utils.metrics import init_metrics
+from app.utils.use_replica import init_read_your_writes
+from app.commands import register_commands
+from app.services.blacklist_purger import start_blacklist_purger
+from app.services.email_outbox import start_outbox_workers
+from app.services.like_service import start_like_buffer
+from app.services.trending import start_trending_refresher
+from app.services.revocation_filter import revocation_filter
 
 
 # --- FIX START ---
 # IMPORT ALL YOUR MODELS HERE to ensure SQLAlchemy is aware of them 
-# before calling create_all(). This resolves the "failed to locate a name ('Post')" error.
+# before the mappers are configured. This resolves the "failed to locate a name ('Post')" error.
 import app.models.user_model
 import app.models.post_model
 import app.models.like_model
 import app.models.comment_model 
 import app.models.token_blacklist_model
+import app.models.email_outbox_model
 
 # create a instance of flask mail
 mail = Mail()
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     
     CORS(
         app,
@@ -30,12 +44,69 @@ def create_app():
     
     app.config.from_object(Config)
     mail.init_app(app)
+    init_sql_instrumentation(app)
+    init_metrics(app)
+    init_read_your_writes(app)
     
-    Base.metadata.create_all(bind=engine)
+    # The schema is owned by migrations/ (`flask db upgrade`), never created at boot unless asked
+    if Config.DB_AUTO_MIGRATE:
+        migrations.upgrade(engine)
+    else:
+        waiting = migrations.pending(engine)
+        if waiting:
+            app.logger.warning(
+                "%d pending schema migration(s), run `flask db upgrade`: %s",
+                len(waiting), ", ".join(f"{m.version}_{m.name}" for m in waiting)
+            )
     
     '''Register all blueprint here - '''
     for bp in all_blueprints:
         app.register_blueprint(bp)
         
+    register_commands(app)
+    
+    # Whatever server runs the app, the workers are up by the end of its first request
+    if Config.START_WORKERS:
+        started = []
         
-    return app
\ No newline at end of file
+        @app.before_request
+        def start_workers_on_first_request():
+            if not started:
+                start_background_workers(app)
+                started.append(True)
+    
+    return app
+
+
+_workers_lock = threading.Lock()
+
+def start_background_workers(app):
+    """
+    Start this process's background threads, once (every starter is a no-op
+    the second time). The server entry points (app/main.py, app/asgi.py) call
+    it at boot, any other server (`flask run`) on its first request, see
+    create_app. CLI commands serve no request and never start them; neither
+    does anything with START_WORKERS=false (the tests).
+    """
+    if not Config.START_WORKERS:
+        return
+    with _workers_lock:
+        _start_workers(app)
+
+
+def _start_workers(app):
+    # Expired blacklist entries are deleted in the background, in small batches
+    start_blacklist_purger(Config.TOKEN_PURGE_INTERVAL_SECONDS, Config.TOKEN_PURGE_BATCH_SIZE)
+    
+    # Outgoing email is written to the outbox by the routes and sent from here
+    start_outbox_workers(app, Config.EMAIL_OUTBOX_WORKERS)
+    
+    # Optional write-behind for like toggles (off by default)
+    start_like_buffer(Config.LIKE_WRITE_BEHIND, Config.LIKE_FLUSH_INTERVAL_SECONDS,
+                      Config.LIKE_FLUSH_BATCH_SIZE, Config.LIKE_BUFFER_MAX_PENDING)
+    
+    # Trending feed ranking, recomputed in the background
+    start_trending_refresher(Config.TRENDING_REFRESH_SECONDS)
+    
+    # Tokens revoked by other workers, pulled into this worker's filter
+    revocation_filter.start_sync()
@@ -0,0 +1,20 @@
+from asgiref.wsgi import WsgiToAsgi
+from app import create_app, start_background_workers
+from app.routes.async_views import install_async_views
+
+
+'''
+ASGI entry point, with the async feed and comment views (app/routes/async_views.py):
+
+    uvicorn app.asgi:app --workers 4
+
+Same routes and responses as app/main.py. Flask itself stays WSGI: asgiref
+runs each request in a worker thread, while the async views await their
+queries on the process-wide loop (app/database/async_db.py).
+'''
+
+flask_app = create_app()
+install_async_views(flask_app)
+start_background_workers(flask_app)
+
+app = WsgiToAsgi(flask_app)
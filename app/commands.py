@@ -0,0 +1,133 @@
+import click
+from app.database.db import SessionLocal
+
+
+'''
+Flask CLI commands, run with `flask --app app:create_app <command>`.
+'''
+
+@click.command("reconcile-counters")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows checked per batch.")
+@click.option("--dry-run", is_flag=True, help="Only report drift, do not fix it.")
+def reconcile_counters_command(batch_size: int, dry_run: bool) -> None:
+    """Detect and fix drift in the like/comment/reply counters."""
+    from app.services.counter_service import reconcile_counters
+
+    session = SessionLocal()
+    try:
+        stats = reconcile_counters(session, batch_size=batch_size, dry_run=dry_run)
+    finally:
+        session.close()
+
+    click.echo(
+        f"posts: {stats['posts_checked']} checked, {stats['posts_fixed']} drifted | "
+        f"comments: {stats['comments_checked']} checked, {stats['comments_fixed']} drifted"
+        + (" (dry run, nothing changed)" if dry_run else "")
+    )
+
+
+@click.command("purge-blacklist")
+@click.option("--batch-size", default=1000, show_default=True, help="Rows deleted per transaction.")
+def purge_blacklist_command(batch_size: int) -> None:
+    """Delete expired rows from the token blacklist."""
+    from app.services.blacklist_purger import purge_expired_tokens
+
+    session = SessionLocal()
+    try:
+        deleted = purge_expired_tokens(session, batch_size=batch_size)
+    finally:
+        session.close()
+    click.echo(f"Deleted {deleted} expired blacklist entries")
+
+
+@click.command("drain-outbox")
+def drain_outbox_command() -> None:
+    """Send every due message in the email outbox, then exit."""
+    from flask import current_app
+    from app.services.email_outbox import make_worker
+
+    worker = make_worker(current_app._get_current_object())
+    total = 0
+    while True:
+        claimed = worker.drain_once()
+        total += claimed
+        if claimed < worker.batch_size:
+            break
+    click.echo(f"Processed {total} outbox messages")
+
+
+@click.command("seed-data")
+@click.option("--scale", type=click.Choice(["10k", "1m", "10m"]), default="10k", show_default=True,
+              help="Preset volumes (named after the number of likes).")
+@click.option("--users", type=int, help="Override the preset.")
+@click.option("--posts", type=int, help="Override the preset.")
+@click.option("--comments", type=int, help="Override the preset.")
+@click.option("--likes", type=int, help="Override the preset.")
+@click.option("--alpha", default=1.1, show_default=True, help="Power-law exponent for post popularity and author activity.")
+@click.option("--reply-ratio", default=0.4, show_default=True, help="Share of comments that are replies.")
+@click.option("--max-depth", default=5, show_default=True, help="Deepest reply level.")
+@click.option("--batch-size", default=10000, show_default=True, help="Rows per INSERT batch.")
+@click.option("--seed", default=42, show_default=True, help="Random seed, same seed = same data.")
+@click.option("--password", default="password123", show_default=True, help="Password of every generated user.")
+@click.option("--prefix", default="user", show_default=True, help="Username/email prefix (must be unused).")
+def seed_data_command(scale, users, posts, comments, likes, alpha, reply_ratio, max_depth, batch_size,
+                      seed, password, prefix) -> None:
+    """Bulk-insert synthetic users, posts, threaded comments and likes."""
+    from app.config import Config
+    from app.database.db import engine
+    from app.services.seeder import SCALES, seed_data
+
+    sizes = dict(SCALES[scale])
+    for name, value in (("users", users), ("posts", posts), ("comments", comments), ("likes", likes)):
+        if value is not None:
+            sizes[name] = value
+
+    def progress(stats) -> None:
+        click.echo(f"\r{stats['total_rows']:>12,} rows  {stats['total_rows_per_second']:>10,.0f} rows/s", nl=False)
+
+    stats = seed_data(
+        engine, **sizes, alpha=alpha, reply_ratio=reply_ratio, max_depth=max_depth, batch_size=batch_size,
+        seed=seed, password=password, bcrypt_rounds=Config.BCRYPT_ROUNDS, username_prefix=prefix,
+        progress=progress,
+    )
+    click.echo(f"\nDone in {stats['elapsed_seconds']:.1f}s")
+    for name, rows in stats["rows"].items():
+        click.echo(f"  {name:<9}{rows:>12,} rows  {stats['rows_per_second'][name]:>10,.0f} rows/s (insert time)")
+
+
+@click.group("db")
+def db_group() -> None:
+    """Schema migrations (files in migrations/)."""
+
+
+@db_group.command("upgrade")
+@click.option("--to", "target", help="Stop after this version (default: apply everything pending).")
+def db_upgrade_command(target) -> None:
+    """Apply pending migrations."""
+    from app.database.db import engine
+    from app.database.migrations import upgrade
+
+    done = upgrade(engine, target=target, echo=click.echo)
+    click.echo(f"Applied {len(done)} migration(s)" if done else "Schema is up to date")
+
+
+@db_group.command("status")
+def db_status_command() -> None:
+    """List applied and pending migrations."""
+    from app.database.db import engine
+    from app.database.migrations import applied_versions, discover
+
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    for migration in discover():
+        at = applied.get(migration.version)
+        state = f"applied {at:%Y-%m-%d %H:%M:%S}" if at else "pending"
+        click.echo(f"{migration.version} {migration.name:<32} {state:<28} {migration.description}")
+
+
+def register_commands(app) -> None:
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(purge_blacklist_command)
+    app.cli.add_command(drain_outbox_command)
+    app.cli.add_command(seed_data_command)
+    app.cli.add_command(db_group)
@@ -5,10 +5,99 @@ import os
 load_dotenv()
 
 class Config:
-    """Sendgird mail config"""
-    MAIL_SERVER = "smtp.sendgrid.net"
-    MAIL_PORT = 587
-    MAIL_USE_TLS = True
-    MAIL_USERNAME = "apikey"
+    """Sendgird mail config (MAIL_SERVER/MAIL_PORT/MAIL_USE_TLS can point at a local SMTP server)"""
+    MAIL_SERVER = os.getenv("MAIL_SERVER", "smtp.sendgrid.net")
+    MAIL_PORT = int(os.getenv("MAIL_PORT", 587))
+    MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "true").lower() == "true"
+    MAIL_USERNAME = os.getenv("MAIL_USERNAME", "apikey")
     MAIL_PASSWORD = os.getenv("SENDGRID_API_KEY")
-    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
\ No newline at end of file
+    MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
+    
+    """Database engine (per engine: primary and each replica)"""
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+    
+    """Schema migrations (`flask db upgrade`; true = also apply pending ones at boot, see app/database/migrations.py)"""
+    DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "false").lower() == "true"
+    
+    """Async views (app/asgi.py; empty = DATABASE_URL with its async driver, see app/database/async_db.py)"""
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+    
+    """Read replicas (empty = everything on the primary)"""
+    DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+    DB_STICKY_SECONDS = float(os.getenv("DB_STICKY_SECONDS", 5))      # > replication lag
+    DB_STICKY_MAX_USERS = int(os.getenv("DB_STICKY_MAX_USERS", 100000))
+    
+    """Pagination"""
+    MAX_PER_PAGE = int(os.getenv("MAX_PER_PAGE", 100))
+    COUNT_CACHE_TTL_SECONDS = int(os.getenv("COUNT_CACHE_TTL_SECONDS", 30))
+    COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", 10000))
+    MAX_STATS_IDS = int(os.getenv("MAX_STATS_IDS", 200))              # post ids per /post/stats call
+
+    
+    """Comment threads"""
+    REPLIES_PER_THREAD = int(os.getenv("REPLIES_PER_THREAD", 10))
+    COMMENT_TREE_MAX_DEPTH = int(os.getenv("COMMENT_TREE_MAX_DEPTH", 20))
+    
+    """Trending feed (per worker, see app/services/trending.py; 0 seconds = compute once on first use)"""
+    TRENDING_WINDOW_HOURS = float(os.getenv("TRENDING_WINDOW_HOURS", 72))
+    TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 12))
+    TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", 1))
+    TRENDING_COMMENT_WEIGHT = float(os.getenv("TRENDING_COMMENT_WEIGHT", 2))
+    TRENDING_TOP_N = int(os.getenv("TRENDING_TOP_N", 1000))
+    TRENDING_REFRESH_SECONDS = float(os.getenv("TRENDING_REFRESH_SECONDS", 60))
+    
+    """Token revocation filter (per worker)"""
+    REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", 100000))
+    REVOCATION_FILTER_FP_RATE = float(os.getenv("REVOCATION_FILTER_FP_RATE", 0.001))
+    REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", 2))
+    REVOCATION_REBUILD_SECONDS = float(os.getenv("REVOCATION_REBUILD_SECONDS", 3600))
+    
+    """Background threads (blacklist purge, outbox, like buffer, trending, revocation sync), started on the first request or by the server entry points"""
+    START_WORKERS = os.getenv("START_WORKERS", "true").lower() == "true"
+    
+    """Token blacklist purge (0 disables the background purge)"""
+    TOKEN_PURGE_INTERVAL_SECONDS = float(os.getenv("TOKEN_PURGE_INTERVAL_SECONDS", 600))
+    TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", 1000))
+    
+    """Authentication caches (per worker)"""
+    CLAIMS_CACHE_SIZE = int(os.getenv("CLAIMS_CACHE_SIZE", 10000))
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+    USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+    
+    """Email outbox (0 workers disables the background drain)"""
+    EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", 1))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 2))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 8))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", 30))
+    EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+    
+    """Likes (write-behind buffers toggles in memory per worker, see app/services/like_service.py)"""
+    LIKE_WRITE_BEHIND = os.getenv("LIKE_WRITE_BEHIND", "false").lower() == "true"
+    LIKE_FLUSH_INTERVAL_SECONDS = float(os.getenv("LIKE_FLUSH_INTERVAL_SECONDS", 1))
+    LIKE_FLUSH_BATCH_SIZE = int(os.getenv("LIKE_FLUSH_BATCH_SIZE", 1000))
+    LIKE_BUFFER_MAX_PENDING = int(os.getenv("LIKE_BUFFER_MAX_PENDING", 100000))
+    
+    """Password hashing (per worker process)"""
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    HASHER_WORKERS = int(os.getenv("HASHER_WORKERS", os.cpu_count() or 2))
+    HASHER_MAX_QUEUE = int(os.getenv("HASHER_MAX_QUEUE", 32))
+    
+    """JSON responses"""
+    JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson")                 # orjson (when installed) | stdlib
+    JSON_DATETIME_FORMAT = os.getenv("JSON_DATETIME_FORMAT", "http")   # http (Flask's default) | iso
+    JSON_STREAM_CHUNK_SIZE = int(os.getenv("JSON_STREAM_CHUNK_SIZE", 500))
+    
+    """SQL instrumentation (per request)"""
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "true").lower() == "true"
+    SQL_TIMING_HEADERS = os.getenv("SQL_TIMING_HEADERS", "true").lower() == "true"    # Server-Timing / X-Query-Count
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+    N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))
+    
+    """Prometheus metrics (GET /metrics)"""
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
\ No newline at end of file
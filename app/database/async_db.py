@@ -0,0 +1,113 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from typing import Any, Callable, Coroutine, List, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from app.config import Config
+from app.database.db import DATABASE_URL, engine_options
+from app.utils.metrics import instrument_pool
+
+
+'''
+Async database access, for the async views served by app/asgi.py.
+
+The async engine points at the same database as the sync one (DATABASE_URL
+with its async driver: sqlite -> aiosqlite, mysql -> aiomysql, or
+ASYNC_DATABASE_URL) and uses the same pool sizing. It is only created on
+first use, so the sync app never needs the async drivers.
+
+Async views do NOT get a fresh event loop per request (Flask's default):
+run_on_loop() hands every coroutine to ONE long-lived loop per process,
+running in its own thread, with the request's context (request, g, ...).
+Connections in the async pool belong to that loop, so they are reused across
+requests. Queries a view awaits together (asyncio.gather, one session each)
+overlap on the database instead of running back to back.
+'''
+
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "mysql": "aiomysql"}
+
+
+def async_database_url(url: str) -> str:
+    """`url` with the async driver of its backend."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}, set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_engine_lock = threading.Lock()
+
+
+def get_async_engine() -> AsyncEngine:
+    global _engine, _sessionmaker
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = Config.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+                options = engine_options(url)
+                options.pop("poolclass", None)          # async engines need their own (AsyncAdaptedQueuePool)
+                _engine = create_async_engine(url, **options)
+                instrument_pool(_engine.sync_engine, "async")
+                _sessionmaker = async_sessionmaker(_engine, expire_on_commit=False)
+    return _engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    """A new AsyncSession: `async with AsyncSessionLocal() as session: ...`"""
+    get_async_engine()
+    return _sessionmaker()
+
+
+async def fetch_all(stmt) -> List:
+    """Rows of one statement in its own short session, so several can be gathered concurrently."""
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(stmt)).all()
+
+
+async def fetch_scalar(stmt) -> Any:
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(stmt)).scalar()
+
+
+'''Process-wide event loop for async views'''
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-views", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _start(coro: Coroutine, future: concurrent.futures.Future) -> None:
+    # Runs on the loop, inside the caller's context: the task copies it
+    task = asyncio.ensure_future(coro)
+
+    def done(task: asyncio.Task) -> None:
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+    task.add_done_callback(done)
+
+
+def run_on_loop(func: Callable[..., Coroutine]) -> Callable[..., Any]:
+    """Flask.async_to_sync replacement: run the coroutine on the shared loop and wait for its result."""
+    def wrapper(*args, **kwargs):
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        get_loop().call_soon_threadsafe(_start, func(*args, **kwargs), future, context=contextvars.copy_context())
+        return future.result()
+    return wrapper
@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session, Session
+from contextvars import ContextVar
 from dotenv import load_dotenv
+from typing import Dict, List
+from app.config import Config
+from app.utils.ttl_cache import TTLCache
+from app.utils.metrics import TimedQueuePool, instrument_pool
+import random
 import os
 
 load_dotenv()
@@ -10,11 +17,107 @@ if not DATABASE_URL:
     print("Error: DATABASE_URL environment variable is not set.")
     raise ValueError("database url is not set to the .env file!")
 
+
+def engine_options(url: str) -> Dict:
+    '''Engine profile from Config (DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_ECHO, ...)'''
+    options = {
+        "echo": Config.DB_ECHO,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return options                  # in-memory SQLite uses a single-connection pool, no sizing
+    options.update(
+        poolclass=TimedQueuePool,       # reports checkout wait to /metrics
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+    )
+    return options
+
+
 '''Engine with connection pooling for production'''
-engine = create_engine(DATABASE_URL, echo=True, pool_pre_ping=True, pool_recycle=3600)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+'''Optional read replicas (DATABASE_REPLICA_URLS, comma separated)'''
+replica_engines: List = [
+    create_engine(url.strip(), **engine_options(url.strip()))
+    for url in Config.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+
+instrument_pool(engine, "primary")
+for i, replica in enumerate(replica_engines):
+    instrument_pool(replica, f"replica{i}")
+
+# Set by @use_replica (app/utils/use_replica.py) for the duration of a read-only handler
+read_from_replica: ContextVar[bool] = ContextVar("read_from_replica", default=False)
+
+# Users who committed a write recently read from the primary (read-your-writes). This is the per-worker
+# half; the signed cookie set by app/utils/use_replica.py carries it to the user's next request on any worker
+recent_writers = TTLCache(maxsize=Config.DB_STICKY_MAX_USERS, ttl=Config.DB_STICKY_SECONDS)
+
+
+class RoutingSession(Session):
+    '''
+    Sends reads to a replica while a @use_replica handler runs. Everything else
+    goes to the primary: writes, flushes, and any statement after this session
+    has written in the current transaction.
+
+    The replica is picked once per transaction and kept until it ends: replicas
+    lag by different amounts, and reads spread over several of them could see
+    newer data, then older.
+    '''
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            replica_engines
+            and read_from_replica.get()
+            and not self._flushing
+            and not self.info.get("wrote")
+            and not getattr(clause, "is_dml", False)
+        ):
+            replica = self.info.get("replica")
+            if replica is None:
+                replica = self.info["replica"] = random.choice(replica_engines)
+            return replica
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session) -> None:
+    if not session.info.pop("wrote", False) or not replica_engines:
+        return
+    from flask import g, has_request_context        # lazy: the database layer does not need Flask otherwise
+    user = getattr(g, "current_user", None) if has_request_context() else None
+    if user is not None:
+        recent_writers.set(user.id, True)
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session) -> None:
+    session.info.pop("wrote", None)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _unpin_replica(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("replica", None)
+
 
 # Threads safe session
-SessionLocal: sessionmaker[Session] = scoped_session(sessionmaker(bind=engine))
+SessionLocal: sessionmaker[Session] = scoped_session(sessionmaker(bind=engine, class_=RoutingSession))
 
 # Base class for ORM Models
 Base: declarative_base = declarative_base()
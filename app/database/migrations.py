@@ -0,0 +1,168 @@
+import glob
+import importlib.util
+import os
+import re
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+
+'''
+Versioned schema migrations.
+
+Migrations are the files in migrations/ named `<version>_<name>.py`, applied
+in version order. Each one defines `upgrade(ctx: MigrationContext)`, and its
+module docstring is the description. Applied versions are recorded in the
+`schema_migrations` table, so a migration runs once per database:
+
+    flask db status        # applied / pending
+    flask db upgrade       # apply everything pending (or --to <version>)
+
+Rules for writing one:
+- check before changing (ctx.has_table / has_column / has_index). The
+  baseline creates missing tables from the CURRENT models, so on a fresh
+  database later migrations find their work already done. MySQL DDL also
+  commits implicitly, so a migration interrupted halfway must be safe to rerun.
+- create indexes with ctx.create_index(). On MySQL it runs
+  `ALTER TABLE ... ADD INDEX ..., ALGORITHM=INPLACE, LOCK=NONE`, which builds
+  the index without blocking reads or writes (and fails instead of silently
+  locking the table if the server cannot do it online).
+- declare every index in the model too, so models and migrations agree.
+
+On MySQL a named lock (GET_LOCK) keeps two deploys from migrating at once.
+'''
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations")
+_FILENAME = re.compile(r"^(\d+)_(\w+)\.py$")
+_LOCK_NAME = "schema_migrations"
+
+_version_table = Table(
+    "schema_migrations", MetaData(),
+    Column("version", String(32), primary_key=True),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration:
+    def __init__(self, version: str, name: str, path: str) -> None:
+        self.version = version
+        self.name = name
+        self.path = path
+        self._module = None
+
+    @property
+    def module(self):
+        if self._module is None:
+            spec = importlib.util.spec_from_file_location(f"migrations.m{self.version}_{self.name}", self.path)
+            self._module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(self._module)
+        return self._module
+
+    @property
+    def description(self) -> str:
+        doc = (self.module.__doc__ or "").strip()
+        return doc.splitlines()[0] if doc else self.name
+
+    def upgrade(self, ctx: "MigrationContext") -> None:
+        self.module.upgrade(ctx)
+
+
+class MigrationContext:
+    """What a migration gets: the connection plus dialect-aware helpers."""
+
+    def __init__(self, conn: Connection, echo: Callable[[str], None]) -> None:
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self.echo = echo
+
+    def _inspector(self):
+        return inspect(self.conn)               # fresh each time: earlier steps may have changed the schema
+
+    def has_table(self, table: str) -> bool:
+        return self._inspector().has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(c["name"] == column for c in self._inspector().get_columns(table))
+
+    def has_index(self, table: str, name: str) -> bool:
+        return any(i["name"] == name for i in self._inspector().get_indexes(table))
+
+    def execute(self, sql: str, params: Optional[Dict] = None):
+        return self.conn.execute(text(sql), params or {})
+
+    def add_column(self, table: str, column: str, ddl: str) -> bool:
+        """`ALTER TABLE table ADD COLUMN column ddl` unless it exists. Returns True if added."""
+        if self.has_column(table, column):
+            return False
+        self.echo(f"  add column {table}.{column}")
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        return True
+
+    def create_index(self, name: str, table: str, columns: List[str], unique: bool = False) -> bool:
+        """Online index build unless it exists. Returns True if created."""
+        if self.has_index(table, name):
+            return False
+        self.echo(f"  create index {name} on {table}({', '.join(columns)})")
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        if self.dialect == "mysql":
+            self.execute(f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)}), ALGORITHM=INPLACE, LOCK=NONE")
+        else:
+            self.execute(f"CREATE {kind} {name} ON {table} ({', '.join(columns)})")
+        return True
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for path in glob.glob(os.path.join(directory, "*.py")):
+        match = _FILENAME.match(os.path.basename(path))
+        if match:
+            migrations.append(Migration(match.group(1), match.group(2), path))
+    migrations.sort(key=lambda m: int(m.version))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def applied_versions(conn: Connection) -> Dict[str, datetime]:
+    if not inspect(conn).has_table(_version_table.name):
+        return {}
+    return dict(conn.execute(select(_version_table.c.version, _version_table.c.applied_at)).all())
+
+
+def pending(engine: Engine) -> List[Migration]:
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+    return [m for m in discover() if m.version not in applied]
+
+
+def upgrade(engine: Engine, target: Optional[str] = None, echo: Callable[[str], None] = print) -> List[Migration]:
+    """Apply pending migrations up to `target` (inclusive, default: all), each in its own transaction."""
+    lock = engine.connect() if engine.dialect.name == "mysql" else None
+    if lock is not None and not lock.execute(text("SELECT GET_LOCK(:name, 600)"), {"name": _LOCK_NAME}).scalar():
+        lock.close()
+        raise RuntimeError("Another process is running migrations")
+
+    done = []
+    try:
+        _version_table.create(engine, checkfirst=True)
+        for migration in discover():
+            if target is not None and int(migration.version) > int(target):
+                break
+            with engine.begin() as conn:
+                if migration.version in applied_versions(conn):
+                    continue
+                echo(f"{migration.version} {migration.name}: {migration.description}")
+                migration.upgrade(MigrationContext(conn, echo))
+                conn.execute(_version_table.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.now(timezone.utc)
+                ))
+            done.append(migration)
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": _LOCK_NAME})
+            lock.close()
+    return done
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Integer, Index
 from app.database.db import Base
 import uuid 
 from datetime import datetime, timezone
@@ -19,6 +19,16 @@ class Comment(Base):
     created_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at: datetime =  Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
+    # Number of direct replies, kept in step by app/services/counter_service.py
+    reply_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    # migrations/0004_hot_path_indexes.py
+    __table_args__ = (
+        Index("ix_comments_post_parent_created", "post_id", "parent_id", "created_at", "id"),
+        Index("ix_comments_user_created", "user_id", "created_at", "id"),
+        Index("ix_comments_parent_created", "parent_id", "created_at", "id"),
+    )
+    
     
     # Self-referencing relationships
     parent = relationship(
@@ -33,7 +43,7 @@ class Comment(Base):
         "Comment", 
         back_populates="parent", 
         cascade="all, delete-orphan", 
-        lazy="joined",
+        lazy="select",          # threads are loaded by app/services/comment_tree.py, never self-join every Comment query
         single_parent=True
     )
     
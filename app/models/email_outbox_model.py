@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Text, DateTime, Integer, Index
+from app.database.db import Base
+import uuid
+from datetime import datetime, timezone
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    
+    id: str = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    recipient: str = Column(String(100), nullable=False)
+    subject: str = Column(String(255), nullable=False)
+    body: str = Column(Text, nullable=False)
+    
+    status: str = Column(String(10), default="pending", nullable=False)           # pending -> sent | failed
+    attempts: int = Column(Integer, default=0, nullable=False)
+    next_attempt_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    locked_by: str = Column(String(36), nullable=True)                             # worker holding the lease
+    last_error: str = Column(Text, nullable=True)
+    
+    created_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    sent_at: datetime = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
+    def __repr__(self) -> str:
+        return f"<EmailOutbox(ID={self.id}, RECIPIENT={self.recipient}, STATUS={self.status}, ATTEMPTS={self.attempts})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, String, ForeignKey, DateTime, UniqueConstraint, Index
 from app.database.db import Base
 import uuid
 from datetime import datetime, timezone
@@ -13,6 +13,7 @@ class Like(Base):
     
     __table_args__ = (
         UniqueConstraint('user_id', 'post_id', name='unique_user_post_like'),
+        Index("ix_likes_post_created", "post_id", "created_at", "id"),         # migrations/0004_hot_path_indexes.py
     )
     
     def __repr__(self) -> str:
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Index
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 import uuid
@@ -14,6 +14,20 @@ class Post(Base):
     user_id: str = Column(String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
+    # Denormalized counters, kept in step by app/services/counter_service.py
+    like_count: int = Column(Integer, default=0, server_default="0", nullable=False)
+    comment_count: int = Column(Integer, default=0, server_default="0", nullable=False)   # top-level comments
+    reply_count: int = Column(Integer, default=0, server_default="0", nullable=False)     # replies at any depth
+    
+    # Bumped by every write that changes what the post's read endpoints return (ETags, app/utils/etag.py)
+    version: int = Column(Integer, default=0, server_default="0", nullable=False)
+    
+    # migrations/0004_hot_path_indexes.py
+    __table_args__ = (
+        Index("ix_posts_created", "created_at", "id"),
+        Index("ix_posts_user_created", "user_id", "created_at"),
+    )
+    
     comments = relationship("Comment", backref="post", cascade="all, delete-orphan")
     likes = relationship("Like", backref="post", cascade="all, delete-orphan")
     
@@ -8,11 +8,11 @@ class TokenBlacklist(Base):
     __tablename__ = 'token_blacklist'
     
     id: str = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    token: str = Column(String(512), nullable=False, unique=True)              # JWT string
+    jti: str = Column(String(64), nullable=False, unique=True)                  # jti claim, or sha256 of legacy tokens (see get_token_id)
     token_type: str = Column(String(10), nullable=False)                # Token Type (access or refresh)
     user_id: str =  Column(String(36), nullable=False)
-    blacklisted_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    expires_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    blacklisted_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)
+    expires_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False, index=True)   # expired rows are purged
     reason: str = Column(String(100), default="logout", nullable=True)
     
     def __repr__(self) -> str:
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Integer
 from sqlalchemy.orm import relationship
 from app.database.db import Base
 from datetime import datetime, timezone
 import uuid
-import bcrypt
+from app.services.password_hasher import password_hasher
 
 
 class User(Base):
@@ -15,6 +15,9 @@ class User(Base):
     _password: str = Column("password", String(255), nullable=False)
     created_at: datetime = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
     
+    # Embedded in every token as the "ver" claim; bumping it revokes all of the user's sessions
+    token_version: int = Column(Integer, default=0, server_default="0", nullable=False)
+    
     posts = relationship("Post", backref="user", cascade="all, delete-orphan")
     comments = relationship("Comment", backref="user", cascade="all, delete-orphan")
     likes = relationship("Like", backref="user", cascade="all, delete-orphan")
@@ -32,14 +35,15 @@ class User(Base):
     
     @password.setter
     def password(self, plain_text: str) -> None:
-        self._password = bcrypt.hashpw(
-            plain_text.encode('utf-8'), bcrypt.gensalt()
-        ).decode('utf-8')
+        # Runs on the bounded bcrypt pool, may raise HasherBusy
+        self._password = password_hasher.hash(plain_text)
         
-    def verify_password(self, plain_text: str)-> None:
-        return bcrypt.checkpw(
-            plain_text.encode('utf-8'), self._password.encode('utf-8')
-        )  
+    def verify_password(self, plain_text: str)-> bool:
+        return password_hasher.verify(plain_text, self._password)
+    
+    def password_needs_rehash(self) -> bool:
+        """True when the stored hash was made with a different BCRYPT_ROUNDS."""
+        return password_hasher.needs_rehash(self._password)
     
     def __repr__(self) -> str:
         return f"<User(ID={self.id}, USERNAME={self.username}, EMAIL={self.email})>"
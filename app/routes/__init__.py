@@ -4,6 +4,7 @@ from .user_routes import user_bp
 from .post_routes import post_bp
 from .comment_routes import comment_bp
 from .like_routes import like_bp
+from .metrics_routes import metrics_bp
 
-all_blueprints = [ping_bp, auth_bp, user_bp, post_bp, comment_bp, like_bp]
+all_blueprints = [ping_bp, auth_bp, user_bp, post_bp, comment_bp, like_bp, metrics_bp]
 
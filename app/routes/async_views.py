@@ -0,0 +1,123 @@
+import asyncio
+from flask import Flask, g
+from app.config import Config
+from app.database.async_db import fetch_all, fetch_scalar, run_on_loop
+from app.routes.comment_routes import comment_page_args, comment_state_stmt, comments_etag, comments_response
+from app.routes.post_routes import (
+    feed_args, latest_feed_stmts, latest_feed_page, trending_rows_stmt, trending_feed_page,
+    feed_etag, feed_posts_stmt, in_page_order, feed_response,
+)
+from app.services.comment_tree import load_comment_tree_async
+from app.services.feed_service import build_post_stats_stmt, feed_items, post_stats_from_rows
+from app.services.trending import get_trending_ranker
+from app.utils.etag import conditional_response_async
+from app.utils.pagination import cached_count_async
+from app.utils.response_helper import api_response
+from app.utils.token_required import token_required
+
+
+'''
+Async twins of the I/O-heavy read endpoints, installed over the sync views by
+install_async_views() (app/asgi.py does it). Same URLs, parameters, responses
+and ETags as the sync views, built by the same helpers (parameters, statements,
+pagination, ETag, envelope) from post_routes and comment_routes; the
+difference is that the statements run on the async engine and independent
+ones are awaited together, each on its own session, so they overlap:
+
+- feed: the total (when not cached) with the page, then the posts with their
+  stats
+- comment tree: the page of roots with the replies below them
+
+Every other endpoint keeps its sync view.
+'''
+
+
+@token_required
+async def get_all_post():
+    """Async twin of post_routes.get_all_post."""
+    current_user = g.current_user
+    try:
+        try:
+            args = feed_args()
+        except ValueError as e:
+            return api_response(True, str(e), [], 400)
+
+        if args.sort == "trending":
+            ranked, total = await get_trending_ranker().page_async((args.page - 1) * args.per_page, args.per_page)
+            page_rows, pagination = trending_feed_page(args, ranked, total, await fetch_all(trending_rows_stmt(ranked)))
+        else:
+            try:
+                count_stmt, page_stmt = latest_feed_stmts(args)
+            except ValueError:
+                return api_response(True, "Invalid cursor", [], 400)
+
+            if args.include_total:
+                total, rows = await asyncio.gather(
+                    cached_count_async(("posts", args.search), lambda: fetch_scalar(count_stmt)),
+                    fetch_all(page_stmt),
+                )
+            else:
+                total, rows = None, await fetch_all(page_stmt)
+            page_rows, pagination = latest_feed_page(args, rows, total)
+
+        if not page_rows:
+            return api_response(False, "No posts found", [], 404)
+
+        post_ids = [row.id for row in page_rows]
+
+        async def build():
+            loaded_rows, stats_rows = await asyncio.gather(
+                fetch_all(feed_posts_stmt(post_ids)),
+                fetch_all(build_post_stats_stmt(post_ids, current_user.id)),
+            )
+            posts = in_page_order(loaded_rows, post_ids)
+            return feed_response(feed_items(posts, post_stats_from_rows(stats_rows, current_user.id)), pagination)
+
+        return await conditional_response_async(feed_etag(current_user.id, pagination, page_rows), build)
+    except Exception as e:
+        return api_response(True, "Failed to fetch posts!", str(e), 500)
+
+
+@token_required
+async def get_comments_by_post(post_id):
+    """Async twin of comment_routes.get_comments_by_post."""
+    try:
+        try:
+            args = comment_page_args()
+        except ValueError as e:
+            return api_response(True, str(e), None, 400)
+
+        rows = await fetch_all(comment_state_stmt(post_id))
+        if not rows:
+            return api_response(True,'post does not exist!', None, 404)
+        post = rows[0]
+
+        async def build():
+            try:
+                final_output, next_cursor, has_more = await load_comment_tree_async(
+                    post_id,
+                    per_page=args.per_page, page=args.page, cursor=args.cursor,
+                    replies_per_thread=args.replies_per_thread, max_depth=Config.COMMENT_TREE_MAX_DEPTH
+                )
+            except ValueError:
+                return api_response(True, "Invalid cursor", None, 400)
+
+            return comments_response(args, post.comment_count, final_output, next_cursor, has_more)
+
+        return await conditional_response_async(comments_etag(post_id, post.version), build)
+    except Exception as e:
+        return api_response(True, "Failed to fetch comments", str(e), 500)
+
+
+# endpoint -> async view
+ASYNC_VIEWS = {
+    "post_bp.get_all_post": get_all_post,
+    "comment_bp.get_comments_by_post": get_comments_by_post,
+}
+
+
+def install_async_views(app: Flask) -> None:
+    """Serve the ASYNC_VIEWS endpoints with their async twins, run on the shared loop (app/database/async_db.py)."""
+    app.async_to_sync = run_on_loop
+    for endpoint, view in ASYNC_VIEWS.items():
+        app.view_functions[endpoint] = view
@@ -1,23 +1,33 @@
 from flask import Blueprint, request, jsonify, Response, g
-from sqlalchemy import or_
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, Query
 from app.database.db import SessionLocal
 from app.models.user_model import User
-from app.schemas.user_schema import UserSchema
+from app.schemas.compiled import user_schema
 from typing import Dict, Any
-from app.utils.jwt_helper import create_access_token, create_refresh_token, decode_token
+from app.utils.jwt_helper import create_access_token, create_refresh_token, decode_token, get_token_id, REFRESH_TOKEN_EXPIRE_DAYS
 from app.utils.token_required import token_required
 from app.models.token_blacklist_model import TokenBlacklist
 import datetime
 from app.utils.response_helper import api_response
-from app.utils.email_helper import send_welcome_message
+from app.utils.email_helper import queue_welcome_message
+from app.services.revocation_filter import revocation_filter, version_marker, VERSION_MARKER
+from app.services.auth_cache import forget_token, get_verified_claims, invalidate_user
+from app.services.password_hasher import HasherBusy
 
 
 '''create Blueprint'''
 auth_bp = Blueprint("auth_bp", __name__ , url_prefix="/api/v1/auth")
 
 
-user_schema: UserSchema = UserSchema()          # Initialize schema 
+
+
+def busy_response() -> Response:
+    """503 when the bcrypt pool is saturated, see app/services/password_hasher.py"""
+    response, status = api_response(True, "Server is busy, please try again shortly.", None, 503)
+    response.headers["Retry-After"] = "1"
+    return response, status
 
 @auth_bp.route("/register", methods=['POST'])
 def register() -> Response:
@@ -44,14 +54,10 @@ def register() -> Response:
         # Create new user instance
         new_user: User = User(**validate_input)
         session.add(new_user)
+        
+        # Welcome message goes to the outbox in the same transaction, sent in the background
+        queue_welcome_message(session, new_user.email, new_user.username)
         session.commit()
-                
-        # Send welcome message
-        try:
-            send_welcome_message(new_user.email, new_user.username)
-            print("Email sent successfully.")
-        except Exception as e:
-            print(f"Email sending failed: {str(e)}")
 
         return jsonify({
             "error_code": False,
@@ -59,6 +65,9 @@ def register() -> Response:
             "success": True,
         }), 201
 
+    except HasherBusy:
+        session.rollback()
+        return busy_response()
     except Exception as e:
         session.rollback()
         return api_response(True, "Registration Failed!", str(e), 500)
@@ -91,10 +100,19 @@ def login() -> Response:
                 "message": "Invalid email or password",
                 "data": None
             }), 401
+        
+        # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plain password
+        if user.password_needs_rehash():
+            try:
+                user.password = data["password"]
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"Password rehash skipped: {str(e)}")
 
         # Generate access and refresh tokens
-        access_token = create_access_token({"user_id": user.id, "email": user.email})
-        refresh_token = create_refresh_token({"user_id": user.id, "email": user.email})
+        access_token = create_access_token({"user_id": user.id, "email": user.email}, user.token_version)
+        refresh_token = create_refresh_token({"user_id": user.id, "email": user.email}, user.token_version)
         
         return jsonify({
             "error_code": False,
@@ -112,6 +130,8 @@ def login() -> Response:
             }
         }), 200
             
+    except HasherBusy:
+        return busy_response()
     except Exception as e:
         return jsonify({
             "error_code": True,
@@ -143,9 +163,8 @@ def refresh_token() -> Response:
         if not payload or payload.get("type") != "refresh":
             return jsonify({"error_code": True, "message": "Invalid refresh token"}), 401
         
-        # Check if token is blacklisted
-        blacklisted = session.query(TokenBlacklist).filter_by(token=refresh_token).first()
-        if blacklisted:
+        # Check if token is blacklisted (in-memory filter, DB only on a filter hit)
+        if revocation_filter.is_revoked(get_token_id(refresh_token, payload)):
             return jsonify({
                 "error_code": True,
                 "message": "Refresh token has been revoked or blacklisted",
@@ -160,10 +179,14 @@ def refresh_token() -> Response:
         # (Optional) verify token belongs to same user
         if str(user.id) != str(payload["user_id"]):
             return api_response(True, "Token does not belong to this user", 401)
+        
+        # Revoked by "logout everywhere"
+        if payload.get("ver", 0) != user.token_version:
+            return api_response(True, "Refresh token has been revoked", None, 401)
             
         new_access_token = create_access_token({
             "user_id": payload['user_id'], "email": payload['email']
-        })
+        }, user.token_version)
         
         return jsonify({
             "error_code": False,
@@ -183,7 +206,7 @@ def refresh_token() -> Response:
 
 
 """
-    Route for log out
+    Route for log out (this session only)
 """
 @auth_bp.route("/logout", methods=['POST'])
 @token_required
@@ -200,31 +223,11 @@ def logout():
             
         access_token = access_token.split(" ")[1] if " " in access_token else access_token
         
-        # Decode the access token
-        decode_access: dict = decode_token(access_token)
+        # Decode the access token (already verified by token_required, served from the claims cache)
+        decode_access: dict = get_verified_claims(access_token)
         if not decode_access or decode_access.get("type") != "access":
             return api_response(True, "Invalid access token!", 401)
         
-        token_type_access = decode_access.get("type", "access")
-        exp_timestamp = decode_access.get("exp")
-        expires_access = datetime.datetime.fromtimestamp(exp_timestamp, datetime.timezone.utc)
-        
-        # Checking if token already exists or not
-        exist_access_token = session.query(TokenBlacklist).filter_by(token = access_token).first()
-        if exist_access_token:
-            return api_response(True, "Access token already blacklisted", [], 401)
-        
-        # add to TokenBlacklist
-        blacklisted_access_token = TokenBlacklist(
-            token = access_token,
-            token_type = token_type_access,
-            user_id = str(current_user.id),
-            expires_at = expires_access,
-            reason = "logout"
-        )        
-        session.add(blacklisted_access_token)
-        
-        
         ''' 
             Handle refresh token from body
         '''
@@ -238,27 +241,80 @@ def logout():
         if not decode_refresh or decode_refresh.get("type") != "refresh":
             return api_response(True, "Invalid refresh token!", 401)
         
-        token_type_refresh = decode_refresh.get("type", "refresh")
-        exp_timestamp = decode_refresh.get("exp")
-        expires_refresh = datetime.datetime.fromtimestamp(exp_timestamp, datetime.timezone.utc)
+        access_jti = get_token_id(access_token, decode_access)
+        refresh_jti = get_token_id(refresh_token, decode_refresh)
         
-        # Checking if token already exists or not
-        exist_refresh_token =  session.query(TokenBlacklist).filter_by(token = refresh_token).first()
-        if exist_refresh_token:
+        # The access token just passed the revocation check in token_required. The refresh
+        # token goes through the in-memory filter, which only reads the table on a hit.
+        if revocation_filter.is_revoked(refresh_jti):
             return api_response(True, "Refresh token already blacklisted", [], 401)
         
-        # add to TokenBlacklist
-        blacklisted_refresh_token = TokenBlacklist(
-            token = refresh_token,
-            token_type = token_type_refresh,
-            user_id = str(current_user.id),
-            expires_at = expires_refresh,
-            reason = "logout"
+        # add both to TokenBlacklist (one INSERT)
+        session.add_all([
+            TokenBlacklist(
+                jti = access_jti,
+                token_type = "access",
+                user_id = str(current_user.id),
+                expires_at = datetime.datetime.fromtimestamp(decode_access.get("exp"), datetime.timezone.utc),
+                reason = "logout"
+            ),
+            TokenBlacklist(
+                jti = refresh_jti,
+                token_type = "refresh",
+                user_id = str(current_user.id),
+                expires_at = datetime.datetime.fromtimestamp(decode_refresh.get("exp"), datetime.timezone.utc),
+                reason = "logout"
+            ),
+        ])
+        session.commit()
+        
+        # Make this worker reject both tokens right away, others pick them up on their next sync
+        revocation_filter.add(access_jti)
+        revocation_filter.add(refresh_jti)
+        forget_token(access_token)
+        return api_response(False, "User logged out successfully, Both tokens revoked", [], 200)
+    
+    except IntegrityError:
+        # A concurrent logout already blacklisted one of the tokens
+        session.rollback()
+        return api_response(True, "Token already blacklisted", [], 401)
+    
+    except Exception as e:
+        session.rollback()
+        return api_response(True, "Logout failed", str(e), 500)
+
+    finally:
+        session.close()
+
+
+"""
+    Route for log out from every device
+"""
+@auth_bp.route("/logout_all", methods=['POST'])
+@token_required
+def logout_all():
+    session = SessionLocal()
+    current_user = g.current_user
+    try:
+        # One counter bump revokes every access and refresh token issued so far
+        session.execute(
+            update(User).where(User.id == current_user.id).values(token_version=User.token_version + 1)
         )
-        session.add(blacklisted_refresh_token)
+        token_version = session.query(User.token_version).filter_by(id=current_user.id).scalar()
         
+        # Announced on the blacklist feed, so other workers drop their cached snapshot of this user on
+        # their next revocation sync. Kept until every token issued before the bump has expired.
+        session.add(TokenBlacklist(
+            jti = version_marker(current_user.id, token_version),
+            token_type = VERSION_MARKER,
+            user_id = str(current_user.id),
+            expires_at = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+            reason = "logout_all"
+        ))
         session.commit()
-        return api_response(False, "User logged out successfully, Both tokens revoked", [], 200)
+        invalidate_user(current_user.id)
+        
+        return api_response(False, "Logged out from all sessions", [], 200)
     
     except Exception as e:
         session.rollback()
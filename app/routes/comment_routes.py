@@ -1,15 +1,20 @@
 from flask import Blueprint, request, Response, g
 from app.database.db import SessionLocal
 from app.models.comment_model import Comment
-from app.models.user_model import User
 from app.models.post_model import Post
-from app.schemas.comment_schema import CommentSchema
+from app.schemas.compiled import comment_schema
 from app.utils.response_helper import api_response
+from app.utils.etag import conditional_response, version_etag
 from app.utils.token_required import token_required
+from app.utils.use_replica import use_replica
 from datetime import datetime, timezone
 from marshmallow import ValidationError
-from sqlalchemy import desc
-from app.utils.to_iso_utc import to_iso_utc
+from sqlalchemy import select, delete, desc
+from typing import List, NamedTuple, Optional
+from app.utils.pagination import keyset_filter, keyset_page, cached_count, is_truthy
+from app.config import Config
+from app.services.counter_service import bump_post_counters, bump_post_version, bump_comment_replies
+from app.services.comment_tree import load_comment_tree, build_subtree_ids_stmt
 
 comment_bp = Blueprint("comment_bp", __name__, url_prefix="/api/v1/comments")
 
@@ -17,7 +22,6 @@ comment_bp = Blueprint("comment_bp", __name__, url_prefix="/api/v1/comments")
 @token_required
 def add_comment():    
     session = SessionLocal()
-    comment_schema = CommentSchema()
     current_user = g.current_user
     
     try:
@@ -34,6 +38,8 @@ def add_comment():
             parent_comment= session.query(Comment).filter(Comment.id == parent_id).first()
             if not parent_comment:
                 return api_response(True, "Parent comment not found!", None, 404)
+            if parent_comment.post_id != validate_data["post_id"]:
+                return api_response(True, "Parent comment belongs to another post!", None, 400)
             
         new_comment = Comment(
             post_id = validate_data["post_id"],
@@ -43,6 +49,14 @@ def add_comment():
         )
         
         session.add(new_comment)
+        session.flush()
+        
+        # Keep the denormalized counters in the same transaction
+        if parent_id:
+            bump_comment_replies(session, parent_id, 1)
+            bump_post_counters(session, new_comment.post_id, replies=1)
+        else:
+            bump_post_counters(session, new_comment.post_id, comments=1)
         session.commit()
         
         return api_response(False, "Comment added successfully", comment_schema.dump(new_comment), 201)
@@ -58,8 +72,67 @@ def add_comment():
         session.close()
      
         
+"""
+    Comment page building blocks, shared with the async twin of
+    get_comments_by_post (app/routes/async_views.py)
+"""
+
+class CommentPageArgs(NamedTuple):
+    page: int
+    per_page: int
+    replies_per_thread: int
+    cursor: Optional[str]
+    include_total: bool
+
+
+def comment_page_args() -> CommentPageArgs:
+    """Query parameters of get_by_post. Raises ValueError with the 400 message."""
+    try:
+        # Get query parameter for pagination(default: page=1, per_page=10)
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', 10)), 1), Config.MAX_PER_PAGE)
+        replies_per_thread = min(max(int(request.args.get('replies_per_thread', Config.REPLIES_PER_THREAD)), 0), Config.MAX_PER_PAGE)
+    except ValueError:
+        raise ValueError("Invalid request headers!")
+    
+    # Cursor mode: pass `cursor` (empty for the first page) and follow `next_cursor`
+    cursor = request.args.get('cursor', None)
+    include_total = cursor is None or is_truthy(request.args.get('include_total', 'false'))
+    return CommentPageArgs(page, per_page, replies_per_thread, cursor, include_total)
+
+
+def comment_state_stmt(post_id: str):
+    # Counter and version only: a matching If-None-Match is answered from these
+    return select(Post.comment_count, Post.version).where(Post.id == post_id)
+
+
+def comments_etag(post_id: str, version: int) -> str:
+    return version_etag("comments", post_id, version, request.query_string.decode())
+
+
+def comments_response(args: CommentPageArgs, comment_count: int, final_output: List, next_cursor, has_more: bool) -> Response:
+    if not final_output:
+        return api_response(False, "No comments found for this post!", [], 200)
+    
+    # Top-level comment total is a denormalized counter on the post
+    total_comments = comment_count if args.include_total else None
+    
+    if args.cursor is not None:
+        pagination = {"per_page": args.per_page, "next_cursor": next_cursor, "has_more": has_more}
+        if args.include_total:
+            pagination["total"] = total_comments
+    else:
+        pagination = {"page": args.page, "per_page": args.per_page, "total": total_comments}
+
+    return api_response(False, "Fetched comments successfully.", {
+        "comments_data": final_output,
+        "pagination": pagination
+    }, 200)
+
+
 @comment_bp.route("/get_by_post/<string:post_id>", methods=['GET'])
 @token_required
+@use_replica
 def get_comments_by_post(post_id):
     """
     📝 Endpoint Documentation
@@ -72,90 +145,111 @@ def get_comments_by_post(post_id):
     comments associated with a given post ID. Each comment includes essential comment
     details and information about the user who posted it (such as username and email). 
     It ensures only authenticated users (with valid JWT tokens) can access the data.
+    
+    Supports offset pagination (`page`, `per_page`) and cursor pagination: send
+    `cursor` (empty for the first page) and follow `next_cursor` until `has_more`
+    is false. `total` is optional in cursor mode (`include_total=true`).
+    
+    Replies are nested to any depth. Each comment returns at most
+    `replies_per_thread` replies (default: REPLIES_PER_THREAD); when
+    `has_more_replies` is true the rest come from /replies/<comment_id>.
+    The whole page is loaded in a constant number of queries.
+    
+    Sends an ETag derived from the post's version; a request with a matching
+    If-None-Match gets an empty 304 without loading any comment.
     """
 
     session = SessionLocal()
     try:
         try:
-            # Get query parameter for pagination(default: page=1, per_page=10)
-            page = int(request.args.get('page', 1))
-            per_page = int(request.args.get('per_page', 10))
-        except ValueError:
-            return api_response(True, "Invalid request headers!", None, 400)
+            args = comment_page_args()
+        except ValueError as e:
+            return api_response(True, str(e), None, 400)
         
-        if not session.query(Post).filter(Post.id == post_id).first():
+        post = session.execute(comment_state_stmt(post_id)).first()
+        if not post:
             return api_response(True,'post does not exist!', None, 404)
 
-        # Join Comment and User tables
-        top_level_comments = (session.query(Comment)
-                              .filter(Comment.post_id == post_id, Comment.parent_id.is_(None))
-                              .order_by(desc(Comment.created_at))
-                              .offset((page - 1)* per_page)
-                              .limit(per_page).all())
-        if not top_level_comments:
-            return api_response(False, "No comments found for this post!", [], 200)
-        
-        final_output = []
-        
-        for comment in top_level_comments:
-            # 1. Fetch user of this comment 
-            user = session.query(User).filter(User.id == comment.user_id).first()
+        def build():
+            # Page of top-level comments + every reply below them, with authors
+            try:
+                final_output, next_cursor, has_more = load_comment_tree(
+                    session, post_id,
+                    per_page=args.per_page, page=args.page, cursor=args.cursor,
+                    replies_per_thread=args.replies_per_thread, max_depth=Config.COMMENT_TREE_MAX_DEPTH
+                )
+            except ValueError:
+                return api_response(True, "Invalid cursor", None, 400)
             
-            # 2. Fetch replies for this comment
-            
-            replies = session.query(Comment).filter(Comment.parent_id == comment.id).order_by(desc(Comment.created_at)).all()
+            return comments_response(args, post.comment_count, final_output, next_cursor, has_more)
 
-            reply_list = []
-            
-            for reply in replies:
-                reply_user = session.query(User).filter(User.id == reply.user_id).first()
-                
-                reply_list.append({
-                    'id': str(reply.id),
-                    'post_id': reply.post_id,
-                    'content': reply.content,
-                    'created_at': to_iso_utc(reply.created_at),
-                    'updated_at': to_iso_utc(reply.updated_at),
-                    'user': {
-                        'id': str(reply_user.id),
-                        'username': reply_user.username
-                    }
-                })
-            
-            final_output.append({
-                'id': str(comment.id),
-                'post_id': comment.post_id,
-                'content': comment.content,
-                'created_at': to_iso_utc(comment.created_at),
-                'updated_at': to_iso_utc(comment.updated_at),
-                'user': {
-                    'id': user.id,
-                    'username': user.username
-                },
-                'replies': reply_list
-            })
-            
-        total_comments = session.query(Comment).filter(Comment.post_id == post_id, Comment.parent_id.is_(None)).count()
+        return conditional_response(comments_etag(post_id, post.version), build)
+    
+    except Exception as e:
+        session.rollback()
+        return api_response(True, "Failed to fetch comments", str(e), 500)
+    finally:
+        session.close()        
 
 
-        return api_response(False, "Fetched comments successfully.", {
-            "comments_data": final_output,
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": total_comments
-            }
+@comment_bp.route("/replies/<string:comment_id>", methods=['GET'])
+@token_required
+@use_replica
+def get_replies(comment_id):
+    """
+    📝 Endpoint Documentation
+    
+    Endpoint:
+    GET /api/v1/comments/replies/<comment_id>
+    ---
+    == Description: ==
+    "Show more replies": a page of the direct replies of one comment, each with
+    its own nested replies. Same pagination parameters as /get_by_post.
+    """
+    session = SessionLocal()
+    try:
+        try:
+            page = max(int(request.args.get('page', 1)), 1)
+            per_page = min(max(int(request.args.get('per_page', 10)), 1), Config.MAX_PER_PAGE)
+            replies_per_thread = min(max(int(request.args.get('replies_per_thread', Config.REPLIES_PER_THREAD)), 0), Config.MAX_PER_PAGE)
+        except ValueError:
+            return api_response(True, "Invalid pagination parameter", None, 400)
+        
+        cursor = request.args.get('cursor', None)
+        
+        parent = session.query(Comment.post_id, Comment.reply_count).filter(Comment.id == comment_id).first()
+        if not parent:
+            return api_response(True, "Comment not found!", None, 404)
+        
+        try:
+            replies, next_cursor, has_more = load_comment_tree(
+                session, parent.post_id, parent_id=comment_id,
+                per_page=per_page, page=page, cursor=cursor,
+                replies_per_thread=replies_per_thread, max_depth=Config.COMMENT_TREE_MAX_DEPTH
+            )
+        except ValueError:
+            return api_response(True, "Invalid cursor", None, 400)
+        
+        if cursor is not None:
+            pagination = {"per_page": per_page, "next_cursor": next_cursor, "has_more": has_more}
+        else:
+            pagination = {"page": page, "per_page": per_page, "total": parent.reply_count}
+        
+        return api_response(False, "Fetched replies successfully.", {
+            "replies_data": replies,
+            "pagination": pagination
         }, 200)
     
     except Exception as e:
         session.rollback()
-        return api_response(True, "Failed to fetch comments", str(e), 500)
+        return api_response(True, "Failed to fetch replies", str(e), 500)
     finally:
-        session.close()        
+        session.close()
 
 
 @comment_bp.route("/get_by_user/<string:user_id>", methods=['GET'])
 @token_required
+@use_replica
 def get_by_user(user_id):
     session = SessionLocal()
     current_user = g.current_user
@@ -165,13 +259,31 @@ def get_by_user(user_id):
             return api_response(True, "Unauthorized access!", None, 403)
 
         try:
-            page = int(request.args.get("page", 1))
-            per_page = int(request.args.get("per_page", 10))
+            page = max(int(request.args.get("page", 1)), 1)
+            per_page = min(max(int(request.args.get("per_page", 10)), 1), Config.MAX_PER_PAGE)
         except ValueError:
             return api_response(True, "Invalid pagination parameter", None, 400)
         
+        cursor = request.args.get("cursor", None)
+        include_total = cursor is None or is_truthy(request.args.get("include_total", "false"))
 
-        comments = session.query(Comment, Post).join(Post, Comment.post_id == Post.id).filter(Comment.user_id == user_id).order_by(desc(Comment.created_at)).offset((page - 1)* per_page).limit(per_page).all()
+        query = (session.query(Comment, Post)
+                 .join(Post, Comment.post_id == Post.id)
+                 .filter(Comment.user_id == user_id)
+                 .order_by(desc(Comment.created_at), desc(Comment.id)))
+        
+        if cursor is not None:
+            try:
+                after_cursor = keyset_filter(Comment.created_at, Comment.id, cursor)
+            except ValueError:
+                return api_response(True, "Invalid cursor", None, 400)
+            if after_cursor is not None:
+                query = query.filter(after_cursor)
+            comments, next_cursor, has_more = keyset_page(
+                query.limit(per_page + 1).all(), per_page, lambda row: (row[0].created_at, row[0].id)
+            )
+        else:
+            comments = query.offset((page - 1)* per_page).limit(per_page).all()
         
         if not comments:
             return api_response(False, "No comments found for this user!", [], 200)
@@ -187,14 +299,24 @@ def get_by_user(user_id):
                     "title": post.title
                 }
             })
+            
+        total = None
+        if include_total:
+            total = cached_count(
+                ("user_comments", user_id),
+                session.query(Comment).filter(Comment.user_id == user_id).count
+            )
+            
+        if cursor is not None:
+            pagination = {"per_page": per_page, "next_cursor": next_cursor, "has_more": has_more}
+            if include_total:
+                pagination["total"] = total
+        else:
+            pagination = {"page": page, "per_page": per_page, "total": total}
 
         return api_response(False, "Fetched comments by user successfully", {
             "comment_data": result,
-            "pagination": {
-                "page": page,
-                "per_page": per_page,
-                "total": session.query(Comment).filter(Comment.user_id == user_id).count()
-            }
+            "pagination": pagination
         }, 200)
     
     except Exception as e:
@@ -235,13 +357,15 @@ def update_comment(comment_id):
             return api_response(True, "Unauthorized! You can only edit your own comments.", None, 403)
 
         '''Validate incomming data & Update content'''
-        validate_data = CommentSchema().load(data, partial=True)   # partial=True allows updating specific fields
+        validate_data = comment_schema.load(data, partial=True)   # partial=True allows updating specific fields
         comment.content = validate_data['content']
         comment.updated_at = datetime.now(timezone.utc)
+        session.flush()
+        bump_post_version(session, comment.post_id)
 
         session.commit()
 
-        return api_response(False, "Comment updated successfully.", CommentSchema().dump(comment), 200)
+        return api_response(False, "Comment updated successfully.", comment_schema.dump(comment), 200)
             
     except Exception as e:
         session.rollback()
@@ -264,7 +388,23 @@ def delete_comment(comment_id):
       if comment.user_id != current_user.id:
           return api_response(True, "Unauthorized! You can only delete your own comments.", None, 403)
       
-      session.delete(comment)
+      # The whole subtree goes in one DELETE: its ids come from one recursive query, instead of
+      # the ORM cascade loading the replies level by level. They come off the counters too
+      reply_ids = session.scalars(build_subtree_ids_stmt(comment.id)).all() if comment.reply_count else []
+      removed_replies = len(reply_ids)
+      post_id, parent_id = comment.post_id, comment.parent_id
+      
+      session.execute(
+          delete(Comment).where(Comment.id.in_([comment.id, *reply_ids])),
+          execution_options={"synchronize_session": False}
+      )
+      session.expunge(comment)
+      
+      if parent_id:
+          bump_comment_replies(session, parent_id, -1)
+          bump_post_counters(session, post_id, replies=-(removed_replies + 1))
+      else:
+          bump_post_counters(session, post_id, comments=-1, replies=-removed_replies)
       session.commit()
       
       return api_response(False, "Comment deleted successfully!", None, 200)
@@ -1,11 +1,16 @@
-from flask import Blueprint, g
+from flask import Blueprint, g, request
 from app.database.db import SessionLocal
 from app.models.like_model import Like
 from app.models.post_model import Post
 from app.models.user_model import User
 from app.utils.token_required import token_required
-from app.utils.response_helper import api_response
-from sqlalchemy.exc import IntegrityError
+from app.utils.use_replica import use_replica
+from app.utils.response_helper import api_response, api_stream_response, ndjson_stream_response
+from app.utils.pagination import keyset_filter, keyset_page
+from app.utils.etag import conditional_response, version_etag
+from app.config import Config
+from sqlalchemy import select, desc
+from app.services import like_service
 
 
 like_bp = Blueprint("like_bp", __name__, url_prefix="/api/v1/like")
@@ -17,25 +22,19 @@ def toggle_like(post_id):
     current_user = g.current_user
 
     try:
-        post = session.query(Post).filter(Post.id == post_id).first()
-        if not post:
-            return api_response(True, "Post not found!", None, 404)
-        
-        like = session.query(Like).filter(Like.post_id == post_id, Like.user_id == current_user.id).first()
-        
-        if like:
-            session.delete(like)
-            session.commit()
-            return api_response(False, "Liked removed", {"liked": False}, 200)
+        # Write-behind (LIKE_WRITE_BEHIND) only touches memory; the direct path writes without reading first
+        buffer = like_service.like_buffer
+        if buffer is not None:
+            liked = buffer.toggle(session, post_id, current_user.id)
         else:
-            new_like = Like(post_id=post_id, user_id=current_user.id)
-            session.add(new_like)
+            liked = like_service.toggle_like(session, post_id, current_user.id)
             session.commit()
+
+        if liked is None:
+            return api_response(True, "Post not found!", None, 404)
+        if liked:
             return api_response(False, "Post liked", {"liked": True}, 201)
-        
-    except IntegrityError:
-        session.rollback()
-        return api_response(False, "Already liked", {"liked": True}, 200)
+        return api_response(False, "Liked removed", {"liked": False}, 200)
     
     except Exception as e:
         session.rollback()
@@ -46,26 +45,31 @@ def toggle_like(post_id):
 
 @like_bp.route("/count/<string:post_id>", methods=['GET'])
 @token_required
+@use_replica
 def get_like_count(post_id):
     session = SessionLocal()
 
     try:
-        # Check if post exists
-        post = session.query(Post).filter(Post.id == post_id).first()
+        # Check if post exists (counter and version only)
+        post = session.query(Post.like_count, Post.version).filter(Post.id == post_id).first()
         if not post:
             return api_response(True, "Post not found!", None, 404)
 
-        # Count likes for the post
-        like_count = session.query(Like).filter(Like.post_id == post_id).count()
-
-        return api_response(
-            False,
-            "Total likes fetched successfully.",
-            {
-                "post_id": post_id, 
-                "total_likes": like_count
-            },
-            200
+        # Count likes for the post (denormalized counter, no COUNT(*)), plus this worker's unflushed toggles
+        pending = like_service.like_buffer.pending_delta(post_id) if like_service.like_buffer else 0
+        like_count = post.like_count + pending
+
+        return conditional_response(
+            version_etag("likes", post_id, post.version, pending),
+            lambda: api_response(
+                False,
+                "Total likes fetched successfully.",
+                {
+                    "post_id": post_id, 
+                    "total_likes": like_count
+                },
+                200
+            )
         )
 
     except Exception as e:
@@ -78,6 +82,7 @@ def get_like_count(post_id):
 
 @like_bp.route("/is_liked/<string:post_id>", methods=["GET"])
 @token_required
+@use_replica
 def is_liked(post_id):
     """
     Endpoint:
@@ -100,8 +105,12 @@ def is_liked(post_id):
         if not post_exists:
             return api_response(True, "Post not found!", None, 404)
         
-        is_liked = session.query(Like).filter(Like.post_id == post_id, Like.user_id == current_user.id).first()
-        liked = is_liked is not None       # Convert to boolean
+        buffered = like_service.like_buffer.is_liked(post_id, current_user.id) if like_service.like_buffer else None
+        if buffered is not None:
+            liked = buffered
+        else:
+            is_liked = session.query(Like).filter(Like.post_id == post_id, Like.user_id == current_user.id).first()
+            liked = is_liked is not None       # Convert to boolean
         return api_response(False, "Like status fetched successfully", {"is_liked": liked}, 200)
         
     except Exception as e:
@@ -113,7 +122,21 @@ def is_liked(post_id):
 
 @like_bp.route("/list_of_users_liked_to_a_post/<string:post_id>", methods=['GET'])
 @token_required
+@use_replica
 def get_post_likes_With_users(post_id):
+    """
+    Users who liked a post, most recent like first.
+
+    == Query Parameters: ==
+    - none: the whole list, streamed in the usual envelope
+    - `cursor` (string, optional): cursor pagination. Send it empty for the
+      first page, then pass back `next_cursor` until `has_more` is false
+    - `page` (int, optional): offset pagination, with `per_page` (default: 10, max: MAX_PER_PAGE)
+    - `format=ndjson`: export every liker as one JSON object per line
+      (application/x-ndjson), total in the X-Total-Likes header
+
+    `total_likes` is the post's like counter, never a count of the rows sent.
+    """
     session = SessionLocal()
     try:
         # check if a post exist
@@ -121,23 +144,64 @@ def get_post_likes_With_users(post_id):
         if not post:
             return api_response(True, "Post not found!", None, 404)
         
-        likes = session.query(Like, User).join(User, Like.user_id == User.id).filter(Like.post_id == post_id).all()
+        total_likes = post.like_count
+        likers = (
+            select(User.id, User.username, Like.created_at, Like.id)
+            .join(Like, Like.user_id == User.id)
+            .where(Like.post_id == post_id)
+            .order_by(desc(Like.created_at), desc(Like.id))
+        )
+        
+        def liker(row) -> dict:
+            return {"user_id": row[0], "username": row[1], "liked_at": row[2]}
         
-        total_likes = len(likes)
+        def users():
+            # Runs after this view has returned and closed its session; the thread-local session reopens here
+            stream_session = SessionLocal()
+            try:
+                rows = stream_session.execute(likers.execution_options(yield_per=Config.JSON_STREAM_CHUNK_SIZE))
+                for row in rows:
+                    yield liker(row)
+            finally:
+                stream_session.close()
         
-        users = []
-        for like, user in likes:
-            users.append({
-                "user_id": user.id,
-                "username": user.username
-            })
+        if request.args.get("format") == "ndjson":
+            return ndjson_stream_response(users(), headers={"X-Total-Likes": str(total_likes)})
         
-        return api_response(False, "Post likes fetched successfully", {"total_likes": total_likes, "users": users}, 200)
+        cursor = request.args.get("cursor", None)
+        if cursor is None and "page" not in request.args:
+            return api_stream_response("Post likes fetched successfully", users(), "users", {"total_likes": total_likes})
+        
+        try:
+            page = max(int(request.args.get("page", 1)), 1)
+            per_page = min(max(int(request.args.get("per_page", 10)), 1), Config.MAX_PER_PAGE)
+        except ValueError:
+            return api_response(True, "Invalid pagination parameter", None, 400)
+        
+        if cursor is not None:
+            try:
+                after_cursor = keyset_filter(Like.created_at, Like.id, cursor)
+            except ValueError:
+                return api_response(True, "Invalid cursor", None, 400)
+            if after_cursor is not None:
+                likers = likers.where(after_cursor)
+            rows, next_cursor, has_more = keyset_page(
+                session.execute(likers.limit(per_page + 1)).all(), per_page, lambda row: (row[2], row[3])
+            )
+            pagination = {"per_page": per_page, "next_cursor": next_cursor, "has_more": has_more}
+        else:
+            rows = session.execute(likers.offset((page - 1) * per_page).limit(per_page)).all()
+            pagination = {"page": page, "per_page": per_page, "total": total_likes}
+        
+        return api_response(
+            False,
+            "Post likes fetched successfully",
+            {"total_likes": total_likes, "users": [liker(row) for row in rows], "pagination": pagination},
+            200
+        )
         
     except Exception as e:
         session.rollback()
         return api_response(True, "Failed to fetch likes data", str(e), 500)
     finally:
         session.close() 
-        
-        
\ No newline at end of file
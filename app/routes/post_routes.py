@@ -1,14 +1,21 @@
 from flask import Blueprint, request, Response, g
 from app.models.post_model import Post
 from app.models.user_model import User
-from app.models.like_model import Like
-from app.schemas.post_schema import PostSchema
+from app.schemas.compiled import post_schema
 from app.database.db import SessionLocal
 from app.utils.token_required import token_required
+from app.utils.use_replica import use_replica
 from sqlalchemy.orm import Session, Query
-from sqlalchemy import or_, desc
+from sqlalchemy import select, func, or_, desc
+from typing import Dict, List, NamedTuple, Optional, Tuple
 from marshmallow import ValidationError
 from app.utils.response_helper import api_response
+from app.services.feed_service import hydrate_feed, fetch_post_stats
+from app.services.trending import get_trending_ranker
+from app.utils.etag import conditional_response, content_etag, version_etag
+from app.services import like_service
+from app.utils.pagination import keyset_filter, keyset_page, cached_count, is_truthy
+from app.config import Config
 
 
 post_bp = Blueprint("post_bp", __name__, url_prefix="/api/v1/post")
@@ -20,7 +27,6 @@ post_bp = Blueprint("post_bp", __name__, url_prefix="/api/v1/post")
 def upload_post() -> Response:
     
     session: Session =  SessionLocal()
-    post_schema = PostSchema()
     current_user = g.current_user
     
     try:
@@ -62,7 +68,6 @@ def upload_post() -> Response:
 @token_required
 def update_post(post_id) -> Response:
     session: Session=SessionLocal()
-    post_schema = PostSchema()
     current_user = g.current_user
     
     try:
@@ -79,6 +84,7 @@ def update_post(post_id) -> Response:
         
         for key, value in validate_data.items():
             setattr(post, key, value)
+        post.version = Post.version + 1
         
         session.commit()
         
@@ -119,8 +125,114 @@ def delete_post(post_id) -> Response:
         session.close()
         
 
+""" Feed building blocks, shared with the async twin of get_all_post (app/routes/async_views.py) """
+
+class FeedArgs(NamedTuple):
+    page: int
+    per_page: int
+    search: Optional[str]
+    cursor: Optional[str]
+    include_total: bool
+    sort: str
+
+
+def feed_args() -> FeedArgs:
+    """Query parameters of get_all_posts. Raises ValueError with the 400 message."""
+    try:
+        # Get query parameters (default: page=1, per_page=10)
+        page = max(int(request.args.get("page", 1)), 1)
+        per_page = min(max(int(request.args.get("per_page", 10)), 1), Config.MAX_PER_PAGE)
+    except ValueError:
+        raise ValueError("Invalid paginatin parameter")
+    search = request.args.get("search", None)
+    cursor = request.args.get("cursor", None)
+    sort = request.args.get("sort", "latest")
+    if sort not in ("latest", "trending"):
+        raise ValueError("sort must be 'latest' or 'trending'")
+    if sort == "trending" and (search or cursor is not None):
+        raise ValueError("sort=trending only supports page/per_page")
+    include_total = cursor is None or is_truthy(request.args.get("include_total", "false"))
+    return FeedArgs(page, per_page, search, cursor, include_total, sort)
+
+
+def feed_rows_stmt():
+    # The page is picked with (id, created_at, version) only: enough for the cursor and the ETag
+    return select(Post.id, Post.created_at, Post.version).join(User, Post.user_id == User.id)
+
+
+def latest_feed_stmts(args: FeedArgs):
+    """(count, page) statements for sort=latest. Raises ValueError for an invalid cursor."""
+    query = feed_rows_stmt()
+    if args.search:
+        query = query.where(or_(Post.title.ilike(f'%{args.search}%'), Post.content.ilike(f'%{args.search}%')))
+    count_stmt = select(func.count()).select_from(query.subquery())
+
+    # Latest first, id breaks ties so pages never overlap
+    query = query.order_by(desc(Post.created_at), desc(Post.id))
+    if args.cursor is None:
+        return count_stmt, query.offset((args.page - 1) * args.per_page).limit(args.per_page)
+    after_cursor = keyset_filter(Post.created_at, Post.id, args.cursor)
+    if after_cursor is not None:
+        query = query.where(after_cursor)
+    return count_stmt, query.limit(args.per_page + 1)
+
+
+def latest_feed_page(args: FeedArgs, rows: List, total: Optional[int]) -> Tuple[List, Dict]:
+    """(page rows, pagination) from the rows of the latest_feed_stmts() page statement."""
+    if args.cursor is None:
+        return rows, {"page": args.page, "per_page": args.per_page, "total": total}
+    page_rows, next_cursor, has_more = keyset_page(rows, args.per_page, lambda row: (row.created_at, row.id))
+    pagination = {"per_page": args.per_page, "next_cursor": next_cursor, "has_more": has_more}
+    if args.include_total:
+        pagination["total"] = total
+    return page_rows, pagination
+
+
+def trending_rows_stmt(ranked: List[Tuple[str, float]]):
+    return feed_rows_stmt().where(Post.id.in_([post_id for post_id, _ in ranked]))
+
+
+def trending_feed_page(args: FeedArgs, ranked: List[Tuple[str, float]], total: int, rows: List) -> Tuple[List, Dict]:
+    """(page rows in ranking order, pagination) from the rows of trending_rows_stmt()."""
+    by_id = {row.id: row for row in rows}
+    page_rows = [by_id[post_id] for post_id, _ in ranked if post_id in by_id]      # deleted since the last refresh
+    return page_rows, {"page": args.page, "per_page": args.per_page, "total": total}
+
+
+def feed_etag(user_id: str, pagination: Dict, page_rows: List) -> str:
+    # Same page, same post versions, same caller: the client's copy is still good
+    post_ids = [row.id for row in page_rows]
+    return version_etag(
+        "feed", user_id, request.query_string.decode(), pagination,
+        [(row.id, row.version) for row in page_rows], like_service.pending_state(post_ids, user_id)
+    )
+
+
+def feed_posts_stmt(post_ids: List[str]):
+    return select(Post, User).join(User, Post.user_id == User.id).where(Post.id.in_(post_ids))
+
+
+def in_page_order(rows: List, post_ids: List[str]) -> List:
+    """(Post, User) rows of feed_posts_stmt() in the order of the page."""
+    loaded = {post.id: (post, user) for post, user in rows}
+    return [loaded[post_id] for post_id in post_ids if post_id in loaded]
+
+
+def feed_response(post_data: List[Dict], pagination: Dict) -> Response:
+    return api_response(
+        False,
+        "Fetch all post successfully.",
+        {
+            "post_data": post_data,
+            "pagination": pagination,
+        },
+        200
+    )
+
+
 @post_bp.route("/get_all_posts", methods=['GET'])
 @token_required
+@use_replica
 def get_all_post():
     """
     Get all posts with optional search, sorting, and pagination.
@@ -133,90 +245,63 @@ def get_all_post():
 
     == Query Parameters: ==
     - `page` (int, optional): Page number to retrieve (default: 1)
-    - `per_page` (int, optional): Number of posts per page (default: 10)
+    - `per_page` (int, optional): Number of posts per page (default: 10, max: MAX_PER_PAGE)
     - `search` (string, optional): Keyword to filter posts by title or content
+    - `cursor` (string, optional): Switches to cursor mode. Send it empty for the
+      first page, then pass back `next_cursor` from the previous response.
+      Pages stay stable while new posts are being inserted.
+    - `include_total` (bool, optional): Include `total` in cursor mode (default: false)
+    - `sort` (string, optional): `latest` (default) or `trending` (recent likes and
+      comments with time decay, see app/services/trending.py). `trending` supports
+      `page`/`per_page` only, not `search` or `cursor`.
 
     == Headers: ==
     - `Authorization`: Bearer token required for authentication
+    - `If-None-Match` (optional): ETag of a previous response. Returns an empty
+      304 if the page (posts, their versions, total) is unchanged
 
     == Responses: ==
     - `200 OK`: Returns list of posts with pagination info
+    - `304 Not Modified`: The client's copy (If-None-Match) is current
     - `404 Not Found`: No posts found for the given filters
-    - `400 Bad Request`: Invalid pagination parameters
+    - `400 Bad Request`: Invalid pagination parameters or cursor
     - `500 Internal Server Error`: Unexpected server error
     """
     session = SessionLocal()
     current_user = g.current_user
     try:
-        try:     
-            # Get query parameters (default: page=1, per_page=10)
-            page = int(request.args.get("page", 1))
-            per_page = int(request.args.get("per_page", 10))
-        except ValueError:
-            return api_response(True, "Invalid paginatin parameter", [], 400)
-        # Get query param for search (default: search=None)
-        search = request.args.get("search", None)
-        
-        # Build Base query
-        query = session.query(Post, User).join(User, Post.user_id == User.id)
-        
-        if search:
-            query = query.filter(
-                or_(Post.title.ilike(f'%{search}%'), Post.content.ilike(f'%{search}%'))
-            )
-        # Apply sorting (latest first)
-        query = query.order_by(desc(Post.created_at))
+        try:
+            args = feed_args()
+        except ValueError as e:
+            return api_response(True, str(e), [], 400)
         
-        # Count total records before pagination
-        total = query.count()
-        
-        # Apply pagination here
-        posts = query.offset((page -1) * per_page).limit(per_page).all()
-        if not posts:
-            return api_response(False, "No posts found", [], 404)
+        if args.sort == "trending":
+            # The ranking is precomputed in memory: a slice, then one query for that page's posts
+            ranked, total = get_trending_ranker().page(session, (args.page - 1) * args.per_page, args.per_page)
+            page_rows, pagination = trending_feed_page(args, ranked, total, session.execute(trending_rows_stmt(ranked)).all())
             
+        else:
+            try:
+                count_stmt, page_stmt = latest_feed_stmts(args)
+            except ValueError:
+                return api_response(True, "Invalid cursor", [], 400)
+            
+            # Total comes from a short-lived cache instead of a COUNT(*) on every page
+            total = cached_count(("posts", args.search), lambda: session.execute(count_stmt).scalar()) if args.include_total else None
+            page_rows, pagination = latest_feed_page(args, session.execute(page_stmt).all(), total)
+            
+        if not page_rows:
+            return api_response(False, "No posts found", [], 404)
         
+        post_ids = [row.id for row in page_rows]
         
-        
-        # unpacking data
-        final_post_response_with_user_data = []
-        for post, user in query:
-            likes_count = session.query(Like).filter(Like.post_id == post.id).count()
-            is_liked = session.query(Like).filter(
-                Like.post_id == post.id,
-                Like.user_id == current_user.id
-                ).first() is not None
-            final_post_response_with_user_data.append({
-                "post_id": str(post.id),
-                "title": post.title,
-                "content": post.content,
-                "created_at": post.created_at,
-                "is_liked": is_liked,
-                "likes_count": likes_count,
-                "user":{
-                    "userId": post.user_id,
-                    "username": user.username
-                }
-            })
+        def build():
+            posts = in_page_order(session.execute(feed_posts_stmt(post_ids)).all(), post_ids)
             
+            # Likes, comments and like status for the whole page in one query
+            return feed_response(hydrate_feed(session, posts, current_user.id), pagination)
         
-        # Serialize post via marshmallow schema
-        post_schema = PostSchema(many=True)
-        post_data = post_schema.dump(posts)
-        
-        return api_response(
-            False,
-            "Fetch all post successfully.",
-            {
-                "post_data": final_post_response_with_user_data,
-                "pagination": {
-                    "page": page,
-                    "per_page": per_page,
-                    "total": total
-                },
-            },
-            200
-        )
+        return conditional_response(feed_etag(current_user.id, pagination, page_rows), build)
     except Exception as e:
         session.rollback()
         return api_response(True, "Failed to fetch posts!", str(e), 500)
@@ -226,27 +311,93 @@ def get_all_post():
         
 @post_bp.route("/get_post_byId/<string:post_id>", methods=['GET'])
 @token_required
+@use_replica
 def get_post_byID(post_id):
     """
     Get a single Post by ID
+
+    Sends an ETag; a request with a matching If-None-Match gets an empty 304.
     """
     session = SessionLocal()
     try:
-        # Fetch post by Id
-        post = session.query(Post).filter(Post.id==post_id).first()
+        # The version alone decides between 304 and a full response
+        version = session.query(Post.version).filter(Post.id == post_id).scalar()
         
         # Handle case: post not found
-        if not post:
+        if version is None:
             return api_response(True, "No post found", [], 404)
 
-        # Serialize post via marshmallow schema
-        post_data = PostSchema().dump(post) 
+        def build():
+            # Fetch post by Id
+            post = session.query(Post).filter(Post.id==post_id).first()
+            if not post:
+                return api_response(True, "No post found", [], 404)
 
-        return api_response(False, "Post fetched successfully", post_data, 200)
+            # Serialize post via marshmallow schema
+            post_data = post_schema.dump(post) 
+
+            return api_response(False, "Post fetched successfully", post_data, 200)
+
+        return conditional_response(version_etag("post", post_id, version), build)
     
     
     except Exception as e:
         session.rollback()
         return api_response(True, "Failed to fetch post", str(e), 500)
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+@post_bp.route("/stats", methods=["GET", "POST"])
+@token_required
+@use_replica
+def get_post_stats():
+    """
+    Like count, comment count and like status for many posts at once.
+
+    ---
+    == Description: ==
+    Replaces one /like/count + /like/is_liked pair per rendered post with a
+    single call and a single query. Ids that do not exist are listed in
+    `missing`. At most MAX_STATS_IDS ids per call.
+
+    == Request: ==
+    - `GET /stats?ids=<id>,<id>,...` is cacheable: the response carries an
+      ETag, and sending it back in `If-None-Match` returns an empty 304 while
+      the stats are unchanged
+    - `POST /stats` with `{"post_ids": ["<id>", ...]}` for long id lists
+
+    == Responses: ==
+    - `200 OK`: `{"stats": {"<id>": {"likes_count", "comments_count", "is_liked"}}, "missing": [...]}`
+    - `304 Not Modified`: (GET) the client's copy is current
+    - `400 Bad Request`: no ids, not a list of strings, or too many ids
+    - `500 Internal Server Error`: Unexpected server error
+    """
+    if request.method == "POST":
+        post_ids = (request.get_json(silent=True) or {}).get("post_ids")
+    else:
+        post_ids = [post_id for post_id in request.args.get("ids", "").split(",") if post_id]
+
+    if not isinstance(post_ids, list) or not post_ids or not all(isinstance(post_id, str) for post_id in post_ids):
+        return api_response(True, "post_ids must be a non-empty list of post ids", None, 400)
+    post_ids = list(dict.fromkeys(post_ids))            # drop duplicates, keep order
+    if len(post_ids) > Config.MAX_STATS_IDS:
+        return api_response(True, f"At most {Config.MAX_STATS_IDS} post ids per request", None, 400)
+
+    session = SessionLocal()
+    current_user = g.current_user
+    try:
+        stats = fetch_post_stats(session, post_ids, current_user.id)
+        data = {"stats": stats, "missing": [post_id for post_id in post_ids if post_id not in stats]}
+
+        if request.method == "GET":
+            return conditional_response(
+                content_etag(data), lambda: api_response(False, "Post stats fetched successfully", data, 200)
+            )
+        return api_response(False, "Post stats fetched successfully", data, 200)
+
+    except Exception as e:
+        session.rollback()
+        return api_response(True, "Failed to fetch post stats", str(e), 500)
+    finally:
+        session.close()
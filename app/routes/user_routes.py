@@ -1,9 +1,12 @@
 from flask import Flask, Blueprint, request, jsonify, Response , g
 from app.database.db import SessionLocal
 from app.models.user_model import User
-from app.schemas.user_schema import UserSchema, ValidationError
+from app.schemas.user_schema import ValidationError
+from app.schemas.compiled import user_schema
 from sqlalchemy.orm import Session, Query
 from app.utils.token_required import token_required 
+from app.services.auth_cache import invalidate_user
+from app.services.counter_service import bump_user_posts_version
 from typing import Dict
 
 user_bp = Blueprint("user_bp", __name__, url_prefix="/api/v1/user")
@@ -48,8 +51,7 @@ def get_user() -> Response:
 @token_required
 def update_user() -> Response:
     session: Session = SessionLocal()
-    user_schema: UserSchema = UserSchema()
-    current_user: User = g.current_user
+    current_user = g.current_user                   # detached snapshot, see app/services/auth_cache.py
     
     try:
         data: Dict = request.get_json()
@@ -65,17 +67,25 @@ def update_user() -> Response:
         
         validation_data = user_schema.load(request.json, partial=True)
         
+        user: User = session.query(User).filter(User.id == current_user.id).first()
+        if not user:
+            return jsonify({"error_code": True, "message": "User not found!", "data": None}), 404
+        
+        renamed = any(key in ("username", "email") and getattr(user, key) != value for key, value in validation_data.items())
         for key, value in validation_data.items():
-            if hasattr(current_user, key):
-                setattr(current_user, key, value)
+            if hasattr(user, key):
+                setattr(user, key, value)
+        if renamed:
+            session.flush()
+            bump_user_posts_version(session, user.id)       # posts and comments show the author's name
                
-        session.add(current_user)
         session.commit()
+        invalidate_user(user.id)            # again after commit, the mapper event fires at flush time
         
         return jsonify({
             "Error": False,
             "message": "Updated successfully.",
-            "data": user_schema.dump(current_user)
+            "data": user_schema.dump(user)
         }), 200
         
     except ValidationError as VE:
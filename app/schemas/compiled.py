@@ -0,0 +1,116 @@
+from datetime import timezone
+from typing import Any, Callable, Dict, List, Tuple, Type
+from marshmallow import Schema, fields, missing
+from app.schemas.fields import UTCDateTime
+from app.schemas.post_schema import PostSchema
+from app.schemas.comment_schema import CommentSchema
+from app.schemas.user_schema import UserSchema
+
+
+'''
+Precompiled serializers.
+
+Marshmallow's dump() walks every field through its generic machinery
+(get_value, serialize, nested schema.dump, hook lookups) for every object.
+compile_dump() looks at a schema ONCE and returns a plain function that reads
+the attributes and converts the values directly, with nested schemas compiled
+the same way. The output is the same dict the schema would produce.
+
+Routes use the shared module-level instances below instead of creating a
+schema per request; load() still goes through marshmallow so validation and
+error messages are unchanged. benchmarks/bench_serializers.py checks the
+output against the plain schemas and measures the speedup.
+'''
+
+
+def _getter(attr: str) -> Callable[[Any], Any]:
+    def get(obj):
+        if isinstance(obj, dict):
+            return obj.get(attr, missing)
+        return getattr(obj, attr, missing)
+    return get
+
+
+def _utc_iso(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _converter(field: fields.Field, cache: Dict) -> Callable[[Any], Any]:
+    """Value -> serialized value for the field types the schemas use."""
+    if isinstance(field, UTCDateTime):
+        return _utc_iso
+    if type(field) is fields.DateTime and (field.format or "iso") == "iso":
+        return lambda value: None if value is None else value.isoformat()
+    if isinstance(field, fields.String):
+        return _text
+    if isinstance(field, fields.Nested) and isinstance(field.schema, Schema):
+        dump_one = compile_dump(type(field.schema), cache)
+        if field.many or field.schema.many:
+            return lambda value: None if value is None else [dump_one(item) for item in value]
+        return lambda value: None if value is None else dump_one(value)
+    if isinstance(field, fields.List):
+        convert = _converter(field.inner, cache)
+        return lambda value: None if value is None else [convert(item) for item in value]
+    return None
+
+
+def compile_dump(schema_cls: Type[Schema], cache: Dict = None) -> Callable[[Any], Dict]:
+    """One specialised `obj -> dict` function per schema class."""
+    cache = {} if cache is None else cache
+    if schema_cls in cache:
+        return cache[schema_cls]
+
+    schema = schema_cls()
+    if schema._hooks.get("pre_dump") or schema._hooks.get("post_dump"):
+        cache[schema_cls] = schema.dump                 # hooks need the real thing
+        return schema.dump
+
+    plan: List[Tuple[str, Callable, Callable, Any]] = []
+    for name, field in schema.dump_fields.items():
+        convert = _converter(field, cache)
+        if convert is None:                             # unknown field type: marshmallow does this one
+            convert = lambda value, field=field, name=name: field._serialize(value, name, None)
+        plan.append((field.data_key or name, _getter(field.attribute or name), convert, field.dump_default))
+
+    def dump_one(obj) -> Dict:
+        data = {}
+        for key, get, convert, default in plan:
+            value = get(obj)
+            if value is missing:
+                if default is missing:
+                    continue
+                value = default() if callable(default) else default
+            data[key] = convert(value)
+        return data
+
+    cache[schema_cls] = dump_one
+    return dump_one
+
+
+class CompiledSchema:
+    """Shared, thread-safe stand-in for `SomeSchema()` in the routes."""
+
+    def __init__(self, schema_cls: Type[Schema]) -> None:
+        self.schema = schema_cls()
+        self._dump_one = compile_dump(schema_cls)
+
+    def dump(self, obj, many: bool = False):
+        if many:
+            return [self._dump_one(item) for item in obj]
+        return self._dump_one(obj)
+
+    def load(self, data, partial=None):
+        return self.schema.load(data, partial=partial)
+
+
+post_schema = CompiledSchema(PostSchema)
+comment_schema = CompiledSchema(CommentSchema)
+user_schema = CompiledSchema(UserSchema)
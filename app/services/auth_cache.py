@@ -0,0 +1,121 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+from sqlalchemy import event, select
+from app.config import Config
+from app.database.db import SessionLocal
+from app.database.async_db import fetch_all
+from app.models.user_model import User
+from app.utils.jwt_helper import decode_token
+from app.utils.ttl_cache import TTLCache
+
+
+'''
+Authentication fast path.
+
+- claims cache: verified JWT payloads keyed by a hash of the token, kept until
+  the token's own `exp`. A warm token skips the HS256 verification.
+- user cache: small detached snapshots of the users behind those tokens, so
+  `token_required` does not open a session or load the full User row.
+
+Both caches are per worker. Changes made through the ORM (update_user, user
+deletion) invalidate the user cache of this worker immediately through mapper
+events. Other workers learn about token_version bumps ("logout everywhere")
+from the revocation filter's sync (app/services/revocation_filter.py), so
+tokens revoked that way can still authenticate on another worker for up to
+REVOCATION_SYNC_SECONDS (up to USER_CACHE_TTL_SECONDS if the sync is
+disabled). Other profile changes reach them within USER_CACHE_TTL_SECONDS.
+'''
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """What handlers need from g.current_user, without a live ORM session."""
+    id: str
+    username: str
+    email: str
+    created_at: Optional[datetime] = None
+    token_version: int = 0
+
+
+_claims_cache = TTLCache(maxsize=Config.CLAIMS_CACHE_SIZE)
+_user_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL_SECONDS)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def get_verified_claims(token: str) -> Optional[Dict]:
+    """decode_token() with a cache in front of it. None for invalid or expired tokens."""
+    key = _token_key(token)
+    payload = _claims_cache.get(key)
+    if payload is not None:
+        return payload
+
+    payload = decode_token(token)
+    if payload:
+        ttl = float(payload.get("exp", 0)) - time.time()
+        if ttl > 0:
+            _claims_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
+def forget_token(token: str) -> None:
+    _claims_cache.pop(_token_key(token))
+
+
+_SNAPSHOT_COLUMNS = (User.id, User.username, User.email, User.created_at, User.token_version)
+
+
+def _remember(user_id: str, row) -> Optional[UserSnapshot]:
+    if not row:
+        return None
+    snapshot = UserSnapshot(
+        id=row.id, username=row.username, email=row.email,
+        created_at=row.created_at, token_version=row.token_version
+    )
+    _user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def get_user_snapshot(user_id: str) -> Optional[UserSnapshot]:
+    snapshot = _user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    session = SessionLocal()
+    try:
+        row = session.query(*_SNAPSHOT_COLUMNS).filter(User.id == user_id).first()
+    finally:
+        session.close()
+    return _remember(user_id, row)
+
+
+async def get_user_snapshot_async(user_id: str) -> Optional[UserSnapshot]:
+    """get_user_snapshot() for async views: same cache, the miss goes through the async engine."""
+    snapshot = _user_cache.get(user_id)
+    if snapshot is not None:
+        return snapshot
+
+    rows = await fetch_all(select(*_SNAPSHOT_COLUMNS).where(User.id == user_id))
+    return _remember(user_id, rows[0] if rows else None)
+
+
+def invalidate_user(user_id: str) -> None:
+    _user_cache.pop(user_id)
+
+
+def note_token_version(user_id: str, token_version: int) -> None:
+    """A token_version bump made by any worker: drop this worker's snapshot if it is older."""
+    snapshot = _user_cache.get(user_id)
+    if snapshot is not None and snapshot.token_version < token_version:
+        _user_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target) -> None:
+    invalidate_user(target.id)
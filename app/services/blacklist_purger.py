@@ -0,0 +1,66 @@
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from app.database.db import SessionLocal
+from app.models.token_blacklist_model import TokenBlacklist
+
+
+'''
+Blacklist rows are only useful until the token they revoke expires (an expired
+token is rejected by the signature check anyway). Expired rows are deleted in
+small batches, one short transaction each, so the purge never holds long locks
+on the table that logout writes to.
+'''
+
+
+def purge_expired_tokens(session: Session, batch_size: int = 1000, max_batches: int = None) -> int:
+    """Delete expired blacklist rows, `batch_size` at a time. Returns the number of rows deleted."""
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        now = datetime.now(timezone.utc)
+        ids = session.execute(
+            select(TokenBlacklist.id)
+            .where(TokenBlacklist.expires_at < now)
+            .order_by(TokenBlacklist.expires_at)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        session.execute(delete(TokenBlacklist).where(TokenBlacklist.id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def _run(interval_seconds: float, batch_size: int) -> None:
+    while True:
+        time.sleep(interval_seconds)
+        session = SessionLocal()
+        try:
+            purge_expired_tokens(session, batch_size=batch_size)
+        except Exception as e:
+            session.rollback()
+            print(f"Token blacklist purge failed: {str(e)}")
+        finally:
+            session.close()
+            SessionLocal.remove()
+
+
+_started = False
+
+def start_blacklist_purger(interval_seconds: float, batch_size: int) -> None:
+    """Start the background purge thread once per process."""
+    global _started
+    if _started or interval_seconds <= 0:
+        return
+    _started = True
+    threading.Thread(
+        target=_run, args=(interval_seconds, batch_size), name="token-blacklist-purger", daemon=True
+    ).start()
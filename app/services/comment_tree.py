@@ -0,0 +1,186 @@
+import asyncio
+from sqlalchemy import select, func, desc, literal
+from sqlalchemy.orm import Session, aliased
+from app.models.comment_model import Comment
+from app.models.user_model import User
+from app.database.async_db import fetch_all
+from app.utils.pagination import keyset_filter, keyset_page
+from app.utils.to_iso_utc import to_iso_utc
+from typing import Dict, List, Optional
+
+
+'''
+Threaded comment loader.
+
+A page of comments with all of their replies (any depth) and authors is
+loaded in exactly two queries, whatever the size of the threads:
+
+  1. the page of root comments (top-level comments of a post, or the direct
+     replies of one comment for "show more replies"), joined to their authors
+  2. one recursive CTE walking down from those roots, ranked per parent with
+     ROW_NUMBER() so every thread returns at most `replies_per_thread`
+     children per comment, joined to their authors
+
+The tree is then assembled in memory in a single O(n) pass.
+'''
+
+# Columns needed to render a comment, loaded as plain rows (no ORM identity map)
+_COLUMNS = (
+    Comment.id, Comment.post_id, Comment.parent_id, Comment.user_id, Comment.content,
+    Comment.created_at, Comment.updated_at, Comment.reply_count, User.username,
+)
+
+
+def build_subtree_ids_stmt(comment_id: str):
+    """Ids of every reply below a comment, at any depth (one recursive CTE)."""
+    subtree = select(Comment.id).where(Comment.parent_id == comment_id).cte("subtree", recursive=True)
+    child = aliased(Comment)
+    subtree = subtree.union_all(select(child.id).where(child.parent_id == subtree.c.id))
+    return select(subtree.c.id)
+
+
+def build_roots_stmt(post_id: str, parent_id: Optional[str], per_page: int,
+                     page: int = 1, cursor: Optional[str] = None):
+    """
+    Page of root comments, newest first. With `cursor` (possibly empty) the page
+    is keyset based and one extra row is fetched to compute `has_more`.
+    Raises ValueError for an invalid cursor.
+    """
+    stmt = (
+        select(*_COLUMNS)
+        .join(User, User.id == Comment.user_id)
+        .where(Comment.post_id == post_id)
+        .where(Comment.parent_id.is_(None) if parent_id is None else Comment.parent_id == parent_id)
+        .order_by(desc(Comment.created_at), desc(Comment.id))
+    )
+    if cursor is None:
+        return stmt.offset((page - 1) * per_page).limit(per_page)
+
+    after_cursor = keyset_filter(Comment.created_at, Comment.id, cursor)
+    if after_cursor is not None:
+        stmt = stmt.where(after_cursor)
+    return stmt.limit(per_page + 1)
+
+
+def build_descendants_stmt(root_ids, replies_per_thread: int, max_depth: int):
+    """
+    Every reply below `root_ids` down to `max_depth`, keeping the newest
+    `replies_per_thread` children of each comment. Ordered so that a parent
+    always comes before its children. `root_ids` is a list of ids or a
+    SELECT of them (see load_comment_tree_async).
+    """
+    thread = (
+        select(Comment.id.label("id"), literal(1).label("depth"))
+        .where(Comment.parent_id.in_(root_ids))
+        .cte("thread", recursive=True)
+    )
+    child = aliased(Comment)
+    thread = thread.union_all(
+        select(child.id, thread.c.depth + 1)
+        .where(child.parent_id == thread.c.id, thread.c.depth < max_depth)
+    )
+
+    ranked = (
+        select(
+            thread.c.id,
+            thread.c.depth,
+            func.row_number().over(
+                partition_by=Comment.parent_id,
+                order_by=(desc(Comment.created_at), desc(Comment.id))
+            ).label("position"),
+        )
+        .join(Comment, Comment.id == thread.c.id)
+        .subquery()
+    )
+    return (
+        select(*_COLUMNS)
+        .join(ranked, ranked.c.id == Comment.id)
+        .join(User, User.id == Comment.user_id)
+        .where(ranked.c.position <= replies_per_thread)
+        .order_by(ranked.c.depth, ranked.c.position)
+    )
+
+
+def _node(row) -> Dict:
+    return {
+        'id': str(row.id),
+        'post_id': row.post_id,
+        'content': row.content,
+        'created_at': to_iso_utc(row.created_at),
+        'updated_at': to_iso_utc(row.updated_at),
+        'user': {
+            'id': str(row.user_id),
+            'username': row.username
+        },
+        'reply_count': row.reply_count,
+        'has_more_replies': False,
+        'replies': []
+    }
+
+
+def assemble_tree(roots: List, descendants: List) -> List[Dict]:
+    """Link rows into nested dicts in one pass. Rows whose parent was cut off are dropped."""
+    nodes: Dict[str, Dict] = {}
+    tree = []
+    for row in roots:
+        node = nodes[row.id] = _node(row)
+        tree.append(node)
+    for row in descendants:
+        parent = nodes.get(row.parent_id)
+        if parent is None:
+            continue
+        node = nodes[row.id] = _node(row)
+        parent['replies'].append(node)
+    for node in nodes.values():
+        node['has_more_replies'] = node['reply_count'] > len(node['replies'])
+    return tree
+
+
+def load_comment_tree(session: Session, post_id: str, parent_id: Optional[str] = None,
+                      per_page: int = 10, page: int = 1, cursor: Optional[str] = None,
+                      replies_per_thread: int = 10, max_depth: int = 20):
+    """
+    Returns (comments, next_cursor, has_more). `next_cursor`/`has_more` are only
+    meaningful in cursor mode. Raises ValueError for an invalid cursor.
+    """
+    rows = session.execute(build_roots_stmt(post_id, parent_id, per_page, page, cursor)).all()
+    next_cursor, has_more = None, False
+    if cursor is not None:
+        rows, next_cursor, has_more = keyset_page(rows, per_page, lambda row: (row.created_at, row.id))
+    if not rows:
+        return [], next_cursor, has_more
+
+    descendants = []
+    if replies_per_thread > 0 and any(row.reply_count for row in rows):
+        descendants = session.execute(
+            build_descendants_stmt([row.id for row in rows], replies_per_thread, max_depth)
+        ).all()
+
+    return assemble_tree(rows, descendants), next_cursor, has_more
+
+
+async def load_comment_tree_async(post_id: str, parent_id: Optional[str] = None,
+                                  per_page: int = 10, page: int = 1, cursor: Optional[str] = None,
+                                  replies_per_thread: int = 10, max_depth: int = 20):
+    """
+    load_comment_tree() for async views. The replies query selects its roots
+    itself (the roots page as a derived table, which MySQL accepts under IN
+    where it rejects a LIMIT), so both queries run at the same time.
+    """
+    roots_stmt = build_roots_stmt(post_id, parent_id, per_page, page, cursor)
+    if replies_per_thread > 0:
+        roots = roots_stmt.subquery()
+        rows, descendants = await asyncio.gather(
+            fetch_all(roots_stmt),
+            fetch_all(build_descendants_stmt(select(roots.c.id), replies_per_thread, max_depth)),
+        )
+    else:
+        rows, descendants = await fetch_all(roots_stmt), []
+
+    next_cursor, has_more = None, False
+    if cursor is not None:
+        # Replies of the extra row fetched for has_more are dropped by assemble_tree (no parent)
+        rows, next_cursor, has_more = keyset_page(rows, per_page, lambda row: (row.created_at, row.id))
+    if not rows:
+        return [], next_cursor, has_more
+    return assemble_tree(rows, descendants), next_cursor, has_more
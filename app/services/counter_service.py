@@ -0,0 +1,161 @@
+from sqlalchemy import select, update, func, case, or_
+from sqlalchemy.orm import Session
+from app.models.post_model import Post
+from app.models.comment_model import Comment
+from app.models.like_model import Like
+from typing import Dict
+
+
+'''
+Denormalized like/comment/reply counters.
+
+Counters are changed with relative, in-place updates
+(`SET like_count = like_count + 1`) instead of read-modify-write through the
+ORM, so concurrent writers never overwrite each other and nothing is locked
+with SELECT ... FOR UPDATE. Routes issue the bump as the LAST statement before
+commit: the row lock on a popular post is then only held for the commit
+itself, not for the whole request, which keeps a viral post from turning into
+a lock queue.
+
+Every counter change also bumps Post.version, the stamp the read endpoints
+derive their ETags from (app/utils/etag.py). Writes that change a post
+without touching a counter (post or comment edits, renamed authors) call
+bump_post_version / bump_user_posts_version.
+
+Counters can still drift (rows removed by ON DELETE CASCADE when a user is
+deleted, manual SQL, ...). `reconcile_counters` recomputes them in bulk, the
+one writer that locks rows (a batch at a time).
+'''
+
+
+def _shifted(column, delta: int):
+    # Never let a counter go below zero, even if it had already drifted
+    return case((column + delta < 0, 0), else_=column + delta)
+
+
+def bump_post_counters(session: Session, post_id: str, likes: int = 0, comments: int = 0, replies: int = 0) -> None:
+    values = {}
+    if likes:
+        values["like_count"] = _shifted(Post.like_count, likes)
+    if comments:
+        values["comment_count"] = _shifted(Post.comment_count, comments)
+    if replies:
+        values["reply_count"] = _shifted(Post.reply_count, replies)
+    if not values:
+        return
+    session.execute(
+        update(Post).where(Post.id == post_id).values(version=Post.version + 1, **values),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def bump_post_version(session: Session, post_id: str) -> None:
+    session.execute(
+        update(Post).where(Post.id == post_id).values(version=Post.version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def bump_user_posts_version(session: Session, user_id: str) -> None:
+    """Posts showing this user's name: the ones they wrote or commented on."""
+    commented = select(Comment.post_id).where(Comment.user_id == user_id).scalar_subquery()
+    session.execute(
+        update(Post).where(or_(Post.user_id == user_id, Post.id.in_(commented))).values(version=Post.version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def bump_comment_replies(session: Session, comment_id: str, delta: int) -> None:
+    session.execute(
+        update(Comment).where(Comment.id == comment_id).values(
+            reply_count=_shifted(Comment.reply_count, delta),
+            updated_at=Comment.updated_at           # a new reply is not an edit, skip the onupdate timestamp
+        ),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def reconcile_counters(session: Session, batch_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Recompute every counter from the likes/comments tables and fix the ones
+    that drifted. Works in primary-key batches: per batch one read of the stored
+    counters, grouped aggregates for the real values, and one bulk UPDATE of
+    the rows that differ. Each batch is committed on its own.
+
+    The batch's rows are read FOR UPDATE, the one place counters are locked:
+    a like or comment committing between the read and the absolute write
+    would otherwise be overwritten. Writers bump the counter after inserting
+    their row, so one that is in flight waits for the batch to commit, is
+    not counted by the aggregates, and adds its +1/-1 on top afterwards.
+    The lock lasts three statements per batch.
+    """
+    stats = {"posts_checked": 0, "posts_fixed": 0, "comments_checked": 0, "comments_fixed": 0}
+
+    last_id = ""
+    while True:
+        rows = session.execute(
+            select(Post.id, Post.like_count, Post.comment_count, Post.reply_count)
+            .where(Post.id > last_id).order_by(Post.id).limit(batch_size)
+            .with_for_update()
+        ).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        last_id = ids[-1]
+
+        likes = dict(session.execute(
+            select(Like.post_id, func.count(Like.id)).where(Like.post_id.in_(ids)).group_by(Like.post_id)
+        ).all())
+        comments: Dict[str, list] = {}
+        for post_id, is_reply, total in session.execute(
+            select(Comment.post_id, Comment.parent_id.isnot(None), func.count(Comment.id))
+            .where(Comment.post_id.in_(ids))
+            .group_by(Comment.post_id, Comment.parent_id.isnot(None))
+        ).all():
+            comments.setdefault(post_id, [0, 0])[1 if is_reply else 0] = total
+
+        fixes = []
+        for row in rows:
+            top_level, replies = comments.get(row.id, [0, 0])
+            actual = (likes.get(row.id, 0), top_level, replies)
+            if actual != (row.like_count, row.comment_count, row.reply_count):
+                fixes.append({"id": row.id, "like_count": actual[0], "comment_count": actual[1], "reply_count": actual[2]})
+
+        stats["posts_checked"] += len(rows)
+        stats["posts_fixed"] += len(fixes)
+        if fixes and not dry_run:
+            session.execute(update(Post), fixes)
+            bumped = [fix["id"] for fix in fixes]
+            session.execute(
+                update(Post).where(Post.id.in_(bumped)).values(version=Post.version + 1),
+                execution_options={"synchronize_session": False}
+            )
+        session.commit()                                # releases the batch's locks
+
+    last_id = ""
+    while True:
+        rows = session.execute(
+            select(Comment.id, Comment.reply_count, Comment.updated_at)
+            .where(Comment.id > last_id).order_by(Comment.id).limit(batch_size)
+            .with_for_update()
+        ).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        last_id = ids[-1]
+
+        replies = dict(session.execute(
+            select(Comment.parent_id, func.count(Comment.id)).where(Comment.parent_id.in_(ids)).group_by(Comment.parent_id)
+        ).all())
+        fixes = [
+            {"id": row.id, "reply_count": replies.get(row.id, 0), "updated_at": row.updated_at}
+            for row in rows if replies.get(row.id, 0) != row.reply_count
+        ]
+
+        stats["comments_checked"] += len(rows)
+        stats["comments_fixed"] += len(fixes)
+        if fixes and not dry_run:
+            session.execute(update(Comment), fixes)
+        session.commit()
+
+    return stats
@@ -0,0 +1,176 @@
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+from sqlalchemy import select, update
+from app.config import Config
+from app.database.db import SessionLocal
+from app.models.email_outbox_model import EmailOutbox
+
+
+'''
+Transactional email outbox.
+
+Routes never talk to SMTP. They add an EmailOutbox row in the same transaction
+as the data it belongs to (see queue_email), so a message exists if and only
+if that transaction committed. A small pool of background workers drains the
+table:
+
+- a worker claims up to EMAIL_OUTBOX_BATCH_SIZE due rows by stamping them with
+  its own id and a lease (`next_attempt_at = now + lease`). A crashed worker's
+  rows simply become due again when the lease runs out. Results are only
+  written to rows still stamped with the worker's id, so a slow worker never
+  overwrites the claim of the one that took over its expired lease.
+- the whole batch goes through ONE SMTP connection
+- failures are retried with exponential backoff plus jitter, up to
+  EMAIL_OUTBOX_MAX_ATTEMPTS, then the row is marked "failed"
+
+Pointing MAIL_SERVER/MAIL_PORT at a local SMTP stand-in (e.g. aiosmtpd) with
+MAIL_USE_TLS=false is enough to run the whole pipeline locally.
+'''
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OutboxWorker:
+    def __init__(self, app, batch_size: int, poll_seconds: float, max_attempts: int,
+                 backoff_seconds: float, lease_seconds: float) -> None:
+        self.app = app
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = str(uuid.uuid4())
+        self._stop = threading.Event()
+
+    def claim(self, session) -> List[EmailOutbox]:
+        now = _now()
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)              # MySQL 8; ignored by SQLite
+        )
+        ids = session.execute(due).scalars().all()
+        if not ids:
+            session.rollback()
+            return []
+
+        # Re-check the due condition: another worker may have claimed some of them in between
+        session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(ids), EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            .values(
+                locked_by=self.worker_id,
+                next_attempt_at=now + timedelta(seconds=self.lease_seconds),
+                attempts=EmailOutbox.attempts + 1,
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        session.commit()
+        return session.query(EmailOutbox).filter(
+            EmailOutbox.id.in_(ids), EmailOutbox.locked_by == self.worker_id
+        ).all()
+
+    def send_batch(self, session, batch: List[EmailOutbox]) -> int:
+        from flask_mail import Message
+        from app import mail
+
+        sent, failed = [], []
+        with self.app.app_context():
+            try:
+                with mail.connect() as connection:          # one SMTP session for the whole batch
+                    for item in batch:
+                        try:
+                            connection.send(Message(subject=item.subject, recipients=[item.recipient], body=item.body))
+                            sent.append(item)
+                        except Exception as e:
+                            failed.append((item, e))
+            except Exception as e:
+                # Could not connect (or the connection dropped): retry everything not handled yet
+                handled = {item.id for item in sent} | {item.id for item, _ in failed}
+                failed.extend((item, e) for item in batch if item.id not in handled)
+
+        # Only rows still leased to this worker: one whose lease ran out mid-batch may have been
+        # claimed by another worker, whose claim must not be overwritten
+        ours = EmailOutbox.locked_by == self.worker_id
+        now = _now()
+        marked_sent = 0
+        if sent:
+            marked_sent = session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([item.id for item in sent]), ours)
+                .values(status="sent", sent_at=now, locked_by=None, last_error=None),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+        for item, error in failed:
+            if item.attempts >= self.max_attempts:
+                values = {"status": "failed"}
+            else:
+                delay = self.backoff_seconds * (2 ** (item.attempts - 1)) * random.uniform(0.8, 1.2)
+                values = {"next_attempt_at": now + timedelta(seconds=delay)}
+            session.execute(
+                update(EmailOutbox).where(EmailOutbox.id == item.id, ours)
+                .values(locked_by=None, last_error=str(error)[:1000], **values),
+                execution_options={"synchronize_session": False}
+            )
+        session.commit()
+        return marked_sent
+
+    def drain_once(self) -> int:
+        """Claim and send one batch. Returns the number of rows claimed."""
+        session = SessionLocal()
+        try:
+            batch = self.claim(session)
+            if batch:
+                self.send_batch(session, batch)
+            return len(batch)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.drain_once()
+            except Exception as e:
+                print(f"Email outbox worker error: {str(e)}")
+                claimed = 0
+            finally:
+                SessionLocal.remove()
+            if claimed < self.batch_size:
+                self._stop.wait(self.poll_seconds)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def make_worker(app) -> OutboxWorker:
+    return OutboxWorker(
+        app,
+        batch_size=Config.EMAIL_OUTBOX_BATCH_SIZE,
+        poll_seconds=Config.EMAIL_OUTBOX_POLL_SECONDS,
+        max_attempts=Config.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        backoff_seconds=Config.EMAIL_OUTBOX_BACKOFF_SECONDS,
+        lease_seconds=Config.EMAIL_OUTBOX_LEASE_SECONDS,
+    )
+
+
+_workers: List[OutboxWorker] = []
+
+def start_outbox_workers(app, count: int) -> List[OutboxWorker]:
+    """Start `count` background drain threads once per process."""
+    if _workers or count <= 0:
+        return _workers
+    for i in range(count):
+        worker = make_worker(app)
+        threading.Thread(target=worker.run, name=f"email-outbox-{i}", daemon=True).start()
+        _workers.append(worker)
+    return _workers
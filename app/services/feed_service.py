@@ -0,0 +1,88 @@
+from sqlalchemy import select, and_
+from sqlalchemy.orm import Session, aliased
+from app.models.post_model import Post
+from app.models.like_model import Like
+from typing import Dict, List
+from app.services import like_service
+
+
+def build_post_stats_stmt(post_ids: List[str], user_id: str):
+    """
+    One statement returning like count, comment count and the caller's like
+    status for every post id passed in. Counts come from the denormalized
+    counters on Post, the like status from the (user_id, post_id) unique index.
+    """
+    my_like = aliased(Like)
+    return (
+        select(
+            Post.id,
+            Post.like_count,
+            Post.comment_count + Post.reply_count,
+            my_like.id.isnot(None),
+        )
+        .outerjoin(my_like, and_(my_like.post_id == Post.id, my_like.user_id == user_id))
+        .where(Post.id.in_(post_ids))
+    )
+
+
+def fetch_post_stats(session: Session, post_ids: List[str], user_id: str) -> Dict[str, Dict]:
+    """
+    Returns {post_id: {"likes_count", "comments_count", "is_liked"}} for the given ids.
+    """
+    if not post_ids:
+        return {}
+    return post_stats_from_rows(session.execute(build_post_stats_stmt(post_ids, user_id)).all(), user_id)
+
+
+def post_stats_from_rows(rows: List, user_id: str) -> Dict[str, Dict]:
+    """The rows of build_post_stats_stmt() as fetch_post_stats() returns them."""
+    stats = {
+        post_id: {
+            "likes_count": int(likes_count),
+            "comments_count": int(comments_count),
+            "is_liked": bool(is_liked),
+        }
+        for post_id, likes_count, comments_count, is_liked in rows
+    }
+
+    # Toggles still sitting in this worker's write-behind buffer (LIKE_WRITE_BEHIND)
+    buffer = like_service.like_buffer
+    if buffer is not None:
+        for post_id, post_stats in stats.items():
+            post_stats["likes_count"] += buffer.pending_delta(post_id)
+            buffered = buffer.is_liked(post_id, user_id)
+            if buffered is not None:
+                post_stats["is_liked"] = buffered
+    return stats
+
+
+def hydrate_feed(session: Session, page: List, user_id: str) -> List[Dict]:
+    """
+    Build the feed payload for a page of (Post, User) rows.
+    All stats for the page come from a single query, so the number of queries
+    does not depend on the page size or on the size of the tables.
+    """
+    return feed_items(page, fetch_post_stats(session, [post.id for post, _ in page], user_id))
+
+
+def feed_items(page: List, stats: Dict[str, Dict]) -> List[Dict]:
+    """Feed payload for (Post, User) rows and their fetch_post_stats() entries."""
+    empty = {"likes_count": 0, "comments_count": 0, "is_liked": False}
+
+    feed = []
+    for post, user in page:
+        post_stats = stats.get(post.id, empty)
+        feed.append({
+            "post_id": str(post.id),
+            "title": post.title,
+            "content": post.content,
+            "created_at": post.created_at,
+            "is_liked": post_stats["is_liked"],
+            "likes_count": post_stats["likes_count"],
+            "comments_count": post_stats["comments_count"],
+            "user": {
+                "userId": post.user_id,
+                "username": user.username
+            }
+        })
+    return feed
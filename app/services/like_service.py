@@ -0,0 +1,285 @@
+import atexit
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, insert, select
+from sqlalchemy.orm import Session
+from app.database.db import SessionLocal
+from app.models.like_model import Like
+from app.models.post_model import Post
+from app.services.counter_service import bump_post_counters
+
+
+'''
+Like toggling.
+
+toggle_like() is the direct path: no SELECT before the write. It first tries
+`INSERT OR IGNORE / INSERT IGNORE ... SELECT FROM posts WHERE id = ?`, and the
+unique_user_post_like constraint decides the outcome:
+
+- 1 row inserted: the post exists and was not liked, so it is now liked
+- 0 rows: the post is missing or already liked, so `DELETE` the like.
+  1 row deleted means it is now unliked, 0 means there is no such post.
+
+A double tap that races itself cannot fail on the unique constraint. The second
+INSERT is ignored and turns into the unlike. Neither SQLite nor MySQL can
+insert-or-delete in one statement, so a like costs INSERT + counter bump and an
+unlike INSERT + DELETE + counter bump, all in one transaction.
+
+LikeBuffer is the optional write-behind path (LIKE_WRITE_BEHIND=true). Toggles
+only change an in-memory map of (post, user) -> wanted state:
+
+- toggling back to the stored state cancels the pending change
+- a background thread writes the survivors every LIKE_FLUSH_INTERVAL_SECONDS,
+  grouped per post, in transactions of about LIKE_FLUSH_BATCH_SIZE rows, with
+  ONE counter bump per post. A viral post then takes one UPDATE per flush
+  instead of one per like.
+- the buffer is per process. A worker sees its own pending toggles in
+  is_liked and the like count, other workers see them after the flush.
+- pending toggles are lost if the process is killed before a flush (they are
+  flushed at normal exit)
+'''
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# One statement for both paths: ignores duplicates and likes on posts that do not exist
+_likes = Like.__table__
+INSERT_LIKE = (
+    insert(_likes)
+    .from_select(
+        ["id", "post_id", "user_id", "created_at"],
+        select(bindparam("id"), Post.id, bindparam("user_id"), bindparam("created_at"))
+        .where(Post.id == bindparam("post_id")),
+    )
+    .prefix_with("OR IGNORE", dialect="sqlite")
+    .prefix_with("IGNORE", dialect="mysql")
+)
+
+
+def _like_row(post_id: str, user_id: str, created_at: datetime = None) -> Dict:
+    return {"id": str(uuid.uuid4()), "post_id": post_id, "user_id": user_id, "created_at": created_at or _now()}
+
+
+def toggle_like(session: Session, post_id: str, user_id: str) -> Optional[bool]:
+    """Returns True (now liked), False (now unliked) or None (no such post). The caller commits."""
+    if session.execute(INSERT_LIKE, _like_row(post_id, user_id)).rowcount:
+        bump_post_counters(session, post_id, likes=1)       # last statement before commit
+        return True
+
+    removed = session.execute(
+        delete(_likes).where(_likes.c.post_id == post_id, _likes.c.user_id == user_id)
+    ).rowcount
+    if removed:
+        bump_post_counters(session, post_id, likes=-1)      # last statement before commit
+        return False
+    return None
+
+
+class _Pending:
+    __slots__ = ("stored", "wanted", "at")
+
+    def __init__(self, stored: bool, wanted: bool, at: datetime) -> None:
+        self.stored = stored
+        self.wanted = wanted
+        self.at = at
+
+
+class LikeBuffer:
+    def __init__(self, flush_interval: float, batch_size: int, max_pending: int) -> None:
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], _Pending] = {}
+        self._flushing: Dict[Tuple[str, str], _Pending] = {}     # taken by the running flush, not committed yet
+        self._deltas: Dict[str, int] = {}                       # post_id -> like_count change not in the table yet
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.flushed = 0
+        self.cancelled = 0
+
+    def _shift(self, post_id: str, delta: int) -> None:
+        total = self._deltas.get(post_id, 0) + delta
+        if total:
+            self._deltas[post_id] = total
+        else:
+            self._deltas.pop(post_id, None)
+
+    def _known(self, key: Tuple[str, str]) -> Optional[bool]:
+        entry = self._pending.get(key) or self._flushing.get(key)
+        return entry.wanted if entry else None
+
+    def toggle(self, session: Session, post_id: str, user_id: str) -> Optional[bool]:
+        """Same contract as toggle_like(), but only the buffer changes."""
+        key = (post_id, user_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None:
+                return self._flip(key, entry)
+            known = self._known(key)
+
+        if known is None:
+            # One indexed read: the post exists (a row comes back) and whether it is liked
+            row = session.execute(
+                select(select(_likes.c.id).where(_likes.c.post_id == post_id, _likes.c.user_id == user_id).exists())
+                .where(Post.id == post_id)
+            ).first()
+            if row is None:
+                return None
+            known = bool(row[0])
+
+        if len(self._pending) >= self.max_pending:
+            self.flush()                                        # back-pressure instead of unbounded memory
+
+        with self._lock:
+            entry = self._pending.get(key)                      # another request may have raced us here
+            if entry is not None:
+                return self._flip(key, entry)
+            self._pending[key] = _Pending(known, not known, _now())
+            self._shift(post_id, -1 if known else 1)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+            return not known
+
+    def _flip(self, key: Tuple[str, str], entry: _Pending) -> bool:
+        entry.wanted = not entry.wanted
+        self._shift(key[0], 1 if entry.wanted else -1)
+        if entry.wanted == entry.stored:
+            del self._pending[key]                              # toggled back: nothing to write
+            self.cancelled += 1
+        return entry.wanted
+
+    def is_liked(self, post_id: str, user_id: str) -> Optional[bool]:
+        """Buffered state, or None when the table has the answer."""
+        with self._lock:
+            return self._known((post_id, user_id))
+
+    def pending_delta(self, post_id: str) -> int:
+        with self._lock:
+            return self._deltas.get(post_id, 0)
+
+    def flush(self) -> int:
+        """Write every pending toggle. Returns the number of rows inserted or deleted."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._flushing = batch
+            if not batch:
+                return 0
+
+            groups: Dict[str, Tuple[List[Dict], List[str]]] = {}
+            for (post_id, user_id), entry in batch.items():
+                adds, removes = groups.setdefault(post_id, ([], []))
+                if entry.wanted:
+                    adds.append(_like_row(post_id, user_id, entry.at))
+                else:
+                    removes.append(user_id)
+
+            written = 0
+            chunk: List[Tuple[str, Tuple[List[Dict], List[str]]]] = []
+            rows = 0
+            try:
+                for group in groups.items():
+                    chunk.append(group)
+                    rows += len(group[1][0]) + len(group[1][1])
+                    if rows >= self.batch_size:
+                        written += self._write(chunk)
+                        chunk, rows = [], 0
+                if chunk:
+                    written += self._write(chunk)
+            finally:
+                with self._lock:
+                    for (post_id, _), entry in batch.items():
+                        self._shift(post_id, int(entry.stored) - int(entry.wanted))
+                    self._flushing = {}
+                self.flushed += written
+            return written
+
+    def _write(self, chunk) -> int:
+        """One transaction for the chunk; if it fails, one per post so a bad post does not sink the rest."""
+        if len(chunk) > 1:
+            try:
+                return self._apply(chunk)
+            except Exception:
+                pass
+        written = 0
+        for group in chunk:
+            try:
+                written += self._apply([group])
+            except Exception as e:
+                print(f"Like buffer: dropped {len(group[1][0]) + len(group[1][1])} toggles on post {group[0]}: {str(e)}")
+        return written
+
+    def _apply(self, chunk) -> int:
+        # Own session, never the thread's scoped one: a back-pressure flush runs inside a request
+        session = SessionLocal.session_factory()
+        try:
+            sane_rowcount = session.get_bind().dialect.supports_sane_multi_rowcount
+            written = 0
+            for post_id, (adds, removes) in chunk:
+                delta = 0
+                if removes:
+                    delta -= session.execute(
+                        delete(_likes).where(_likes.c.post_id == post_id, _likes.c.user_id.in_(removes))
+                    ).rowcount
+                if adds:
+                    if sane_rowcount:
+                        delta += session.execute(INSERT_LIKE, adds).rowcount
+                    else:
+                        # executemany rowcount is unreliable here (MySQL), count what actually landed
+                        users = [row["user_id"] for row in adds]
+                        mine = select(func.count()).select_from(_likes).where(
+                            _likes.c.post_id == post_id, _likes.c.user_id.in_(users)
+                        )
+                        before = session.execute(mine).scalar()
+                        session.execute(INSERT_LIKE, adds)
+                        delta += session.execute(mine).scalar() - before
+                bump_post_counters(session, post_id, likes=delta)
+                written += abs(delta)
+            session.commit()
+            return written
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Like buffer flush failed: {str(e)}")
+            finally:
+                SessionLocal.remove()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+
+like_buffer: Optional[LikeBuffer] = None
+
+def pending_state(post_ids: List[str], user_id: str) -> Optional[Tuple]:
+    """What this worker's buffer adds to the given posts for this user (part of their ETags), None without a buffer."""
+    if like_buffer is None:
+        return None
+    return tuple((like_buffer.pending_delta(post_id), like_buffer.is_liked(post_id, user_id)) for post_id in post_ids)
+
+
+def start_like_buffer(enabled: bool, flush_interval: float, batch_size: int, max_pending: int) -> Optional[LikeBuffer]:
+    """Create the write-behind buffer and its flush thread once per process (None when disabled)."""
+    global like_buffer
+    if like_buffer is not None or not enabled:
+        return like_buffer
+    like_buffer = LikeBuffer(flush_interval, batch_size, max_pending)
+    threading.Thread(target=like_buffer.run, name="like-buffer", daemon=True).start()
+    atexit.register(like_buffer.flush)
+    return like_buffer
@@ -0,0 +1,109 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+import bcrypt
+from app.config import Config
+from app.utils.metrics import BCRYPT_QUEUE_SECONDS, BCRYPT_REJECTED, BCRYPT_SECONDS
+
+
+'''
+Bounded bcrypt execution.
+
+bcrypt is deliberately slow, so hashing on the request thread lets a burst of
+logins/registrations take every worker's CPU. All hashing and verification
+goes through one small pool per process instead:
+
+- at most HASHER_WORKERS hashes run at the same time (bcrypt releases the GIL,
+  so they really run in parallel)
+- at most HASHER_MAX_QUEUE more may wait; past that the call fails fast with
+  HasherBusy, which the routes turn into a 503 instead of queueing forever
+- BCRYPT_ROUNDS sets the cost of new hashes. Hashes made with another cost are
+  upgraded at the next successful login (see needs_rehash)
+- every call is timed (queue wait and bcrypt time) so the cost can be tuned
+  against login latency, see stats() and the bcrypt_* metrics on /metrics
+'''
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+_COST = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, workers: int, max_queue: int) -> None:
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self.rejected = 0
+
+    def _record(self, op: str, waited: float, took: float) -> None:
+        with self._lock:
+            s = self._stats.setdefault(op, {"calls": 0, "wait_total": 0.0, "time_total": 0.0, "time_max": 0.0})
+            s["calls"] += 1
+            s["wait_total"] += waited
+            s["time_total"] += took
+            s["time_max"] = max(s["time_max"], took)
+        BCRYPT_SECONDS.labels(op).observe(took)
+        BCRYPT_QUEUE_SECONDS.labels(op).observe(waited)
+
+    def _run(self, op: str, fn: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            BCRYPT_REJECTED.inc()
+            raise HasherBusy("Password hashing queue is full")
+
+        submitted = time.perf_counter()
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(op, started - submitted, time.perf_counter() - started)
+        try:
+            future = self._executor.submit(timed)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, plain_text: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run("hash", bcrypt.hashpw, plain_text.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, plain_text: str, hashed: str) -> bool:
+        return self._run("verify", bcrypt.checkpw, plain_text.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        match = _COST.match(hashed or "")
+        return not match or int(match.group(1)) != self.rounds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            ops = {
+                op: {
+                    "calls": int(s["calls"]),
+                    "avg_wait_ms": s["wait_total"] / s["calls"] * 1000,
+                    "avg_ms": s["time_total"] / s["calls"] * 1000,
+                    "max_ms": s["time_max"] * 1000,
+                }
+                for op, s in self._stats.items()
+            }
+            return {"rounds": self.rounds, "workers": self.workers, "max_queue": self.max_queue,
+                    "rejected": self.rejected, **ops}
+
+
+password_hasher = PasswordHasher(
+    rounds=Config.BCRYPT_ROUNDS,
+    workers=Config.HASHER_WORKERS,
+    max_queue=Config.HASHER_MAX_QUEUE,
+)
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable
+from sqlalchemy import select
+from app.config import Config
+from app.database.db import SessionLocal
+from app.database.async_db import fetch_all
+from app.models.token_blacklist_model import TokenBlacklist
+from app.services.auth_cache import note_token_version
+
+
+'''
+In-process revocation filter.
+
+Every worker keeps a Bloom filter of the revoked token ids (see get_token_id),
+so the authentication path can answer "definitely not revoked" from memory and
+only goes to the database when the filter reports a possible hit.
+
+- loaded from `token_blacklist` on first use, so a restarted worker recovers
+  its full state from the database
+- kept up to date incrementally: tokens revoked by this worker are added
+  immediately, tokens revoked by other workers are picked up by a background
+  sync every REVOCATION_SYNC_SECONDS (started with the other background
+  workers, see start_background_workers in app/__init__.py)
+- rebuilt every REVOCATION_REBUILD_SECONDS from the non-expired rows, which
+  drops expired tokens and resizes the filter when the blacklist grows
+
+The same feed carries "logout everywhere": logout_all adds a VERSION_MARKER
+row, and each worker that syncs it drops its cached snapshot of that user
+(app/services/auth_cache.py) if older than the new token_version.
+'''
+
+# token_type of the rows announcing a token_version bump, not a revoked token
+VERSION_MARKER = "version"
+
+
+def version_marker(user_id: str, token_version: int) -> str:
+    """jti of the row announcing that `user_id`'s tokens older than `token_version` are revoked."""
+    return f"v{token_version}:{user_id}"
+
+
+def _version_bumped(jti: str, user_id: str) -> None:
+    note_token_version(user_id, int(jti[1:].split(":", 1)[0]))
+
+
+def _optimal_size(capacity: int, fp_rate: float):
+    bits = max(int(-capacity * math.log(fp_rate) / (math.log(2) ** 2)), 64)
+    hashes = max(int(round(bits / capacity * math.log(2))), 1)
+    return bits, hashes
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, fp_rate: float) -> None:
+        self.capacity = capacity
+        self.bits, self.hashes = _optimal_size(capacity, fp_rate)
+        self._array = bytearray((self.bits + 7) // 8)
+        self.items = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        # Only counted when a bit flips: re-adding a key (sync overlap, rebuild) must not inflate the fp estimate
+        array = self._array
+        flipped = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not array[pos >> 3] & mask:
+                array[pos >> 3] |= mask
+                flipped = True
+        if flipped:
+            self.items += 1
+
+    def __contains__(self, key: str) -> bool:
+        array = self._array
+        return all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._array)
+
+    @property
+    def estimated_fp_rate(self) -> float:
+        """(1 - e^(-kn/m))^k for the number of items added so far."""
+        return (1 - math.exp(-self.hashes * self.items / self.bits)) ** self.hashes
+
+
+class RevocationFilter:
+    def __init__(self, capacity: int, fp_rate: float, sync_seconds: float, rebuild_seconds: float) -> None:
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.sync_seconds = sync_seconds
+        self.rebuild_seconds = rebuild_seconds
+
+        self._bloom = BloomFilter(capacity, fp_rate)
+        self._lock = threading.Lock()                       # guards _bloom, _watermark and _added_during_rebuild
+        self._load_lock = threading.Lock()
+        self._added_during_rebuild = None                   # list while a rebuild runs
+        self._loaded = False
+        self._watermark = None
+        self._last_rebuild = 0.0
+        self._thread = None
+
+        # observed behaviour, for tuning capacity / fp_rate
+        self.checks = 0
+        self.filter_hits = 0
+        self.false_positives = 0
+
+    # -- loading -------------------------------------------------------------
+
+    def ensure_loaded(self) -> None:
+        """Load the filter on first use in this worker."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            self._rebuild()
+            self._loaded = True
+
+    def start_sync(self) -> None:
+        """Start the sync thread once per process (start_background_workers does it; 0 seconds disables it)."""
+        with self._load_lock:
+            if self._thread is not None or self.sync_seconds <= 0:
+                return
+            self._thread = threading.Thread(target=self._run, name="revocation-filter-sync", daemon=True)
+            self._thread.start()
+
+    def _rebuild(self) -> None:
+        # Tokens this worker revokes from here on may be missing from the snapshot: add() records them
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            session = SessionLocal()
+            try:
+                now = datetime.now(timezone.utc)
+                rows = session.query(
+                    TokenBlacklist.jti, TokenBlacklist.blacklisted_at, TokenBlacklist.token_type, TokenBlacklist.user_id
+                ).filter(TokenBlacklist.expires_at > now).all()
+            finally:
+                session.close()
+
+            bloom = BloomFilter(max(self.capacity, len(rows) * 2), self.fp_rate)
+            watermark = self._watermark
+            for jti, blacklisted_at, token_type, user_id in rows:
+                if token_type == VERSION_MARKER:
+                    _version_bumped(jti, user_id)
+                else:
+                    bloom.add(jti)
+                if watermark is None or blacklisted_at > watermark:
+                    watermark = blacklisted_at
+
+            with self._lock:
+                for token_id in self._added_during_rebuild:
+                    bloom.add(token_id)
+                self._bloom = bloom                         # swapped in one step, readers never see a half-built filter
+                self._watermark = watermark
+        finally:
+            with self._lock:
+                self._added_during_rebuild = None
+        self._last_rebuild = time.monotonic()
+
+    def sync(self) -> None:
+        """Add tokens revoked by other workers since the last sync."""
+        session = SessionLocal()
+        try:
+            query = session.query(
+                TokenBlacklist.jti, TokenBlacklist.blacklisted_at, TokenBlacklist.token_type, TokenBlacklist.user_id
+            )
+            if self._watermark is not None:
+                # Overlap the window a little: workers stamp blacklisted_at with their own clocks
+                query = query.filter(TokenBlacklist.blacklisted_at >= self._watermark - timedelta(seconds=60))
+            rows = query.all()
+        finally:
+            session.close()
+
+        with self._lock:
+            for jti, blacklisted_at, token_type, user_id in rows:
+                if token_type == VERSION_MARKER:
+                    _version_bumped(jti, user_id)
+                elif jti not in self._bloom:
+                    self._bloom.add(jti)
+                if self._watermark is None or blacklisted_at > self._watermark:
+                    self._watermark = blacklisted_at
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.sync_seconds)
+            try:
+                if not self._loaded:
+                    self.ensure_loaded()
+                elif time.monotonic() - self._last_rebuild >= self.rebuild_seconds:
+                    self._rebuild()
+                else:
+                    self.sync()
+            except Exception as e:
+                print(f"Revocation filter sync failed: {str(e)}")
+            finally:
+                SessionLocal.remove()
+
+    # -- request path --------------------------------------------------------
+
+    def add(self, token_id: str) -> None:
+        """Record a token revoked by this worker (call after the blacklist row is committed)."""
+        with self._lock:
+            self._bloom.add(token_id)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(token_id)
+
+    def might_contain(self, token_id: str) -> bool:
+        self.checks += 1
+        hit = token_id in self._bloom
+        if hit:
+            self.filter_hits += 1
+        return hit
+
+    def is_revoked(self, token_id: str) -> bool:
+        """
+        False without touching the database for (almost) every clean token.
+        A filter hit is confirmed against the blacklist table.
+        """
+        self.ensure_loaded()
+        if not self.might_contain(token_id):
+            return False
+
+        session = SessionLocal()
+        try:
+            revoked = session.query(TokenBlacklist.id).filter_by(jti=token_id).first() is not None
+        finally:
+            session.close()
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    async def is_revoked_async(self, token_id: str) -> bool:
+        """is_revoked() for async views: the (rare) confirmation read goes through the async engine."""
+        if not self._loaded:
+            await asyncio.to_thread(self.ensure_loaded)
+        if not self.might_contain(token_id):
+            return False
+
+        revoked = bool(await fetch_all(select(TokenBlacklist.id).where(TokenBlacklist.jti == token_id).limit(1)))
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def stats(self) -> Dict:
+        bloom = self._bloom
+        return {
+            "items": bloom.items,
+            "capacity": bloom.capacity,
+            "bits": bloom.bits,
+            "hashes": bloom.hashes,
+            "memory_bytes": bloom.memory_bytes,
+            "estimated_fp_rate": bloom.estimated_fp_rate,
+            "checks": self.checks,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+            "observed_fp_rate": self.false_positives / self.checks if self.checks else 0.0,
+        }
+
+
+revocation_filter = RevocationFilter(
+    capacity=Config.REVOCATION_FILTER_CAPACITY,
+    fp_rate=Config.REVOCATION_FILTER_FP_RATE,
+    sync_seconds=Config.REVOCATION_SYNC_SECONDS,
+    rebuild_seconds=Config.REVOCATION_REBUILD_SECONDS,
+)
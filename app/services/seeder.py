@@ -0,0 +1,179 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional
+import bcrypt
+from sqlalchemy import insert
+from app.models.user_model import User
+from app.models.post_model import Post
+from app.models.comment_model import Comment
+from app.models.like_model import Like
+
+
+'''
+Bulk synthetic data.
+
+Generates users, posts, threaded comments and likes straight into the
+tables with Core executemany() batches: no ORM objects, no per-row bcrypt
+(every user shares one precomputed hash), counters computed while
+generating so the data is consistent without a reconcile pass.
+
+Distributions:
+- post popularity follows a power law (Zipf, exponent `alpha`): a few posts
+  get most of the likes and comments, the long tail gets almost none
+- authors follow the same law, so a few users write most posts/comments
+- each comment is a reply with probability `reply_ratio`, to a random
+  earlier comment of the thread that is less than `max_depth` deep
+
+Generation is deterministic for a given `seed` (ids and timestamps
+included). Works on SQLite and MySQL.
+'''
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "10k": {"users": 1_000, "posts": 2_000, "comments": 5_000, "likes": 10_000},
+    "1m": {"users": 50_000, "posts": 100_000, "comments": 300_000, "likes": 1_000_000},
+    "10m": {"users": 200_000, "posts": 1_000_000, "comments": 2_000_000, "likes": 10_000_000},
+}
+
+EPOCH = datetime(2025, 1, 1)                # fixed, so timestamps are reproducible too
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _zipf_counts(total: int, buckets: int, alpha: float, cap: int, rng: random.Random) -> List[int]:
+    """Split `total` over `buckets` by a power law, no bucket above `cap`, in random bucket order."""
+    weights = [1.0 / (rank ** alpha) for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [min(int(w * scale), cap) for w in weights]
+    leftover = total - sum(counts)
+    for i in range(buckets):                # rounding leftovers, one each, most popular first
+        if leftover <= 0:
+            break
+        if counts[i] < cap:
+            counts[i] += 1
+            leftover -= 1
+    rng.shuffle(counts)                     # popularity is not tied to creation order
+    return counts
+
+
+class _Writer:
+    """Buffers rows per table and writes them in batches, parents before children."""
+    ORDER = ("users", "posts", "comments", "likes")
+
+    def __init__(self, engine, batch_size: int, progress: Optional[Callable[[Dict], None]]) -> None:
+        self.engine = engine
+        self.batch_size = batch_size
+        self.progress = progress
+        self.tables = {"users": User.__table__, "posts": Post.__table__,
+                       "comments": Comment.__table__, "likes": Like.__table__}
+        self.buffers: Dict[str, List[Dict]] = {name: [] for name in self.ORDER}
+        self.rows = {name: 0 for name in self.ORDER}
+        self.seconds = {name: 0.0 for name in self.ORDER}
+        self.started = time.perf_counter()
+
+    def add(self, table: str, row: Dict) -> None:
+        self.buffers[table].append(row)
+        if len(self.buffers[table]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.engine.begin() as conn:
+            for name in self.ORDER:
+                rows = self.buffers[name]
+                if not rows:
+                    continue
+                started = time.perf_counter()
+                conn.execute(insert(self.tables[name]), rows)
+                self.seconds[name] += time.perf_counter() - started
+                self.rows[name] += len(rows)
+                self.buffers[name] = []
+        if self.progress:
+            self.progress(self.stats())
+
+    def stats(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        total = sum(self.rows.values())
+        return {
+            "elapsed_seconds": elapsed,
+            "rows": dict(self.rows),
+            "rows_per_second": {
+                name: self.rows[name] / self.seconds[name] if self.seconds[name] else 0.0 for name in self.ORDER
+            },
+            "total_rows": total,
+            "total_rows_per_second": total / elapsed if elapsed else 0.0,
+        }
+
+
+def seed_data(engine, users: int, posts: int, comments: int, likes: int, alpha: float = 1.1,
+              reply_ratio: float = 0.4, max_depth: int = 5, days: int = 365, batch_size: int = 10_000,
+              seed: int = 42, password: str = "password123", bcrypt_rounds: int = 12,
+              username_prefix: str = "user", progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Insert the requested volumes and return the writer stats (rows and rows/s
+    per table). Usernames are `<username_prefix><n>`, emails
+    `<username_prefix><n>@example.com`, all sharing `password`.
+    """
+    rng = random.Random(seed)
+    writer = _Writer(engine, batch_size, progress)
+    password_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=bcrypt_rounds)).decode("utf-8")
+
+    user_ids = [_uuid(rng) for _ in range(users)]
+    for i, user_id in enumerate(user_ids):
+        writer.add("users", {
+            "id": user_id, "username": f"{username_prefix}{i}", "email": f"{username_prefix}{i}@example.com",
+            "password": password_hash, "created_at": EPOCH - timedelta(days=days + rng.randrange(30)),
+            "token_version": 0,
+        })
+
+    # Power-law activity for authors, popularity for posts
+    author_weights = list(accumulate(1.0 / (rank ** alpha) for rank in range(1, users + 1)))
+    authors = user_ids[:]
+    rng.shuffle(authors)
+    like_counts = _zipf_counts(likes, posts, alpha, users, rng)
+    comment_counts = _zipf_counts(comments, posts, alpha, comments, rng)
+    span = days * 86400
+
+    for i in range(posts):
+        post_id = _uuid(rng)
+        created = EPOCH - timedelta(seconds=rng.randrange(span))
+        thread: List[Dict] = []
+        depths: List[int] = []
+        for author in rng.choices(authors, cum_weights=author_weights, k=comment_counts[i]):
+            parent = None
+            if thread and rng.random() < reply_ratio:
+                candidate = rng.randrange(len(thread))
+                if depths[candidate] < max_depth:
+                    parent = candidate
+            after = thread[parent]["created_at"] if parent is not None else created
+            comment_created = after + timedelta(seconds=rng.randrange(1, 2 * 86400))
+            thread.append({
+                "id": _uuid(rng), "post_id": post_id, "user_id": author,
+                "parent_id": thread[parent]["id"] if parent is not None else None,
+                "content": f"Comment {len(thread)} on post {i}", "created_at": comment_created,
+                "updated_at": comment_created, "reply_count": 0,
+            })
+            depths.append(depths[parent] + 1 if parent is not None else 0)
+            if parent is not None:
+                thread[parent]["reply_count"] += 1
+        top_level = depths.count(0)
+
+        # Buffered without flushing, so the post is always written in the same batch as its first children or earlier
+        writer.buffers["posts"].append({
+            "id": post_id, "title": f"Post {i}", "content": f"Synthetic post {i}. " * 10,
+            "user_id": rng.choices(authors, cum_weights=author_weights)[0], "created_at": created,
+            "like_count": like_counts[i], "comment_count": top_level, "reply_count": len(thread) - top_level,
+        })
+        for comment in thread:
+            writer.add("comments", comment)
+        for user_index in rng.sample(range(users), like_counts[i]):
+            writer.add("likes", {"id": _uuid(rng), "post_id": post_id, "user_id": user_ids[user_index],
+                                 "created_at": created + timedelta(seconds=rng.randrange(1, 30 * 86400))})
+        if len(writer.buffers["posts"]) >= writer.batch_size:
+            writer.flush()
+
+    writer.flush()
+    return writer.stats()
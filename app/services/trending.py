@@ -0,0 +1,201 @@
+import math
+import threading
+import time
+from itertools import count
+from operator import itemgetter
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import Integer, func, literal, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+from app.config import Config
+from app.database.db import SessionLocal
+from app.database.async_db import fetch_all
+from app.models.like_model import Like
+from app.models.comment_model import Comment
+
+
+'''
+Trending feed.
+
+A post's score is the sum of its recent likes and comments, each one weighted
+(TRENDING_LIKE_WEIGHT / TRENDING_COMMENT_WEIGHT) and decayed by its age:
+
+    score = sum(weight * 0.5 ** (age_hours / TRENDING_HALF_LIFE_HOURS))
+
+over the last TRENDING_WINDOW_HOURS. A like from one half-life ago counts half
+as much as a like from now, so posts rise and fall with their current activity
+instead of their lifetime totals.
+
+Refreshing the ranking takes ONE aggregate query, which counts events per
+(post, kind, hour) over the window. The scores then come from a single
+vectorized NumPy pass: exp() over all rows, then one bincount() to sum them
+per post. The ranked top TRENDING_TOP_N post ids stay in memory and are
+replaced every TRENDING_REFRESH_SECONDS by a background thread. Serving a
+trending page is a list slice plus one query for those posts. Each worker
+keeps its own ranking.
+'''
+
+
+class epoch_hour(FunctionElement):
+    """Whole hours since 1970-01-01 for a DateTime column (SQLite and MySQL)."""
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(epoch_hour)
+def _epoch_hour_default(element, compiler, **kw):
+    return "FLOOR(UNIX_TIMESTAMP(%s) / 3600)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(epoch_hour, "sqlite")
+def _epoch_hour_sqlite(element, compiler, **kw):
+    return "CAST(strftime('%%s', %s) AS INTEGER) / 3600" % compiler.process(element.clauses, **kw)
+
+
+def build_activity_stmt(since: datetime):
+    """(post_id, kind, hour, events) for every like (kind 0) and comment (kind 1) since `since`."""
+    events = union_all(
+        select(Like.post_id.label("post_id"), literal(0).label("kind"), epoch_hour(Like.created_at).label("hour"))
+        .where(Like.created_at >= since),
+        select(Comment.post_id, literal(1), epoch_hour(Comment.created_at))
+        .where(Comment.created_at >= since),
+    ).subquery("events")
+    return (
+        select(events.c.post_id, events.c.kind, events.c.hour, func.count())
+        .group_by(events.c.post_id, events.c.kind, events.c.hour)
+    )
+
+
+def score_activity(post_index: np.ndarray, kinds: np.ndarray, hours: np.ndarray, counts: np.ndarray,
+                   posts: int, now_hour: float, half_life_hours: float, like_weight: float,
+                   comment_weight: float) -> np.ndarray:
+    """
+    Decayed score per post. Arguments are parallel arrays, one entry per
+    aggregate row (`post_index` in [0, posts)); returns an array of `posts` scores.
+    """
+    weights = np.where(kinds == 0, like_weight, comment_weight) * counts
+    age = np.maximum(now_hour - (hours + 0.5), 0.0)            # middle of the hour bucket
+    decayed = weights * np.exp(age * (-math.log(2) / half_life_hours))
+    return np.bincount(post_index, weights=decayed, minlength=posts)
+
+
+def top_n(post_ids: List[str], scores: np.ndarray, n: int) -> List[Tuple[str, float]]:
+    """The `n` best (post_id, score) pairs, best first (ties: post id)."""
+    if not len(scores):
+        return []
+    if n < len(scores):
+        best = np.argpartition(-scores, n - 1)[:n]
+    else:
+        best = np.arange(len(scores))
+    ranked = sorted(best.tolist(), key=lambda i: (-scores[i], post_ids[i]))
+    return [(post_ids[i], float(scores[i])) for i in ranked]
+
+
+class TrendingRanker:
+    def __init__(self, window_hours: float, half_life_hours: float, like_weight: float,
+                 comment_weight: float, top: int) -> None:
+        self.window_hours = window_hours
+        self.half_life_hours = half_life_hours
+        self.like_weight = like_weight
+        self.comment_weight = comment_weight
+        self.top = top
+        self.ranking: Optional[List[Tuple[str, float]]] = None
+        self.refreshed_at: Optional[float] = None
+        self.last_refresh_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, session: Session, now: Optional[datetime] = None) -> List[Tuple[str, float]]:
+        """Recompute the ranking (one query + one NumPy pass) and swap it in."""
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        rows = session.execute(build_activity_stmt(now - timedelta(hours=self.window_hours))).all()
+        return self._store(self.rank(rows, now), started)
+
+    async def refresh_async(self) -> List[Tuple[str, float]]:
+        """refresh() for async views: the aggregate query goes through the async engine."""
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        rows = await fetch_all(build_activity_stmt(now - timedelta(hours=self.window_hours)))
+        return self._store(self.rank(rows, now), started)
+
+    def _store(self, ranking: List[Tuple[str, float]], started: float) -> List[Tuple[str, float]]:
+        with self._lock:
+            self.ranking = ranking
+            self.refreshed_at = time.time()
+            self.last_refresh_seconds = time.perf_counter() - started
+        return ranking
+
+    def rank(self, rows: Sequence, now: datetime) -> List[Tuple[str, float]]:
+        """Top posts for (post_id, kind, hour, events) rows as returned by build_activity_stmt."""
+        n = len(rows)
+        # Each post is numbered by the position of its first row: no Python loop beyond the column copies
+        first_row = {}
+        post_index = np.fromiter(map(first_row.setdefault, map(itemgetter(0), rows), count()), dtype=np.int64, count=n)
+        kinds = np.fromiter(map(itemgetter(1), rows), dtype=np.int8, count=n)
+        hours = np.fromiter(map(itemgetter(2), rows), dtype=np.float64, count=n)
+        counts = np.fromiter(map(itemgetter(3), rows), dtype=np.float64, count=n)
+
+        scores = score_activity(
+            post_index, kinds, hours, counts, n, now.timestamp() / 3600,
+            self.half_life_hours, self.like_weight, self.comment_weight,
+        )
+        firsts = np.fromiter(first_row.values(), dtype=np.int64, count=len(first_row))
+        return top_n(list(first_row), scores[firsts], self.top)
+
+    def page(self, session: Session, offset: int, limit: int) -> Tuple[List[Tuple[str, float]], int]:
+        """(slice of the ranking, ranking length); refreshes inline only before the first refresh."""
+        ranking = self.ranking
+        if ranking is None:
+            ranking = self.refresh(session)
+        return ranking[offset:offset + limit], len(ranking)
+
+    async def page_async(self, offset: int, limit: int) -> Tuple[List[Tuple[str, float]], int]:
+        """page() for async views."""
+        ranking = self.ranking
+        if ranking is None:
+            ranking = await self.refresh_async()
+        return ranking[offset:offset + limit], len(ranking)
+
+    def run(self, interval_seconds: float) -> None:
+        while True:
+            session = SessionLocal()
+            try:
+                self.refresh(session)
+            except Exception as e:
+                session.rollback()
+                print(f"Trending refresh failed: {str(e)}")
+            finally:
+                session.close()
+                SessionLocal.remove()
+            time.sleep(interval_seconds)
+
+
+trending_ranker: Optional[TrendingRanker] = None
+
+def get_trending_ranker() -> TrendingRanker:
+    global trending_ranker
+    if trending_ranker is None:
+        trending_ranker = TrendingRanker(
+            window_hours=Config.TRENDING_WINDOW_HOURS,
+            half_life_hours=Config.TRENDING_HALF_LIFE_HOURS,
+            like_weight=Config.TRENDING_LIKE_WEIGHT,
+            comment_weight=Config.TRENDING_COMMENT_WEIGHT,
+            top=Config.TRENDING_TOP_N,
+        )
+    return trending_ranker
+
+
+_started = False
+
+def start_trending_refresher(interval_seconds: float) -> None:
+    """Start the background refresh thread once per process (0 disables it: refresh once, on first use)."""
+    global _started
+    if _started or interval_seconds <= 0:
+        return
+    _started = True
+    threading.Thread(
+        target=get_trending_ranker().run, args=(interval_seconds,), name="trending-refresher", daemon=True
+    ).start()
@@ -1,10 +1,22 @@
-def send_welcome_message(user_email: str, user_name: str):
-    from flask_mail import Message
-    from app import mail    # lazy import inside the function
-    
-    msg = Message(
-        subject= "welcoem to Our App!",
-        recipients= [user_email],
-        body= f"Hi {user_name},\n\nWelcome to our app! We're glad to have you 🎉"
-    )
-    mail.send(msg)
\ No newline at end of file
+from typing import Tuple
+from sqlalchemy.orm import Session
+
+
+def welcome_message(user_name: str) -> Tuple[str, str]:
+    subject = "welcoem to Our App!"
+    body = f"Hi {user_name},\n\nWelcome to our app! We're glad to have you 🎉"
+    return subject, body
+
+
+def queue_email(session: Session, recipient: str, subject: str, body: str) -> None:
+    """
+    Add a message to the outbox in the caller's transaction. It is only sent
+    (by app/services/email_outbox.py) once that transaction commits.
+    """
+    from app.models.email_outbox_model import EmailOutbox
+    session.add(EmailOutbox(recipient=recipient, subject=subject, body=body))
+
+
+def queue_welcome_message(session: Session, user_email: str, user_name: str) -> None:
+    subject, body = welcome_message(user_name)
+    queue_email(session, user_email, subject, body)
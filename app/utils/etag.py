@@ -0,0 +1,67 @@
+import hashlib
+from typing import Any, Awaitable, Callable
+from flask import Response, current_app, make_response, request
+
+
+'''
+Conditional GET helpers (ETag / If-None-Match).
+
+Two kinds of tags:
+- version_etag(): derived from version stamps (Post.version, bumped by every
+  write that changes what a post's read endpoints return, see
+  app/services/counter_service.py) plus whatever else shapes the body (query
+  string, caller). The route reads the version alone, and if the client's tag
+  still matches it answers 304 without loading or serializing the resource.
+- content_etag(): a hash of the payload, for responses that are cheap to build
+  but have no single version (e.g. /post/stats).
+
+Responses that carry per-user fields (is_liked, ...) depend on the
+Authorization header, so they are sent with `Vary: Authorization` and
+`Cache-Control: private, no-cache`: browsers may keep them but must
+revalidate every time, shared caches must not store them at all. A matching
+If-None-Match gets an empty 304.
+'''
+
+
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+def content_etag(data: Any) -> str:
+    """Strong ETag value for a JSON-serializable payload (same bytes, same tag)."""
+    return hashlib.blake2b(current_app.json.dumps_bytes(data), digest_size=16).hexdigest()
+
+
+def version_etag(*parts: Any) -> str:
+    """Strong ETag value from version stamps and the other inputs of the response."""
+    return hashlib.blake2b("|".join(map(str, parts)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cache_headers(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+    response.vary.add("Authorization")
+    return response
+
+
+def conditional_response(etag: str, build: Callable[[], Any]) -> Response:
+    """
+    304 if the client already has `etag`, otherwise the response returned by
+    `build()` (only called when needed). Only 200s get the tag, errors are
+    never revalidated.
+    """
+    if request.if_none_match.contains(etag):
+        return _cache_headers(Response(status=304), etag)
+    response = make_response(build())
+    if response.status_code == 200:
+        _cache_headers(response, etag)
+    return response
+
+
+async def conditional_response_async(etag: str, build: Callable[[], Awaitable[Any]]) -> Response:
+    """conditional_response() for async views: `build` is a coroutine function."""
+    if request.if_none_match.contains(etag):
+        return _cache_headers(Response(status=304), etag)
+    response = make_response(await build())
+    if response.status_code == 200:
+        _cache_headers(response, etag)
+    return response
@@ -0,0 +1,76 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime
+from typing import Any
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+from app.config import Config
+
+try:
+    import orjson
+except ImportError:                                 # optional, the stdlib encoder is used without it
+    orjson = None
+
+
+'''
+Fast JSON provider.
+
+Installed as `app.json`, so jsonify()/api_response() and api_stream_response()
+all go through it. With orjson available responses are encoded straight to
+bytes by orjson, otherwise by Flask's stdlib-based provider. Output is the same
+as Flask's default either way: sorted keys, compact (indented in debug),
+trailing newline, UUID/Decimal/dataclasses supported.
+
+Datetimes keep Flask's HTTP date format by default; JSON_DATETIME_FORMAT=iso
+switches them to ISO 8601 (orjson's native, fastest path).
+'''
+
+
+def _http_default(o: Any) -> Any:
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _iso_default(o: Any) -> Any:
+    if isinstance(o, date):
+        return o.isoformat()
+    return _http_default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    def __init__(self, app) -> None:
+        super().__init__(app)
+        self.use_orjson = orjson is not None and Config.JSON_ENCODER != "stdlib"
+        self.iso_dates = Config.JSON_DATETIME_FORMAT == "iso"
+        self.default = _iso_default if self.iso_dates else _http_default
+
+    def _orjson_options(self, indent: bool) -> int:
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        if not self.iso_dates:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME    # formatted by _http_default instead
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        if self.use_orjson:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+        return self.dumps(obj, **({"indent": 2} if indent else {"separators": (",", ":")})).encode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.use_orjson and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options(False)).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
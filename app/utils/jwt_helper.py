@@ -1,6 +1,8 @@
 import jwt
 from dotenv import load_dotenv
 import os
+import uuid
+import hashlib
 from datetime import datetime, timedelta, timezone      # Import timezone
 from typing import Dict, Any
 
@@ -16,19 +18,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
 
 
-def create_access_token(data: Dict):
+def create_access_token(data: Dict, token_version: int = 0):
     payload: Dict = data.copy()
     now = datetime.now(timezone.utc)
     expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    payload.update({"exp": expire.timestamp(), "type": "access"})
+    payload.update({"exp": expire.timestamp(), "type": "access", "jti": uuid.uuid4().hex, "ver": token_version})
     encoden_jwt = jwt.encode(payload, SECRET_KEY, ALGORITHM)
     return encoden_jwt
 
-def create_refresh_token(data: Dict):
+def create_refresh_token(data: Dict, token_version: int = 0):
     payload: Dict = data.copy()
     now = datetime.now(timezone.utc)
     expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    payload.update({"exp": expire.timestamp(), "type": "refresh"})
+    payload.update({"exp": expire.timestamp(), "type": "refresh", "jti": uuid.uuid4().hex, "ver": token_version})
     encoden_jwt = jwt.encode(payload, SECRET_KEY, ALGORITHM)
     return encoden_jwt
 
@@ -41,6 +43,14 @@ def decode_token(token: str):
         return None
     except jwt.InvalidTokenError:
         return None
+
+
+def get_token_id(token: str, payload: Dict) -> str:
+    """
+    Fixed-width id used to blacklist a token: its `jti` claim, or the SHA-256
+    of the raw token for tokens issued before `jti` existed.
+    """
+    return payload.get("jti") or hashlib.sha256(token.encode("utf-8")).hexdigest()
     
         
 
@@ -0,0 +1,127 @@
+import time
+from flask import g, request
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from app.config import Config
+
+
+'''
+Prometheus metrics.
+
+Every metric is a module-level prometheus_client object, so recording is an
+in-memory increment (cheap enough to stay on permanently) and the values are
+served by GET /metrics (app/routes/metrics_routes.py).
+
+Multiple worker processes: set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before the workers start. Each process then writes its
+values to mmap'ed files in it and /metrics aggregates all of them (gauges are
+summed over live processes). With gunicorn, also call
+`prometheus_client.multiprocess.mark_process_dead(worker.pid)` from the
+`child_exit` hook.
+'''
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "endpoint"],
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests by route and status code",
+    ["method", "endpoint", "status"],
+)
+REQUEST_EXCEPTIONS = Counter(
+    "http_request_exceptions_total", "Unhandled exceptions by route",
+    ["endpoint", "exception"],
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled",
+    ["method", "endpoint"], multiprocess_mode="livesum",
+)
+
+DB_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    ["engine"], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections", "Pooled connections by state",
+    ["engine", "state"], multiprocess_mode="livesum",
+)
+
+AUTH_SECONDS = Histogram(
+    "token_required_seconds", "Time spent inside token_required",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+BCRYPT_SECONDS = Histogram(
+    "bcrypt_seconds", "bcrypt time per call (excluding queue wait)",
+    ["operation"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+BCRYPT_QUEUE_SECONDS = Histogram(
+    "bcrypt_queue_wait_seconds", "Time a bcrypt call waited for a pool thread",
+    ["operation"], buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+BCRYPT_REJECTED = Counter("bcrypt_rejected_total", "bcrypt calls rejected because the queue was full")
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited (set `metrics_name` to label it)."""
+    metrics_name = "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_CHECKOUT_WAIT.labels(self.metrics_name).observe(time.perf_counter() - started)
+
+
+def instrument_pool(engine, name: str) -> None:
+    """Checkout wait and in-use/idle/overflow gauges for one engine's pool."""
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        pool.metrics_name = name
+    if not hasattr(pool, "checkedout"):
+        return                                          # single-connection pools (in-memory SQLite)
+
+    def update(*_) -> None:
+        DB_POOL_CONNECTIONS.labels(name, "in_use").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(name, "idle").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels(name, "overflow").set(max(pool.overflow(), 0))
+
+    event.listen(pool, "checkout", update)
+    event.listen(pool, "checkin", update)
+
+
+def _endpoint() -> str:
+    return request.endpoint or "unmatched"             # route name, never the raw path (bounded labels)
+
+
+def _start_request() -> None:
+    g.metrics_started = time.perf_counter()
+    IN_PROGRESS.labels(request.method, _endpoint()).inc()
+
+
+def _record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _end_request(exc=None) -> None:
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return
+    method, endpoint = request.method, _endpoint()
+    IN_PROGRESS.labels(method, endpoint).dec()
+    if exc is not None:
+        REQUEST_EXCEPTIONS.labels(endpoint, type(exc).__name__).inc()
+    status = 500 if exc is not None else g.get("metrics_status", 500)
+    REQUESTS.labels(method, endpoint, str(status)).inc()
+    REQUEST_LATENCY.labels(method, endpoint).observe(time.perf_counter() - started)
+
+
+def init_metrics(app) -> None:
+    if not Config.METRICS_ENABLED:
+        return
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    app.teardown_request(_end_request)
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, List, Tuple
+from sqlalchemy import or_, and_
+from app.config import Config
+from app.utils.ttl_cache import TTLCache
+
+
+'''
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, url-safe token holding the (created_at, id) of the last
+row of the previous page. The next page is "everything strictly older than the
+cursor" in (created_at DESC, id DESC) order, so rows inserted while a client is
+scrolling never shift the pages it has not seen yet.
+'''
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raises ValueError for anything that is not a cursor we issued."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_filter(created_col, id_col, cursor: str):
+    """
+    WHERE clause selecting the rows after `cursor`, or None for the first page.
+    Must be combined with ORDER BY created_col DESC, id_col DESC.
+    """
+    if not cursor:
+        return None
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_col < created_at,
+        and_(created_col == created_at, id_col < row_id)
+    )
+
+
+def keyset_page(rows: List, per_page: int, key: Callable[[Any], Tuple[datetime, str]]):
+    """
+    Split a result fetched with LIMIT per_page + 1 into
+    (page_rows, next_cursor, has_more).
+    """
+    has_more = len(rows) > per_page
+    page = rows[:per_page]
+    next_cursor = encode_cursor(*key(page[-1])) if has_more and page else None
+    return page, next_cursor, has_more
+
+
+'''
+Totals are expensive (a full COUNT(*) per page), so list endpoints read them
+through a short-lived per-worker cache. A total may lag behind by at most
+COUNT_CACHE_TTL_SECONDS, which is fine for "page x of y" style UIs.
+'''
+_count_cache = TTLCache(maxsize=Config.COUNT_CACHE_MAX_ENTRIES, ttl=Config.COUNT_CACHE_TTL_SECONDS)
+
+
+def cached_count(key: Tuple, count_fn: Callable[[], int]) -> int:
+    total = _count_cache.get(key)
+    if total is None:
+        total = count_fn()
+        _count_cache.set(key, total)
+    return total
+
+
+async def cached_count_async(key: Tuple, count_fn: Callable[[], Awaitable[int]]) -> int:
+    total = _count_cache.get(key)
+    if total is None:
+        total = await count_fn()
+        _count_cache.set(key, total)
+    return total
+
+
+def is_truthy(value: str) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
@@ -0,0 +1,193 @@
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+'''
+Query plan checks.
+
+capture_statements() records the SQL (with its parameters) an engine runs
+inside a block; QueryPlanChecker.check() runs EXPLAIN on one of those
+statements and reports what would get slow as the tables grow:
+
+- scan: a watched table is read in full (SQLite `SCAN t`, MySQL type ALL),
+  or a join reads more than `min_rows` of its rows through index lookups
+  because the outer side of the loop is a scan (e.g. scan users, look up
+  each user's like). Walking an index in order (`SCAN t USING INDEX`,
+  MySQL type index) counts as a scan too, unless the statement has a
+  LIMIT and the index order is the one asked for (no temp sort at that
+  level): then it stops after the page
+- temp sort: more than `min_rows` rows are sorted or grouped in a temporary
+  structure (SQLite `USE TEMP B-TREE`, MySQL `Using temporary` / `Using
+  filesort`)
+- pattern scan: LIKE with a leading wildcard on a watched table. No index
+  can serve it, even when the plan walks an index for the ORDER BY
+
+Row counts are estimates: MySQL gives them per plan row. SQLite plans have
+none, so they come from the table sizes and, for index lookups, from
+sqlite_stat1 (the checker runs ANALYZE) for the equality prefix used.
+Rows read through a join are the product along the nested loop.
+
+Used by benchmarks/check_query_plans.py against a seeded database.
+'''
+
+WATCHED_TABLES = ("posts", "comments", "likes", "token_blacklist")
+
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+_ALIAS = re.compile(r"\b(?:FROM|JOIN|UPDATE|INTO)\s+`?(\w+)`?\s+AS\s+`?(\w+)`?", re.IGNORECASE)
+_LIMIT = re.compile(r"\bLIMIT\b", re.IGNORECASE)
+_LIKE_COLUMN = re.compile(r"`?(\w+)`?\.`?\w+`?\)?\s+LIKE\b", re.IGNORECASE)
+_SQLITE_ACCESS = re.compile(
+    r"^(SCAN|SEARCH) (\w+)(?: USING (?:COVERING )?INDEX (\w+)| USING (?:INTEGER )?(PRIMARY KEY))?(?: \((.*)\))?"
+)
+
+
+@dataclass(frozen=True, slots=True)
+class PlanIssue:
+    table: str
+    kind: str                   # "scan" | "temp sort" | "pattern scan"
+    rows: int                   # estimated rows read (scan) or sorted (temp sort)
+    detail: str                 # the plan line(s) behind it
+    statement: str
+
+
+@contextmanager
+def capture_statements(engine: Engine) -> Iterator[List[Tuple[str, object]]]:
+    """(statement, parameters) for everything `engine` executes inside the block (first row of an executemany)."""
+    captured: List[Tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        # insertmanyvalues batches arrive flagged executemany with ONE flat parameter tuple
+        if executemany and parameters and isinstance(parameters[0], (tuple, list, dict)):
+            parameters = parameters[0]
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _leading_wildcard(parameters) -> bool:
+    values = parameters.values() if isinstance(parameters, dict) else (parameters or ())
+    return any(isinstance(value, str) and value.startswith("%") for value in values)
+
+
+class QueryPlanChecker:
+    def __init__(self, conn: Connection, min_rows: int, tables: Sequence[str] = WATCHED_TABLES) -> None:
+        self.conn = conn
+        self.dialect = conn.dialect.name
+        self.min_rows = min_rows
+        self.tables = tuple(tables)
+        self.table_rows = {
+            table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in inspect(conn).get_table_names()
+        }
+        self.index_stats: Dict[str, List[int]] = {}
+        if self.dialect == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+            for index, stat in conn.exec_driver_sql("SELECT idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL"):
+                self.index_stats[index] = [int(n) for n in stat.split() if n.isdigit()]
+
+    def _names(self, statement: str) -> Dict[str, str]:
+        """name as it appears in the plan -> table"""
+        names = {table: table for table in self.table_rows}
+        for table, alias in _ALIAS.findall(statement):
+            if table in self.table_rows:
+                names[alias] = table
+        return names
+
+    def check(self, statement: str, parameters=None) -> List[PlanIssue]:
+        """Issues in the plan of one captured statement (nothing for statements EXPLAIN does not take)."""
+        if not _EXPLAINABLE.match(statement):
+            return []
+        names = self._names(statement)
+        limited = bool(_LIMIT.search(statement))
+        if self.dialect == "sqlite":
+            issues = self._check_sqlite(statement, parameters, names, limited)
+        elif self.dialect == "mysql":
+            issues = self._check_mysql(statement, parameters, names, limited)
+        else:
+            raise NotImplementedError(f"No EXPLAIN support for {self.dialect}")
+
+        if _leading_wildcard(parameters):
+            for table in {names[name] for name in _LIKE_COLUMN.findall(statement) if name in names}:
+                if table in self.tables and self.table_rows[table] > self.min_rows:
+                    issues.append(PlanIssue(table, "pattern scan", self.table_rows[table],
+                                            "LIKE '%...' (leading wildcard)", statement))
+        return issues
+
+    def _lookup_rows(self, table: str, index: Optional[str], terms: Optional[str], primary_key: bool) -> int:
+        """Rows one SQLite SEARCH reads: sqlite_stat1 average for its equality prefix, else the table size."""
+        if primary_key:
+            return 1
+        stats = self.index_stats.get(index or "")
+        if not stats or not terms:
+            return self.table_rows[table]
+        equalities = sum(1 for term in terms.split(" AND ") if re.search(r"(?<![<>!])=", term))
+        return stats[min(equalities, len(stats) - 1)]
+
+    def _check_sqlite(self, statement, parameters, names, limited) -> List[PlanIssue]:
+        plan = self.conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters or ()).all()
+        issues = []
+        # A LIMIT only cuts an index walk short when no temp B-tree re-sorts what it reads
+        sorted_levels = {parent for _, parent, _, detail in plan if detail.startswith("USE TEMP B-TREE")}
+        # Per plan level (parent node): rows produced so far by its nested loop, and the accesses in it
+        loop_rows: Dict[int, int] = {}
+        reads: Dict[int, List[Tuple[Optional[str], str]]] = {}
+        for _, parent, _, detail in plan:
+            access = _SQLITE_ACCESS.match(detail)
+            if access:
+                kind, name, index, primary_key, terms = access.groups()
+                table = names.get(name)                 # None for subqueries and CTEs
+                outer = loop_rows.get(parent, 1)
+                if table is None:
+                    per_loop = 1
+                elif kind == "SCAN":
+                    per_loop = 1 if index and limited and parent not in sorted_levels else self.table_rows[table]
+                else:
+                    per_loop = self._lookup_rows(table, index, terms, bool(primary_key))
+                loop_rows[parent] = outer * per_loop
+                reads.setdefault(parent, []).append((table, detail))
+
+                if table in self.tables and loop_rows[parent] > self.min_rows:
+                    path = " -> ".join(line for _, line in reads[parent])
+                    issues.append(PlanIssue(table, "scan", loop_rows[parent], path, statement))
+            elif detail.startswith("USE TEMP B-TREE"):
+                watched = [table for table, _ in reads.get(parent, []) if table in self.tables]
+                if watched and loop_rows[parent] > self.min_rows:
+                    path = " -> ".join(line for _, line in reads[parent])
+                    issues.append(PlanIssue(watched[0], "temp sort", loop_rows[parent], f"{path}; {detail}", statement))
+        return issues
+
+    def _check_mysql(self, statement, parameters, names, limited) -> List[PlanIssue]:
+        plan = self.conn.exec_driver_sql("EXPLAIN " + statement, parameters or ()).mappings().all()
+        issues = []
+        loop_rows: Dict[int, float] = {}                # per SELECT id: rows produced so far by its join
+        sorts: Dict[int, Tuple[Optional[str], str]] = {}
+        for row in plan:
+            select_id = row.get("id") or 0
+            table = names.get(row.get("table") or "")
+            rows = int(row.get("rows") or 0)
+            extra = row.get("Extra") or ""
+            sorted_after = "Using temporary" in extra or "Using filesort" in extra
+            per_loop = 1 if row.get("type") == "index" and limited and not sorted_after else rows
+            outer = loop_rows.get(select_id, 1)
+            read = outer * per_loop
+            loop_rows[select_id] = read * float(row.get("filtered") or 100) / 100
+            detail = f"table={row.get('table')} type={row.get('type')} key={row.get('key')} rows={rows} extra={extra}"
+
+            if table in self.tables and read > self.min_rows:
+                issues.append(PlanIssue(table, "scan", int(read), detail, statement))
+            if sorted_after:
+                sorts[select_id] = (table, detail)
+
+        # MySQL marks the sort on the first table of the join, but it sorts the whole join output
+        for select_id, (table, detail) in sorts.items():
+            if table in self.tables and loop_rows[select_id] > self.min_rows:
+                issues.append(PlanIssue(table, "temp sort", int(loop_rows[select_id]), detail, statement))
+        return issues
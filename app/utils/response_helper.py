@@ -1,4 +1,9 @@
-from flask import jsonify, Response
+from typing import Any, Dict, Iterable, Iterator, Optional
+from flask import jsonify, Response, current_app, stream_with_context
+from app.config import Config
+
+STREAM_FAILED_MESSAGE = "Response interrupted, the data sent is incomplete"
+
 
 def api_response(success: bool, message: str, data = None, status_code=200) -> Response:
     """
@@ -9,4 +14,83 @@ def api_response(success: bool, message: str, data = None, status_code=200) -> R
         "message": message,
         "data": data 
     }), status_code
-    
\ No newline at end of file
+
+
+def _chunked(items: Iterable[Any], chunk_size: int) -> Iterator[list]:
+    """Lists of `chunk_size` items. Items read before an error are still handed out, then the error is raised."""
+    chunk = []
+    try:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    except Exception:
+        if chunk:
+            yield chunk
+        raise
+    if chunk:
+        yield chunk
+
+
+def api_stream_response(message: str, items: Iterable[Any], list_key: str, data: Optional[Dict] = None,
+                        status_code=200, chunk_size: Optional[int] = None) -> Response:
+    """
+    Same envelope as api_response, for large lists: `data[list_key]` is encoded
+    and sent `chunk_size` items at a time while `items` is being iterated, so
+    memory stays bounded when `items` is lazy (e.g. a query with yield_per).
+    Keys come out sorted, like jsonify: the other keys of `data` go before or
+    after the list, so the bytes (and ETags) match api_response for the same data.
+
+    The 200 is sent with the first chunk, so an error while iterating can no
+    longer change the status: the list is closed and the envelope ends with
+    `"error_code": true` and the error in `"error"`, instead of a truncated body.
+    """
+    encoder = current_app.json
+    chunk_size = chunk_size or Config.JSON_STREAM_CHUNK_SIZE
+    data = {key: value for key, value in (data or {}).items() if key != list_key}
+    keys = sorted([*data, list_key])
+    at = keys.index(list_key)
+    before = b''.join(encoder.dumps_bytes(key) + b':' + encoder.dumps_bytes(data[key]) + b',' for key in keys[:at])
+    after = b''.join(b',' + encoder.dumps_bytes(key) + b':' + encoder.dumps_bytes(data[key]) for key in keys[at + 1:])
+    
+    def generate() -> Iterator[bytes]:
+        yield b'{"data":{' + before + encoder.dumps_bytes(list_key) + b':['
+        separator = b''
+        try:
+            for chunk in _chunked(items, chunk_size):
+                yield separator + b','.join(encoder.dumps_bytes(item) for item in chunk)
+                separator = b','
+        except Exception as e:
+            current_app.logger.exception("Streamed response failed after it started")
+            yield (b']' + after + b'},"error":' + encoder.dumps_bytes(str(e))
+                   + b',"error_code":true,"message":' + encoder.dumps_bytes(STREAM_FAILED_MESSAGE) + b'}\n')
+            return
+        yield b']' + after + b'},"error_code":false,"message":' + encoder.dumps_bytes(message) + b'}\n'
+    
+    return Response(stream_with_context(generate()), status=status_code, mimetype=encoder.mimetype)
+
+
+def ndjson_stream_response(items: Iterable[Any], headers: Optional[Dict] = None,
+                           chunk_size: Optional[int] = None) -> Response:
+    """
+    One JSON document per line (application/x-ndjson), written `chunk_size`
+    items at a time while `items` is being iterated. For exports: the client
+    can process rows as they arrive and memory stays bounded on both sides.
+
+    An error while iterating ends the stream with one last line,
+    `{"error": true, "message": ...}`, so a client can tell a failed export
+    from a complete one.
+    """
+    encoder = current_app.json
+    chunk_size = chunk_size or Config.JSON_STREAM_CHUNK_SIZE
+
+    def generate() -> Iterator[bytes]:
+        try:
+            for chunk in _chunked(items, chunk_size):
+                yield b''.join(encoder.dumps_bytes(item) + b'\n' for item in chunk)
+        except Exception as e:
+            current_app.logger.exception("Streamed response failed after it started")
+            yield encoder.dumps_bytes({"error": True, "message": f"{STREAM_FAILED_MESSAGE}: {e}"}) + b'\n'
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson", headers=headers)
@@ -0,0 +1,152 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Tuple
+from flask import g, request, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import Config
+
+
+'''
+Per-request SQL instrumentation.
+
+Engine events (all engines, primary and replicas) record every statement run
+while a request is active: query count, total database time, the slowest
+statement and how often each statement *shape* repeats. A shape repeated
+N_PLUS_ONE_THRESHOLD times or more in one request is almost always a query
+in a loop (N+1).
+
+Each response gets `Server-Timing: db;dur=..;desc="N queries"` and
+`X-Query-Count` headers. Requests slower than SLOW_REQUEST_MS, or with N+1
+suspects, are logged with the details.
+
+count_queries()/assert_max_queries() give the same numbers to tests:
+
+    with assert_max_queries(5):
+        client.get("/api/v1/post/get_all_posts", headers=auth)
+'''
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest: Tuple[float, str] = (0.0, "")
+        self.shapes: Counter = Counter()
+        self.statements: List[str] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.slowest[0]:
+            self.slowest = (seconds, statement)
+        self.shapes[statement_shape(statement)] += 1
+        self.statements.append(statement)
+
+    def repeated(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes run at least `threshold` times: N+1 suspects."""
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    @property
+    def total_ms(self) -> float:
+        return self.total_seconds * 1000
+
+
+# Every collector active in this context: the request's own, plus any count_queries() around it
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar("sql_query_stats", default=())
+
+_IN_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with parameter lists and literals collapsed, so loop iterations look alike."""
+    shape = _IN_LIST.sub("(?)", statement)
+    shape = _LITERAL.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _active.get():
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    collectors = _active.get()
+    starts = conn.info.get("query_start")
+    if not collectors or not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, seconds)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Collect the statements run inside the block, including any requests made in it."""
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(stats.statements))
+        raise AssertionError(f"Expected at most {limit} queries, got {stats.count}:\n{listing}")
+
+
+def _start_request() -> None:
+    g.sql_stats = QueryStats()
+    g.sql_stats_token = _active.set(_active.get() + (g.sql_stats,))
+    g.request_started = time.perf_counter()
+
+
+def _report(response):
+    stats: QueryStats = g.get("sql_stats")
+    if stats is None:
+        return response
+
+    elapsed_ms = (time.perf_counter() - g.request_started) * 1000
+    if Config.SQL_TIMING_HEADERS:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", app;dur={elapsed_ms:.1f}'
+        )
+        response.headers["X-Query-Count"] = str(stats.count)
+
+    repeated = stats.repeated(Config.N_PLUS_ONE_THRESHOLD)
+    if elapsed_ms >= Config.SLOW_REQUEST_MS or repeated:
+        slowest_ms, slowest = stats.slowest
+        current_app.logger.warning(
+            "%s %s took %.1fms: %d queries, %.1fms in the database, slowest %.1fms: %s%s",
+            request.method, request.path, elapsed_ms, stats.count, stats.total_ms, slowest_ms * 1000,
+            _SPACE.sub(" ", slowest)[:500],
+            "".join(f"\n  possible N+1 ({n}x): {shape[:300]}" for shape, n in repeated.items())
+        )
+    return response
+
+
+def _end_request(exc=None) -> None:
+    token = g.pop("sql_stats_token", None)
+    if token is not None:
+        _active.reset(token)
+
+
+def init_sql_instrumentation(app) -> None:
+    if not Config.SQL_INSTRUMENTATION:
+        return
+    app.before_request(_start_request)
+    app.after_request(_report)
+    app.teardown_request(_end_request)
@@ -0,0 +1,13 @@
+from datetime import datetime, timezone
+
+
+def to_iso_utc(value: datetime):
+    """
+    Format a datetime as ISO-8601 in UTC ("...Z"), same output as UTCDateTime.
+    Naive values coming back from the database are treated as UTC.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
@@ -1,46 +1,92 @@
 from flask import request, jsonify, g
-from sqlalchemy.orm import Query
 from functools import wraps
-from app.database.db import SessionLocal
-from .jwt_helper import decode_token
-from app.models.user_model import User
-from typing import Dict
-from app.models.token_blacklist_model import TokenBlacklist
+from .jwt_helper import get_token_id
+import inspect
+from typing import Any, Dict, Optional, Tuple
+from app.services.revocation_filter import revocation_filter
+from app.services.auth_cache import get_verified_claims, get_user_snapshot, get_user_snapshot_async
 from app.utils.response_helper import api_response
+from app.utils.metrics import AUTH_SECONDS
 
 
 def token_required(f):
+    # Async views (app/asgi.py) get a coroutine, whose database reads go through the async engine
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_async(*args, **kwargs):
+            with AUTH_SECONDS.time():
+                failure = await authenticate_async()
+            if failure is not None:
+                return failure
+            return await f(*args, **kwargs)
+        return decorated_async
+
     @wraps(f)
     def decorated(*args, **kwargs):
-        token: Dict = request.headers.get("Authorization")
-        if not token:
-            return jsonify({"error_code": True, "message": "Token is missing!"}), 401
-        
-        token: str = token.split(" ")[1] if " " in token else token
-        
-        # create a session
-        session = SessionLocal()
-        try:
-            blacklisted = session.query(TokenBlacklist).filter_by(token=token).first()
-            if blacklisted:
-                return api_response(True, "Token has been blacklisted!", [], 401)
-            
-            payload: Dict = decode_token(token)
-            if not payload or payload.get("type") != "access":
-                return jsonify({"error_code": True, "message": "Invalid or expired token!"}), 401
-            
-            user_id = payload.get("user_id")
-            if not user_id:
-                return api_response(True, "Invalid token payload!", [], 400)
-            
-            user: Query = session.query(User).filter_by(id=user_id).first()
-            if not user:
-                return api_response(True, "User not found", [], 404)
-                    
-            g.current_user = user
-            
-        finally:
-            session.close()
-            
+        with AUTH_SECONDS.time():
+            failure = authenticate()
+        if failure is not None:
+            return failure
         return f(*args, **kwargs)
     return decorated
+
+
+def _verified_claims() -> Tuple[Optional[Dict], Optional[str], Any]:
+    """(payload, token id, None) for a valid access token in the Authorization header, else (None, None, error response)."""
+    token: Dict = request.headers.get("Authorization")
+    if not token:
+        return None, None, (jsonify({"error_code": True, "message": "Token is missing!"}), 401)
+    
+    token: str = token.split(" ")[1] if " " in token else token
+    
+    # Verified claims are cached until the token expires (no signature check on a warm token)
+    payload: Dict = get_verified_claims(token)
+    if not payload or payload.get("type") != "access":
+        return None, None, (jsonify({"error_code": True, "message": "Invalid or expired token!"}), 401)
+    return payload, get_token_id(token, payload), None
+
+
+def _accept(payload: Dict, user):
+    if not user:
+        return api_response(True, "User not found", [], 404)
+    
+    # "Logout everywhere" bumps the user's token_version, older tokens stop matching
+    if payload.get("ver", 0) != user.token_version:
+        return api_response(True, "Token has been revoked!", [], 401)
+            
+    g.current_user = user
+    return None
+
+
+def authenticate():
+    """Set g.current_user from the Authorization header, or return the error response."""
+    payload, token_id, failure = _verified_claims()
+    if failure is not None:
+        return failure
+    
+    # In-memory filter first, the blacklist table is only read on a filter hit
+    if revocation_filter.is_revoked(token_id):
+        return api_response(True, "Token has been blacklisted!", [], 401)
+    
+    user_id = payload.get("user_id")
+    if not user_id:
+        return api_response(True, "Invalid token payload!", [], 400)
+    
+    # Detached snapshot from the per-worker user cache (no session on a warm token)
+    return _accept(payload, get_user_snapshot(user_id))
+
+
+async def authenticate_async():
+    """authenticate() for async views: same checks, the database reads are awaited."""
+    payload, token_id, failure = _verified_claims()
+    if failure is not None:
+        return failure
+    
+    if await revocation_filter.is_revoked_async(token_id):
+        return api_response(True, "Token has been blacklisted!", [], 401)
+    
+    user_id = payload.get("user_id")
+    if not user_id:
+        return api_response(True, "Invalid token payload!", [], 400)
+    
+    return _accept(payload, await get_user_snapshot_async(user_id))
@@ -0,0 +1,69 @@
+from flask import g, request
+from functools import wraps
+from itsdangerous import BadSignature, TimestampSigner
+from app.config import Config
+from app.database.db import read_from_replica, recent_writers, replica_engines
+from app.utils.jwt_helper import SECRET_KEY
+
+
+'''
+Read-your-writes across workers: a request that committed a write as a user
+answers with a `db_wrote_at` cookie, the user id signed with a timestamp. For
+DB_STICKY_SECONDS, any worker that receives it sends that user's
+@use_replica reads to the primary. Clients that drop cookies still get the
+per-worker guarantee (recent_writers), i.e. only when their next request
+lands on the same worker.
+'''
+
+STICKY_COOKIE = "db_wrote_at"
+_signer = None                              # set by init_read_your_writes
+
+
+def _wrote_recently(user_id: str) -> bool:
+    cookie = request.cookies.get(STICKY_COOKIE)
+    if not cookie:
+        return False
+    try:
+        return _signer.unsign(cookie, max_age=Config.DB_STICKY_SECONDS).decode("utf-8") == user_id
+    except BadSignature:                    # tampered, or older than DB_STICKY_SECONDS
+        return False
+
+
+def _set_sticky_cookie(response):
+    user = getattr(g, "current_user", None)
+    if g.pop("db_wrote", False) and user is not None:
+        response.set_cookie(
+            STICKY_COOKIE, _signer.sign(user.id).decode("utf-8"),
+            max_age=max(int(Config.DB_STICKY_SECONDS), 1), httponly=True, samesite="Lax"
+        )
+    return response
+
+
+def init_read_your_writes(app) -> None:
+    global _signer
+    if not SECRET_KEY:
+        # An empty key would let anyone forge the cookie (and the JWTs)
+        raise ValueError("SECRET_KEY is not set to the .env file!")
+    _signer = TimestampSigner(SECRET_KEY, salt="db-sticky")
+    app.after_request(_set_sticky_cookie)
+
+
+def use_replica(f):
+    """
+    Run a read-only handler against a read replica (when DATABASE_REPLICA_URLS
+    is set). Put it below @token_required: a user who committed a write in the
+    last DB_STICKY_SECONDS keeps reading from the primary, so they always see
+    their own writes.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        user = getattr(g, "current_user", None)
+        if not replica_engines or (user is not None and (recent_writers.get(user.id) or _wrote_recently(user.id))):
+            return f(*args, **kwargs)
+        
+        token = read_from_replica.set(True)
+        try:
+            return f(*args, **kwargs)
+        finally:
+            read_from_replica.reset(token)
+    return decorated
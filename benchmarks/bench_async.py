@@ -0,0 +1,106 @@
+"""
+Sync vs async views on the routes that have an async twin (app/routes/async_views.py).
+
+    python benchmarks/bench_async.py --scale 10k [--clients 8] [--requests 200]
+
+    # on MySQL the overlapped queries actually run side by side
+    python benchmarks/bench_async.py --database-url mysql+pymysql://... --seed-database
+
+Two apps run in-process on the same seeded data, as in bench_endpoints.py:
+one with the sync views (app/main.py), one with install_async_views() (what
+app/asgi.py serves). Each route is first requested once through both, and
+the status, body and ETag must match; then both are timed with the same
+clients and the results are printed side by side.
+"""
+import argparse
+import json
+import sys
+
+from bench_endpoints import Worker, load_fixtures, prepare_database, run_scenario, seed_database, _comments_by_post, _feed, _feed_cursor
+
+
+def _feed_search(w: Worker):
+    return "GET", "/api/v1/post/get_all_posts?search=post+1&per_page=10", {"headers": w.auth()}
+
+
+def _comments_cursor(w: Worker):
+    return "GET", f"/api/v1/comments/get_by_post/{w.rng.choice(w.fixtures['commented_posts'])}?cursor=", {"headers": w.auth()}
+
+
+ROUTES = [
+    ("post.get_all_posts", _feed),
+    ("post.get_all_posts_cursor", _feed_cursor),
+    ("post.search", _feed_search),
+    ("comment.get_by_post", _comments_by_post),
+    ("comment.get_by_post_cursor", _comments_cursor),
+]
+
+
+def same_response(sync: Worker, async_: Worker, build) -> bool:
+    """One request through each app (same worker seed, so the same URL): do the responses match?"""
+    responses = []
+    for worker in (sync, async_):
+        method, url, options = build(worker)
+        response = worker.client.open(url, method=method, **options)
+        responses.append((response.status_code, json.loads(response.get_data()), response.headers.get("ETag")))
+    return responses[0] == responses[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=["10k", "1m", "10m"], default="10k")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route and mode")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--routes", help="comma separated route names (default: all)")
+    parser.add_argument("--database-url", help="benchmark this database instead of a seeded SQLite file")
+    parser.add_argument("--seed-database", dest="seed_db", action="store_true", help="(re)seed --database-url first")
+    args = parser.parse_args()
+
+    url = prepare_database(args)
+    if args.database_url and args.seed_db:
+        seed_database(url, args)
+
+    import logging
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    from app import create_app
+    from app.database.db import SessionLocal
+    from app.routes.async_views import install_async_views
+
+    sync_app = create_app()
+    async_app = create_app()
+    install_async_views(async_app)
+
+    session = SessionLocal()
+    fixtures = load_fixtures(session)
+    session.close()
+    if len(fixtures["users"]) < args.clients:
+        raise SystemExit(f"need at least {args.clients} seeded users, found {len(fixtures['users'])}")
+    workers = {
+        mode: [Worker(app, i, fixtures["users"][i], fixtures, args.seed) for i in range(args.clients)]
+        for mode, app in (("sync", sync_app), ("async", async_app))
+    }
+
+    selected = set(args.routes.split(",")) if args.routes else None
+    mismatches = []
+    print(f"{url.split(':', 1)[0]}, {args.clients} clients, {args.requests} requests per route and mode\n")
+    print(f"{'route':<28}{'mode':<7}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}  statuses")
+    for name, build in ROUTES:
+        if selected and name not in selected:
+            continue
+        if not same_response(workers["sync"][0], workers["async"][0], build):
+            mismatches.append(name)
+        for mode in ("sync", "async"):
+            result = run_scenario(workers[mode], build, args.requests, args.warmup)
+            print(f"{name if mode == 'sync' else '':<28}{mode:<7}{result['throughput_rps']:>9.0f}{result['p50_ms']:>9.2f}"
+                  f"{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['queries_per_request']:>9.1f}  {result['statuses']}")
+
+    if mismatches:
+        print("\nasync responses differ from sync:\n  " + "\n  ".join(mismatches))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
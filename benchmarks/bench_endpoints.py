@@ -0,0 +1,472 @@
+"""
+Endpoint benchmarks against a seeded database.
+
+    # run every auth/post/comment/like route at the 10k scale, save a baseline
+    python benchmarks/bench_endpoints.py --scale 10k --output benchmarks/results/baseline.json
+
+    # run again and flag regressions against that baseline (exit code 1 if any)
+    python benchmarks/bench_endpoints.py --scale 10k --compare benchmarks/results/baseline.json
+
+    # only compare two result files
+    python benchmarks/bench_endpoints.py --compare old.json new.json
+
+The app runs in-process (Flask test client, one per concurrent client), so
+the numbers cover routing, auth, queries and serialization without network
+noise. With the default SQLite backend each scale is seeded once into
+benchmarks/.data/ and copied before every run, so runs always start from
+the same data. --database-url points the suite at another database
+(e.g. MySQL); add --seed-database to (re)build it.
+
+For each route: throughput, p50/p95/p99 latency, queries per request
+(from the X-Query-Count header, see app/utils/sql_instrumentation.py) and
+status codes.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+sys.path.insert(0, ROOT)
+
+PASSWORD = "benchpass1"             # every seeded user logs in with this
+
+
+# -- comparison ---------------------------------------------------------------
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Regressions of `current` against `baseline`, one line each."""
+    regressions = []
+    print(f"\n{'route':<24}{'rps':>18}{'p95 ms':>20}{'queries':>16}")
+    for name, new in current["routes"].items():
+        old = baseline["routes"].get(name)
+        if old is None:
+            continue
+        flags = []
+        if new["throughput_rps"] < old["throughput_rps"] * (1 - threshold):
+            flags.append("throughput")
+        if new["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            flags.append("p95")
+        if new["queries_per_request"] > old["queries_per_request"] + 0.5:
+            flags.append("queries")
+        if new["errors"] > old["errors"]:
+            flags.append("errors")
+        print(f"{name:<24}{old['throughput_rps']:>8.0f} -> {new['throughput_rps']:<7.0f}"
+              f"{old['p95_ms']:>9.2f} -> {new['p95_ms']:<8.2f}"
+              f"{old['queries_per_request']:>6.1f} -> {new['queries_per_request']:<6.1f}"
+              f"{'  REGRESSION: ' + ', '.join(flags) if flags else ''}")
+        if flags:
+            regressions.append(f"{name}: {', '.join(flags)}")
+    return regressions
+
+
+# -- environment --------------------------------------------------------------
+
+def prepare_database(args) -> str:
+    """Return the URL the app should use, seeding/copying as needed. Must run before importing app."""
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret")
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["EMAIL_OUTBOX_WORKERS"] = "0"
+    os.environ["TOKEN_PURGE_INTERVAL_SECONDS"] = "0"
+    os.environ["SLOW_REQUEST_MS"] = "1e9"
+    os.environ["N_PLUS_ONE_THRESHOLD"] = "1000000"
+    os.environ["DB_POOL_SIZE"] = str(max(args.clients + 2, 5))
+    os.environ.setdefault("DB_ECHO", "false")
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        return args.database_url
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    pristine = os.path.join(DATA_DIR, f"{args.scale}-seed{args.seed}-{schema_fingerprint()}.db")
+    working = os.path.join(DATA_DIR, "run.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{working}"
+    if not os.path.exists(pristine):
+        seed_database(f"sqlite:///{pristine}", args)
+    shutil.copyfile(pristine, working)
+    return os.environ["DATABASE_URL"]
+
+
+def schema_fingerprint() -> str:
+    """Changes whenever a model or migration changes, so a stale seeded copy is never reused."""
+    digest = hashlib.sha1()
+    for pattern in ("app/models/*.py", "migrations/*.py"):
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern))):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:8]
+
+
+def seed_database(url: str, args) -> None:
+    from sqlalchemy import MetaData, create_engine
+    from app.database.migrations import upgrade
+    from app.services.seeder import SCALES, seed_data
+
+    engine = create_engine(url)
+    existing = MetaData()
+    existing.reflect(engine)                # every table, schema_migrations included
+    existing.drop_all(engine)
+    upgrade(engine, echo=lambda line: None)
+    stats = seed_data(engine, **SCALES[args.scale], seed=args.seed, password=PASSWORD,
+                      bcrypt_rounds=args.bcrypt_rounds)
+    engine.dispose()
+    print(f"seeded {args.scale} in {stats['elapsed_seconds']:.1f}s: {stats['rows']}")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+# -- scenarios ----------------------------------------------------------------
+
+class Worker:
+    """One concurrent client: its own test client and its own user, so auth routes never collide."""
+
+    def __init__(self, app, index: int, user: Tuple[str, str], fixtures: Dict, seed: int) -> None:
+        from app.utils.jwt_helper import create_access_token, create_refresh_token
+        self._access, self._refresh = create_access_token, create_refresh_token
+        self.client = app.test_client()
+        self.index = index
+        self.user_id, self.email = user
+        self.fixtures = fixtures
+        self.rng = random.Random(seed * 1000 + index)
+        self.version = 0
+        self.counter = 0
+        self.created_posts: List[str] = []
+        self.created_comments: List[str] = []
+        self.etags: Dict[str, str] = {}
+
+    def tokens(self) -> Tuple[str, str]:
+        claims = {"user_id": self.user_id, "email": self.email}
+        return self._access(claims, self.version), self._refresh(claims, self.version)
+
+    def auth(self) -> Dict:
+        return {"Authorization": f"Bearer {self.tokens()[0]}"}
+
+    def unique(self) -> str:
+        self.counter += 1
+        return f"w{self.index}n{self.counter}{uuid.uuid4().hex[:8]}"
+
+    def post_id(self) -> str:
+        return self.rng.choice(self.fixtures["hot_posts"])
+
+    def own_post(self) -> str:
+        if not self.created_posts:
+            response = self.client.post("/api/v1/post/upload", json={"title": "setup", "content": "setup"}, headers=self.auth())
+            self.created_posts.append(response.get_json()["data"]["id"])
+        return self.created_posts[-1]
+
+    def etag(self, url: str) -> str:
+        if url not in self.etags:
+            self.etags[url] = self.client.get(url, headers=self.auth()).headers.get("ETag", "")
+        return self.etags[url]
+
+    def own_comment(self) -> str:
+        if not self.created_comments:
+            response = self.client.post("/api/v1/comments/add", json={"post_id": self.post_id(), "content": "setup"},
+                                        headers=self.auth())
+            self.created_comments.append(response.get_json()["data"]["id"])
+        return self.created_comments[-1]
+
+
+def _register(w: Worker):
+    name = "b" + w.unique()
+    return "POST", "/api/v1/auth/register", {"json": {"username": name, "email": f"{name}@bench.local",
+                                                      "password": PASSWORD}}
+
+
+def _login(w: Worker):
+    return "POST", "/api/v1/auth/login", {"json": {"email": w.email, "password": PASSWORD}}
+
+
+def _refresh(w: Worker):
+    return "POST", "/api/v1/auth/refresh", {"json": {"refresh_token": w.tokens()[1]}}
+
+
+def _logout(w: Worker):
+    access, refresh = w.tokens()
+    return "POST", "/api/v1/auth/logout", {"json": {"refresh_token": refresh},
+                                           "headers": {"Authorization": f"Bearer {access}"}}
+
+
+def _logout_all(w: Worker):
+    headers = w.auth()
+    w.version += 1                              # the route bumps token_version, later tokens must match
+    return "POST", "/api/v1/auth/logout_all", {"headers": headers}
+
+
+def _upload(w: Worker):
+    return "POST", "/api/v1/post/upload", {"json": {"title": "bench " + w.unique(), "content": "benchmark content"},
+                                           "headers": w.auth(), "keep": w.created_posts}
+
+
+def _update_post(w: Worker):
+    return "PUT", f"/api/v1/post/update/{w.own_post()}", {"json": {"title": "updated " + w.unique()}, "headers": w.auth()}
+
+
+def _delete_post(w: Worker):
+    post_id = w.own_post()
+    w.created_posts.remove(post_id)
+    return "DELETE", f"/api/v1/post/delete/{post_id}", {"headers": w.auth()}
+
+
+def _feed(w: Worker):
+    return "GET", f"/api/v1/post/get_all_posts?page={w.rng.randint(1, 5)}&per_page=10", {"headers": w.auth()}
+
+
+def _feed_cursor(w: Worker):
+    return "GET", "/api/v1/post/get_all_posts?cursor=&per_page=10", {"headers": w.auth()}
+
+
+def _post_by_id(w: Worker):
+    return "GET", f"/api/v1/post/get_post_byId/{w.post_id()}", {"headers": w.auth()}
+
+
+def _feed_revalidate(w: Worker):
+    url = "/api/v1/post/get_all_posts?page=1&per_page=10"
+    return "GET", url, {"headers": {**w.auth(), "If-None-Match": w.etag(url)}}
+
+
+def _post_stats(w: Worker):
+    post_ids = w.rng.sample(w.fixtures["hot_posts"], min(50, len(w.fixtures["hot_posts"])))
+    return "POST", "/api/v1/post/stats", {"json": {"post_ids": post_ids}, "headers": w.auth()}
+
+
+def _add_comment(w: Worker):
+    body = {"post_id": w.post_id(), "content": "bench " + w.unique()}
+    if w.rng.random() < 0.3:
+        body["parent_id"], body["post_id"] = w.rng.choice(w.fixtures["threads"])
+    return "POST", "/api/v1/comments/add", {"json": body, "headers": w.auth(), "keep": w.created_comments}
+
+
+def _comments_by_post(w: Worker):
+    return "GET", f"/api/v1/comments/get_by_post/{w.rng.choice(w.fixtures['commented_posts'])}", {"headers": w.auth()}
+
+
+def _replies(w: Worker):
+    return "GET", f"/api/v1/comments/replies/{w.rng.choice(w.fixtures['threads'])[0]}", {"headers": w.auth()}
+
+
+def _comments_by_user(w: Worker):
+    return "GET", f"/api/v1/comments/get_by_user/{w.user_id}", {"headers": w.auth()}      # own comments only
+
+
+def _update_comment(w: Worker):
+    return "PUT", f"/api/v1/comments/update/{w.own_comment()}", {"json": {"content": "edited " + w.unique()},
+                                                                  "headers": w.auth()}
+
+
+def _delete_comment(w: Worker):
+    comment_id = w.own_comment()
+    w.created_comments.remove(comment_id)
+    return "DELETE", f"/api/v1/comments/delete/{comment_id}", {"headers": w.auth()}
+
+
+def _toggle_like(w: Worker):
+    return "POST", f"/api/v1/like/toggle_like/{w.post_id()}", {"headers": w.auth()}
+
+
+def _like_count(w: Worker):
+    return "GET", f"/api/v1/like/count/{w.post_id()}", {"headers": w.auth()}
+
+
+def _is_liked(w: Worker):
+    return "GET", f"/api/v1/like/is_liked/{w.post_id()}", {"headers": w.auth()}
+
+
+def _likers(w: Worker):
+    return "GET", f"/api/v1/like/list_of_users_liked_to_a_post/{w.post_id()}", {"headers": w.auth()}
+
+
+def _likers_page(w: Worker):
+    return "GET", f"/api/v1/like/list_of_users_liked_to_a_post/{w.post_id()}?cursor=&per_page=20", {"headers": w.auth()}
+
+
+# Order matters: creating routes run before the routes that update/delete what they created
+SCENARIOS: List[Tuple[str, Callable]] = [
+    ("auth.register", _register),
+    ("auth.login", _login),
+    ("auth.refresh", _refresh),
+    ("auth.logout", _logout),
+    ("auth.logout_all", _logout_all),
+    ("post.upload", _upload),
+    ("post.update", _update_post),
+    ("post.get_all_posts", _feed),
+    ("post.get_all_posts_cursor", _feed_cursor),
+    ("post.get_all_posts_304", _feed_revalidate),
+    ("post.get_post_byId", _post_by_id),
+    ("post.stats", _post_stats),
+    ("post.delete", _delete_post),
+    ("comment.add", _add_comment),
+    ("comment.get_by_post", _comments_by_post),
+    ("comment.replies", _replies),
+    ("comment.get_by_user", _comments_by_user),
+    ("comment.update", _update_comment),
+    ("comment.delete", _delete_comment),
+    ("like.toggle_like", _toggle_like),
+    ("like.count", _like_count),
+    ("like.is_liked", _is_liked),
+    ("like.likers", _likers),
+    ("like.likers_page", _likers_page),
+]
+
+
+def load_fixtures(session) -> Dict:
+    from sqlalchemy import select, desc
+    from app.models.user_model import User
+    from app.models.post_model import Post
+    from app.models.comment_model import Comment
+
+    def column(stmt):
+        return list(session.execute(stmt).scalars())
+    return {
+        "users": [tuple(row) for row in session.execute(select(User.id, User.email).order_by(User.username).limit(256))],
+        "hot_posts": column(select(Post.id).order_by(desc(Post.like_count), Post.id).limit(100)),
+        "commented_posts": column(select(Post.id).order_by(desc(Post.comment_count), Post.id).limit(100)),
+        "threads": [tuple(row) for row in session.execute(
+            select(Comment.id, Comment.post_id).where(Comment.reply_count > 0)
+            .order_by(desc(Comment.reply_count), Comment.id).limit(100))],
+    }
+
+
+def run_scenario(workers: List[Worker], build: Callable, requests: int, warmup: int) -> Dict:
+    def call(worker: Worker):
+        method, url, options = build(worker)
+        keep = options.pop("keep", None)
+        started = time.perf_counter()
+        response = worker.client.open(url, method=method, **options)
+        response.get_data()                                 # drain streamed bodies too
+        elapsed = time.perf_counter() - started
+        if keep is not None and response.status_code < 300:
+            keep.append(response.get_json()["data"]["id"])
+        return elapsed, response.status_code, int(response.headers.get("X-Query-Count", 0))
+
+    for _ in range(warmup):
+        call(workers[0])
+
+    per_worker = [requests // len(workers) + (1 if i < requests % len(workers) else 0) for i in range(len(workers))]
+    lock = threading.Lock()
+    samples: List[Tuple[float, int, int]] = []
+
+    def drive(worker: Worker, count: int) -> None:
+        local = [call(worker) for _ in range(count)]
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+        list(pool.map(drive, workers, per_worker))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    statuses: Dict[str, int] = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "throughput_rps": len(samples) / wall if wall else 0.0,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "queries_per_request": statistics.fmean(s[2] for s in samples),
+        "errors": sum(1 for s in samples if s[1] >= 500),
+        "statuses": statuses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=["10k", "1m", "10m"], default="10k")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--routes", help="comma separated route names (default: all)")
+    parser.add_argument("--database-url", help="benchmark this database instead of a seeded SQLite file")
+    parser.add_argument("--seed-database", dest="seed_db", action="store_true", help="(re)seed --database-url first")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="baseline (and optionally a second result file)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            regressions = compare(json.load(old), json.load(new), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    url = prepare_database(args)
+    if args.database_url and args.seed_db:
+        seed_database(url, args)
+
+    import logging
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    from app import create_app
+    from app.database.db import SessionLocal
+
+    app = create_app()
+    session = SessionLocal()
+    fixtures = load_fixtures(session)
+    session.close()
+    if len(fixtures["users"]) < args.clients:
+        raise SystemExit(f"need at least {args.clients} seeded users, found {len(fixtures['users'])}")
+    workers = [Worker(app, i, fixtures["users"][i], fixtures, args.seed) for i in range(args.clients)]
+
+    selected = set(args.routes.split(",")) if args.routes else None
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "scale": args.scale if not args.database_url else "custom",
+            "backend": url.split(":", 1)[0],
+            "clients": args.clients,
+            "requests_per_route": args.requests,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "python": platform.python_version(),
+        },
+        "routes": {},
+    }
+
+    print(f"{'route':<28}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}  statuses")
+    for name, build in SCENARIOS:
+        if selected and name not in selected:
+            continue
+        result = run_scenario(workers, build, args.requests, args.warmup)
+        results["routes"][name] = result
+        print(f"{name:<28}{result['throughput_rps']:>9.0f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{result['queries_per_request']:>9.1f}  {result['statuses']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nwrote {args.output}")
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        if regressions:
+            print("\nregressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Marshmallow schemas vs. the precompiled serializers in app/schemas/compiled.py.
+
+    python benchmarks/bench_serializers.py [--objects 2000] [--repeat 5]
+
+Checks that both produce byte-identical JSON for every object, then prints
+the time per object for each schema.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.schemas.compiled import comment_schema, post_schema, user_schema
+from app.schemas.comment_schema import CommentSchema
+from app.schemas.post_schema import PostSchema
+from app.schemas.user_schema import UserSchema
+
+
+def make_objects(n: int):
+    now = datetime.now(timezone.utc)
+    users = [SimpleNamespace(id=str(uuid.uuid4()), username=f"user{i}", email=f"user{i}@example.com",
+                             created_at=(now - timedelta(days=i)).replace(tzinfo=None)) for i in range(50)]
+    posts, comments = [], []
+    for i in range(n):
+        user = users[i % len(users)]
+        posts.append(SimpleNamespace(id=str(uuid.uuid4()), title=f"title {i}", content="lorem ipsum " * 20,
+                                     user_id=user.id, created_at=now - timedelta(minutes=i)))
+        replies = [
+            SimpleNamespace(id=str(uuid.uuid4()), post_id=posts[-1].id, user_id=users[j].id, user=users[j],
+                            content=f"reply {j}", created_at=now, updated_at=None)
+            for j in range(i % 4)
+        ]
+        comments.append(SimpleNamespace(id=str(uuid.uuid4()), post_id=posts[-1].id, parent_id=None, user_id=user.id,
+                                        user=user, content=f"comment {i}", replies=replies,
+                                        created_at=now, updated_at=now))
+    return users, posts, comments
+
+
+def timed(fn, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    users, posts, comments = make_objects(args.objects)
+    cases = [
+        ("PostSchema", PostSchema(), post_schema, posts),
+        ("CommentSchema", CommentSchema(), comment_schema, comments),
+        ("UserSchema", UserSchema(), user_schema, users),
+    ]
+
+    print(f"{'schema':<15}{'marshmallow us':>16}{'compiled us':>14}{'speedup':>10}")
+    for name, schema, compiled, items in cases:
+        for item in items:
+            expected = json.dumps(schema.dump(item), sort_keys=True)
+            actual = json.dumps(compiled.dump(item), sort_keys=True)
+            if expected != actual:
+                raise SystemExit(f"{name}: output differs\n  marshmallow: {expected}\n  compiled:    {actual}")
+
+        slow = timed(schema.dump, items, args.repeat)
+        fast = timed(compiled.dump, items, args.repeat)
+        print(f"{name:<15}{slow:>16.2f}{fast:>14.2f}{slow / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
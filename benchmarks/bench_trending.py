@@ -0,0 +1,103 @@
+"""
+Cost of refreshing the trending ranking (app/services/trending.py).
+
+    # synthetic activity for 1M posts: NumPy scoring vs. a per-post Python loop
+    python benchmarks/bench_trending.py [--posts 1000000] [--rows-per-post 3] [--repeat 3]
+
+    # full refresh (aggregate query + scoring) against a seeded database
+    flask --app app:create_app seed-data --scale 1m
+    python benchmarks/bench_trending.py --database-url sqlite:///app.db --now 2025-01-01
+
+The synthetic run feeds TrendingRanker.rank() the same (post_id, kind, hour,
+events) rows the aggregate query returns, checks that both implementations
+produce the same ranking, then prints the best time of each.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+def make_rows(posts: int, rows_per_post: int, now: datetime, window_hours: int, seed: int):
+    rng = random.Random(seed)
+    now_hour = int(now.timestamp() // 3600)
+    rows = []
+    for _ in range(posts):
+        post_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        for _ in range(rows_per_post):
+            rows.append((post_id, rng.randrange(2), now_hour - rng.randrange(window_hours), rng.randrange(1, 50)))
+    return rows
+
+
+def rank_python(ranker, rows, now: datetime):
+    """Reference implementation: one Python loop over the rows, then a full sort."""
+    now_hour = now.timestamp() / 3600
+    decay = -math.log(2) / ranker.half_life_hours
+    scores = {}
+    for post_id, kind, hour, events in rows:
+        weight = ranker.like_weight if kind == 0 else ranker.comment_weight
+        age = max(now_hour - (hour + 0.5), 0.0)
+        scores[post_id] = scores.get(post_id, 0.0) + weight * events * math.exp(age * decay)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:ranker.top]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--rows-per-post", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="time refresh() against this database instead")
+    parser.add_argument("--now", help="reference time for --database-url (seeded data is dated 2025)")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    from app.config import Config
+    from app.services.trending import TrendingRanker
+
+    ranker = TrendingRanker(Config.TRENDING_WINDOW_HOURS, Config.TRENDING_HALF_LIFE_HOURS,
+                            Config.TRENDING_LIKE_WEIGHT, Config.TRENDING_COMMENT_WEIGHT, Config.TRENDING_TOP_N)
+
+    if args.database_url:
+        from app.database.db import SessionLocal
+        now = datetime.fromisoformat(args.now).replace(tzinfo=timezone.utc) if args.now else datetime.now(timezone.utc)
+        session = SessionLocal()
+        try:
+            seconds = best_of(lambda: ranker.refresh(session, now), args.repeat)
+        finally:
+            session.close()
+        print(f"refresh: {seconds * 1000:.0f} ms, {len(ranker.ranking)} ranked posts")
+        return
+
+    now = datetime.now(timezone.utc)
+    rows = make_rows(args.posts, args.rows_per_post, now, int(Config.TRENDING_WINDOW_HOURS), args.seed)
+    fast, slow = ranker.rank(rows, now), rank_python(ranker, rows, now)
+    assert [post_id for post_id, _ in fast] == [post_id for post_id, _ in slow], "rankings differ"
+    assert all(math.isclose(a, b, rel_tol=1e-9) for (_, a), (_, b) in zip(fast, slow)), "scores differ"
+
+    numpy_seconds = best_of(lambda: ranker.rank(rows, now), args.repeat)
+    python_seconds = best_of(lambda: rank_python(ranker, rows, now), args.repeat)
+    print(f"{args.posts:,} posts, {len(rows):,} aggregate rows, top {ranker.top}")
+    print(f"  numpy   {numpy_seconds * 1000:8.0f} ms")
+    print(f"  python  {python_seconds * 1000:8.0f} ms  ({python_seconds / numpy_seconds:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Query plan checks for the SQL of every benchmarked route.
+
+    # SQLite, same seeded data as bench_endpoints.py
+    python benchmarks/check_query_plans.py --scale 10k [--min-rows 500]
+
+    # MySQL
+    python benchmarks/check_query_plans.py --database-url mysql+pymysql://... --seed-database
+
+Each scenario of bench_endpoints.py (plus the feed search) is driven a few
+times through the Flask test client. Every statement it runs is captured
+and EXPLAINed (app/utils/query_plans.py). The run fails (exit code 1) when
+a statement scans or temp-sorts posts, comments, likes or token_blacklist
+above --min-rows rows, unless ALLOWED lists it with the reason.
+"""
+import argparse
+import re
+import sys
+from fnmatch import fnmatch
+from typing import Dict, List, Tuple
+
+from bench_endpoints import SCENARIOS, Worker, load_fixtures, prepare_database, seed_database
+
+
+def _search(w: Worker):
+    return "GET", "/api/v1/post/get_all_posts?search=post+1&per_page=10", {"headers": w.auth()}
+
+
+ROUTES = SCENARIOS + [("post.search", _search)]
+
+# (route glob, table, kind, statement regex, why it is acceptable)
+ALLOWED: List[Tuple[str, str, str, str, str]] = [
+    ("post.get_all_posts*", "posts", "scan", r"^SELECT count\(\*\)",
+     "feed total: COUNT(*) over every post, cached per worker for a few seconds (cached_count)"),
+    ("post.search", "posts", "*", r"",
+     "ilike('%...%') search on title/content cannot use an index; needs a full-text index to go away"),
+]
+
+
+def allowed(route: str, issue) -> bool:
+    return any(
+        fnmatch(route, pattern) and table == issue.table and fnmatch(issue.kind, kind)
+        and re.search(statement, issue.statement)
+        for pattern, table, kind, statement, _ in ALLOWED
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=["10k", "1m", "10m"], default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=3, help="requests per route")
+    parser.add_argument("--min-rows", type=int, default=500, help="scans/sorts of fewer rows are ignored")
+    parser.add_argument("--routes", help="comma separated route names (default: all)")
+    parser.add_argument("--database-url", help="check this database instead of a seeded SQLite file")
+    parser.add_argument("--seed-database", dest="seed_db", action="store_true", help="(re)seed --database-url first")
+    parser.add_argument("--verbose", action="store_true", help="print every statement and its issues")
+    args = parser.parse_args()
+    args.clients = 1
+
+    url = prepare_database(args)
+    if args.database_url and args.seed_db:
+        seed_database(url, args)
+
+    import logging
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+    from app import create_app
+    from app.database.db import SessionLocal, engine
+    from app.utils.query_plans import QueryPlanChecker, capture_statements
+
+    app = create_app()
+    session = SessionLocal()
+    fixtures = load_fixtures(session)
+    session.close()
+    worker = Worker(app, 0, fixtures["users"][0], fixtures, args.seed)
+
+    selected = set(args.routes.split(",")) if args.routes else None
+    failures: List[str] = []
+    with engine.connect() as conn:
+        checker = QueryPlanChecker(conn, args.min_rows)
+        conn.commit()
+        print(f"{url.split(':', 1)[0]}, rows: {checker.table_rows}, threshold: {args.min_rows}\n")
+        print(f"{'route':<28}{'statements':>11}{'issues':>8}{'allowed':>9}")
+
+        for name, build in ROUTES:
+            if selected and name not in selected:
+                continue
+            with capture_statements(engine) as captured:
+                for _ in range(args.requests):
+                    method, path, options = build(worker)
+                    keep = options.pop("keep", None)
+                    response = worker.client.open(path, method=method, **options)
+                    response.get_data()
+                    if keep is not None and response.status_code < 300:
+                        keep.append(response.get_json()["data"]["id"])
+
+            statements: Dict[str, object] = {}
+            for statement, parameters in captured:
+                statements.setdefault(statement, parameters)
+            issues = [issue for statement, parameters in statements.items()
+                      for issue in checker.check(statement, parameters)]
+            conn.rollback()
+            blocking = [issue for issue in issues if not allowed(name, issue)]
+            print(f"{name:<28}{len(statements):>11}{len(blocking):>8}{len(issues) - len(blocking):>9}")
+
+            for issue in issues if args.verbose else blocking:
+                flat = " ".join(issue.statement.split())
+                print(f"    {issue.kind} on {issue.table} ({issue.rows} rows): {issue.detail}\n      {flat[:300]}")
+            failures.extend(f"{name}: {issue.kind} on {issue.table} ({issue.rows} rows)" for issue in blocking)
+
+    if failures:
+        print("\nquery plan regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nno query plan regressions")
+
+
+if __name__ == "__main__":
+    main()
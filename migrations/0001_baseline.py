@@ -0,0 +1,16 @@
+'''Baseline: create any missing table from the current models.'''
+from app.database.db import Base
+import app.models.user_model
+import app.models.post_model
+import app.models.like_model
+import app.models.comment_model
+import app.models.token_blacklist_model
+import app.models.email_outbox_model
+
+
+def upgrade(ctx) -> None:
+    # Existing tables are left alone, the migrations below bring them up to date
+    missing = [table for table in Base.metadata.sorted_tables if not ctx.has_table(table.name)]
+    for table in missing:
+        ctx.echo(f"  create table {table.name}")
+    Base.metadata.create_all(ctx.conn, tables=missing)
@@ -0,0 +1,27 @@
+'''Counter, post version and token version columns on tables created before them.'''
+from sqlalchemy.orm import Session
+
+
+COLUMNS = (
+    ("posts", "like_count"),
+    ("posts", "comment_count"),
+    ("posts", "reply_count"),
+    ("comments", "reply_count"),
+)
+
+
+def upgrade(ctx) -> None:
+    added = [ctx.add_column(table, column, "INTEGER NOT NULL DEFAULT 0") for table, column in COLUMNS]
+    ctx.add_column("posts", "version", "INTEGER NOT NULL DEFAULT 0")
+    ctx.add_column("users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+
+    if any(added):
+        # New counters start at 0: compute the real values from the likes/comments tables
+        from app.services.counter_service import reconcile_counters
+
+        session = Session(bind=ctx.conn)
+        try:
+            stats = reconcile_counters(session)
+        finally:
+            session.close()
+        ctx.echo(f"  backfilled counters on {stats['posts_fixed']} posts and {stats['comments_fixed']} comments")
@@ -0,0 +1,47 @@
+'''Token blacklist keyed by jti instead of the raw token string.'''
+import hashlib
+from sqlalchemy import DateTime, String, column, select, table
+from app.models.token_blacklist_model import TokenBlacklist
+
+
+BATCH_SIZE = 1000
+
+_old = table(
+    "token_blacklist_old",
+    column("id", String), column("token", String), column("token_type", String), column("user_id", String),
+    column("blacklisted_at", DateTime), column("expires_at", DateTime), column("reason", String),
+)
+
+
+def upgrade(ctx) -> None:
+    # Rebuild: rename the old table, create the current one, copy the rows over with jti = sha256(token),
+    # the same id get_token_id() gives tokens issued without a jti claim
+    if ctx.has_column("token_blacklist", "token") and not ctx.has_column("token_blacklist", "jti"):
+        ctx.echo("  rebuild token_blacklist")
+        ctx.execute("ALTER TABLE token_blacklist RENAME TO token_blacklist_old")
+        TokenBlacklist.__table__.create(ctx.conn)
+    if not ctx.has_table("token_blacklist_old"):
+        return
+
+    # DDL may have committed already (MySQL, SQLite) before an interrupted copy: rows copied earlier are skipped
+    copy = (
+        TokenBlacklist.__table__.insert()
+        .prefix_with("OR IGNORE", dialect="sqlite")
+        .prefix_with("IGNORE", dialect="mysql")
+    )
+    last_id, copied = "", 0
+    while True:
+        rows = ctx.conn.execute(
+            select(_old).where(_old.c.id > last_id).order_by(_old.c.id).limit(BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        ctx.conn.execute(copy, [
+            {**{key: value for key, value in row.items() if key != "token"},
+             "jti": hashlib.sha256(row["token"].encode("utf-8")).hexdigest()}
+            for row in rows
+        ])
+        copied += len(rows)
+    ctx.echo(f"  copied {copied} blacklist entries")
+    ctx.execute("DROP TABLE token_blacklist_old")
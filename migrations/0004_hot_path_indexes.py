@@ -0,0 +1,23 @@
+'''Composite indexes for the feed, comment, like and likers queries.'''
+
+
+INDEXES = (
+    # likers list and counts: WHERE post_id = ? ORDER BY created_at DESC, id DESC
+    # (unique_user_post_like leads with user_id, so it cannot serve these)
+    ("ix_likes_post_created", "likes", ["post_id", "created_at", "id"]),
+    # top-level comments of a post: WHERE post_id = ? AND parent_id IS NULL ORDER BY created_at DESC, id DESC
+    ("ix_comments_post_parent_created", "comments", ["post_id", "parent_id", "created_at", "id"]),
+    # a user's comments: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+    ("ix_comments_user_created", "comments", ["user_id", "created_at", "id"]),
+    # reply threads: WHERE parent_id IN (...) / parent_id = ? ORDER BY created_at DESC, id DESC
+    ("ix_comments_parent_created", "comments", ["parent_id", "created_at", "id"]),
+    # latest feed: ORDER BY created_at DESC, id DESC (+ keyset cursor)
+    ("ix_posts_created", "posts", ["created_at", "id"]),
+    # a user's posts (version bumps on profile changes)
+    ("ix_posts_user_created", "posts", ["user_id", "created_at"]),
+)
+
+
+def upgrade(ctx) -> None:
+    for name, table, columns in INDEXES:
+        ctx.create_index(name, table, columns)
@@ -0,0 +1,102 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Before anything imports app: the engines are created from the environment at import time
+DATA_DIR = tempfile.mkdtemp(prefix="blog-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATA_DIR, 'primary.db')}"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ.setdefault("SECRET_KEY", "test-secret-key-test-secret-key-test")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["SLOW_REQUEST_MS"] = "1e9"
+os.environ["START_WORKERS"] = "false"
+
+from app.utils.sql_instrumentation import assert_max_queries
+
+PASSWORD = "testpass1"      # every seeded user logs in with this
+SCALE = {"users": 50, "posts": 2000, "comments": 5000, "likes": 10000}
+
+
+'''
+Shared fixtures: one SQLite database per test session, migrated and seeded
+once (app/services/seeder.py), and the app built on it. Background threads
+are never started (START_WORKERS=false, see start_background_workers).
+
+Query budgets:
+
+    def test_something(client, auth, max_queries):
+        with max_queries(4):
+            client.get("/api/v1/post/get_all_posts", headers=auth)
+'''
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import create_app
+    from app.database import migrations
+    from app.database.db import engine
+    from app.services.seeder import seed_data
+
+    migrations.upgrade(engine, echo=lambda line: None)
+    seed_data(engine, **SCALE, seed=7, password=PASSWORD, bcrypt_rounds=4)
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope="session")
+def fixtures(app):
+    """Ids the tests pick from: seeded users, the most liked/commented posts, comments with replies."""
+    from sqlalchemy import select, desc
+    from app.database.db import SessionLocal
+    from app.models.comment_model import Comment
+    from app.models.post_model import Post
+    from app.models.user_model import User
+
+    session = SessionLocal()
+    try:
+        return {
+            "users": [tuple(row) for row in session.execute(select(User.id, User.email).order_by(User.username))],
+            "hot_posts": list(session.scalars(select(Post.id).order_by(desc(Post.like_count), Post.id).limit(10))),
+            "commented_posts": list(session.scalars(
+                select(Post.id).order_by(desc(Post.comment_count), Post.id).limit(10))),
+            "threads": list(session.scalars(
+                select(Comment.id).where(Comment.reply_count > 0).order_by(desc(Comment.reply_count), Comment.id).limit(10))),
+        }
+    finally:
+        session.close()
+
+
+def auth_headers(user_id: str, email: str) -> dict:
+    from app.database.db import SessionLocal
+    from app.models.user_model import User
+    from app.utils.jwt_helper import create_access_token
+
+    session = SessionLocal()
+    try:
+        version = session.get(User, user_id).token_version
+    finally:
+        session.close()
+    return {"Authorization": f"Bearer {create_access_token({'user_id': user_id, 'email': email}, version)}"}
+
+
+@pytest.fixture
+def auth(fixtures):
+    """Authorization header for the first seeded user."""
+    return auth_headers(*fixtures["users"][0])
+
+
+@pytest.fixture
+def max_queries():
+    """assert_max_queries (app/utils/sql_instrumentation.py): fails when the block runs more statements."""
+    return assert_max_queries
@@ -0,0 +1,59 @@
+import pytest
+
+
+'''
+The async twins (app/routes/async_views.py) must answer exactly like the sync
+views they replace under app/asgi.py: same status, body and ETag.
+'''
+
+# (name, url builder)
+TWINNED = [
+    ("feed", lambda f: "/api/v1/post/get_all_posts?per_page=20"),
+    ("feed_page_3", lambda f: "/api/v1/post/get_all_posts?page=3&per_page=7"),
+    ("feed_search", lambda f: "/api/v1/post/get_all_posts?search=the&per_page=5"),
+    ("feed_cursor", lambda f: "/api/v1/post/get_all_posts?cursor=&per_page=5&include_total=true"),
+    ("feed_trending", lambda f: "/api/v1/post/get_all_posts?sort=trending&per_page=5"),
+    ("feed_trending_cursor", lambda f: "/api/v1/post/get_all_posts?sort=trending&cursor="),
+    ("feed_bad_sort", lambda f: "/api/v1/post/get_all_posts?sort=oldest"),
+    ("feed_bad_cursor", lambda f: "/api/v1/post/get_all_posts?cursor=nope"),
+    ("feed_bad_page", lambda f: "/api/v1/post/get_all_posts?page=x"),
+    ("feed_past_the_end", lambda f: "/api/v1/post/get_all_posts?page=100000"),
+    ("comments", lambda f: f"/api/v1/comments/get_by_post/{f['commented_posts'][0]}?per_page=5"),
+    ("comments_cursor", lambda f: f"/api/v1/comments/get_by_post/{f['commented_posts'][0]}?cursor=&include_total=1"),
+    ("comments_bad_cursor", lambda f: f"/api/v1/comments/get_by_post/{f['commented_posts'][0]}?cursor=nope"),
+    ("comments_no_post", lambda f: "/api/v1/comments/get_by_post/missing"),
+]
+
+
+@pytest.fixture(scope="module")
+def async_client(app):
+    from app import create_app
+    from app.routes.async_views import install_async_views
+
+    async_app = create_app()
+    async_app.config["TESTING"] = True
+    install_async_views(async_app)
+    return async_app.test_client()
+
+
+@pytest.mark.parametrize("build", [build for _, build in TWINNED], ids=[name for name, _ in TWINNED])
+def test_async_twin_matches_sync_view(client, async_client, auth, fixtures, build):
+    url = build(fixtures)
+    expected = client.get(url, headers=auth)
+    actual = async_client.get(url, headers=auth)
+
+    assert actual.status_code == expected.status_code, actual.get_data(as_text=True)
+    assert actual.get_json() == expected.get_json()
+    assert actual.headers.get("ETag") == expected.headers.get("ETag")
+
+
+def test_async_trending_refreshes_a_cold_ranking(client, async_client, auth, monkeypatch):
+    from app.services.trending import get_trending_ranker
+
+    url = "/api/v1/post/get_all_posts?sort=trending&per_page=5"
+    expected = client.get(url, headers=auth)
+    monkeypatch.setattr(get_trending_ranker(), "ranking", None)
+
+    actual = async_client.get(url, headers=auth)
+    assert actual.status_code == expected.status_code and actual.get_json() == expected.get_json()
+    assert get_trending_ranker().ranking is not None
@@ -0,0 +1,41 @@
+import app as app_module
+from app.config import Config
+from app.services.revocation_filter import RevocationFilter
+
+
+'''
+Background threads start on the first request of any server (`flask run`
+included), once, and never with START_WORKERS=false.
+'''
+
+
+def _started(monkeypatch, enabled: bool):
+    calls = []
+    monkeypatch.setattr(Config, "START_WORKERS", enabled)
+    monkeypatch.setattr(app_module, "_start_workers", lambda flask_app: calls.append(flask_app))
+    return calls
+
+
+def test_first_request_starts_the_workers_once(app, monkeypatch):
+    calls = _started(monkeypatch, True)
+    flask_app = app_module.create_app()
+    client = flask_app.test_client()
+
+    assert calls == []                          # nothing at import or create_app time (CLI commands)
+    client.get("/api/v1/post/get_all_posts")
+    client.get("/api/v1/post/get_all_posts")
+    assert calls == [flask_app]
+
+
+def test_start_workers_false_starts_nothing(app, monkeypatch):
+    calls = _started(monkeypatch, False)
+    flask_app = app_module.create_app()
+    flask_app.test_client().get("/api/v1/post/get_all_posts")
+    app_module.start_background_workers(flask_app)
+    assert calls == []
+
+
+def test_revocation_filter_loads_without_starting_its_thread(app):
+    revocations = RevocationFilter(capacity=1000, fp_rate=0.001, sync_seconds=5, rebuild_seconds=3600)
+    revocations.ensure_loaded()
+    assert revocations._thread is None
@@ -0,0 +1,46 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from app.database.db import SessionLocal
+from app.models.token_blacklist_model import TokenBlacklist
+from app.services.blacklist_purger import purge_expired_tokens
+
+
+'''
+Batched purge of expired blacklist rows (app/services/blacklist_purger.py).
+'''
+
+
+def _rows(prefix: str, count: int, expires_at: datetime):
+    return [
+        TokenBlacklist(jti=f"{prefix}-{uuid.uuid4()}", token_type="access", user_id="purge-test", expires_at=expires_at)
+        for _ in range(count)
+    ]
+
+
+def _left(session, prefix: str) -> int:
+    return session.execute(
+        select(func.count()).select_from(TokenBlacklist).where(TokenBlacklist.jti.like(f"{prefix}-%"))
+    ).scalar()
+
+
+def test_purge_deletes_only_expired_rows_batch_by_batch(app):
+    now = datetime.now(timezone.utc)
+    session = SessionLocal()
+    try:
+        purge_expired_tokens(session)                       # start from a table without expired rows
+        session.add_all(_rows("expired", 25, now - timedelta(minutes=1)) + _rows("live", 10, now + timedelta(hours=1)))
+        session.commit()
+
+        # Two batches of 10, then the rest (a short last batch ends the loop)
+        assert purge_expired_tokens(session, batch_size=10, max_batches=2) == 20
+        assert _left(session, "expired") == 5
+        assert purge_expired_tokens(session, batch_size=10) == 5
+
+        assert _left(session, "expired") == 0
+        assert _left(session, "live") == 10
+    finally:
+        session.query(TokenBlacklist).filter(TokenBlacklist.user_id == "purge-test").delete()
+        session.commit()
+        session.close()
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select
+from app.database.db import SessionLocal
+from app.models.comment_model import Comment
+from app.models.post_model import Post
+
+
+'''
+Deleting a comment removes its whole reply subtree in a fixed number of
+queries, however deep it is, and takes every removed reply off the counters.
+'''
+
+DELETE_QUERIES = 5      # the comment, the subtree ids, one DELETE, the parent and post counters
+
+
+def _add(client, auth, post_id, parent_id=None) -> str:
+    response = client.post("/api/v1/comments/add", json={"post_id": post_id, "content": "x", "parent_id": parent_id}, headers=auth)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return response.get_json()["data"]["id"]
+
+
+def _counters(post_id):
+    session = SessionLocal()
+    try:
+        return session.execute(select(Post.comment_count, Post.reply_count).where(Post.id == post_id)).one()
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize("depth", [2, 8])
+@pytest.mark.parametrize("nested", [False, True], ids=["top_level", "reply"])
+def test_delete_removes_the_subtree_in_fixed_queries(client, auth, fixtures, max_queries, depth, nested):
+    post_id = fixtures["hot_posts"][-1]
+    before = _counters(post_id)
+
+    # Two branches of `depth` levels below the comment that gets deleted
+    anchor = _add(client, auth, post_id) if nested else None
+    root = _add(client, auth, post_id, anchor)
+    subtree = []
+    for _ in range(2):
+        parent = root
+        for _ in range(depth):
+            parent = _add(client, auth, post_id, parent)
+            subtree.append(parent)
+
+    with max_queries(DELETE_QUERIES):
+        response = client.delete(f"/api/v1/comments/delete/{root}", headers=auth)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+    session = SessionLocal()
+    try:
+        assert session.scalars(select(Comment.id).where(Comment.id.in_([root, *subtree]))).all() == []
+        if nested:
+            assert session.get(Comment, anchor).reply_count == 0
+    finally:
+        session.close()
+    assert _counters(post_id) == (before[0] + (1 if nested else 0), before[1])
+
+    if nested:
+        client.delete(f"/api/v1/comments/delete/{anchor}", headers=auth)
+        assert _counters(post_id) == before
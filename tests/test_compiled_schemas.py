@@ -0,0 +1,61 @@
+import os
+import sys
+
+import pytest
+from marshmallow import Schema, fields, post_dump, pre_dump
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from bench_serializers import make_objects
+
+
+'''
+Compiled serializers (app/schemas/compiled.py) produce what marshmallow
+produces: for the app's schemas, and for schemas with dump hooks, which are
+handed to marshmallow itself.
+'''
+
+
+class PostDumpSchema(Schema):
+    a = fields.Str()
+
+    @post_dump
+    def add_z(self, data, **kwargs):
+        data["z"] = 1
+        return data
+
+
+class PreDumpSchema(Schema):
+    a = fields.Str()
+
+    @pre_dump
+    def shout(self, obj, **kwargs):
+        return {"a": obj["a"].upper()}
+
+
+class ParentSchema(Schema):
+    child = fields.Nested(PostDumpSchema)
+
+
+@pytest.mark.parametrize("schema_cls, obj", [
+    (PostDumpSchema, {"a": "q"}),
+    (PreDumpSchema, {"a": "q"}),
+    (ParentSchema, {"child": {"a": "q"}}),
+], ids=["post_dump", "pre_dump", "nested"])
+def test_dump_hooks_run(schema_cls, obj):
+    from app.schemas.compiled import compile_dump
+
+    assert compile_dump(schema_cls)(obj) == schema_cls().dump(obj)
+
+
+def test_app_schemas_match_marshmallow():
+    from app.schemas.compiled import comment_schema, post_schema, user_schema
+    from app.schemas.comment_schema import CommentSchema
+    from app.schemas.post_schema import PostSchema
+    from app.schemas.user_schema import UserSchema
+
+    users, posts, comments = make_objects(20)
+    assert user_schema.dump(users, many=True) == UserSchema(many=True).dump(users)
+    assert post_schema.dump(posts, many=True) == PostSchema(many=True).dump(posts)
+    assert comment_schema.dump(comments, many=True) == CommentSchema(many=True).dump(comments)
@@ -0,0 +1,38 @@
+from sqlalchemy import event, select, update
+from sqlalchemy.sql import Select
+from app.database.db import SessionLocal
+from app.models.comment_model import Comment
+from app.models.post_model import Post
+from app.services.counter_service import reconcile_counters
+
+
+'''
+Counter reconciliation (app/services/counter_service.py).
+'''
+
+
+def test_reconcile_repairs_drift_and_locks_each_batch(app, fixtures):
+    post_id = fixtures["hot_posts"][0]
+    session = SessionLocal()
+    try:
+        like_count, version = session.execute(select(Post.like_count, Post.version).where(Post.id == post_id)).one()
+        session.execute(update(Post).where(Post.id == post_id).values(like_count=like_count + 5))
+        session.commit()
+
+        # SQLite drops FOR UPDATE from the SQL it emits, so look at the statements themselves
+        locked = set()
+
+        @event.listens_for(session, "do_orm_execute")
+        def record(state):
+            if isinstance(state.statement, Select) and state.statement._for_update_arg is not None:
+                locked.add(state.statement.get_final_froms()[0].name)
+
+        stats = reconcile_counters(session, batch_size=500)
+        event.remove(session, "do_orm_execute", record)
+
+        assert stats["posts_fixed"] == 1 and stats["comments_fixed"] == 0
+        assert session.execute(select(Post.like_count, Post.version).where(Post.id == post_id)).one() == \
+            (like_count, version + 1)
+        assert locked == {Post.__tablename__, Comment.__tablename__}
+    finally:
+        session.close()
@@ -0,0 +1,139 @@
+import contextlib
+import socket
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from aiosmtpd.controller import Controller
+from flask import Flask
+from sqlalchemy import update
+
+
+'''
+The outbox pipeline (app/services/email_outbox.py) against a real SMTP
+server: aiosmtpd on localhost takes the message, then, once it is stopped,
+the next message is rescheduled with backoff and its last_error kept.
+
+aiosmtpd comes with requirements-dev.txt.
+'''
+
+BACKOFF_SECONDS = 30
+
+
+class Inbox:
+    def __init__(self) -> None:
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    inbox = Inbox()
+    controller = Controller(inbox, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, inbox
+    with contextlib.suppress(AssertionError):      # already stopped by the test
+        controller.stop()
+
+
+@pytest.fixture
+def worker(app, smtp_server):
+    """An outbox worker whose Flask-Mail points at the local SMTP server."""
+    from app import mail
+    from app.services.email_outbox import OutboxWorker
+
+    controller, _ = smtp_server
+    mail_app = Flask(__name__)
+    mail_app.config.update(
+        MAIL_SERVER=controller.hostname, MAIL_PORT=controller.port, MAIL_USE_TLS=False,
+        MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_DEFAULT_SENDER="noreply@example.com",
+    )
+    mail.init_app(mail_app)
+    return OutboxWorker(mail_app, batch_size=1000, poll_seconds=0, max_attempts=3,
+                        backoff_seconds=BACKOFF_SECONDS, lease_seconds=300)
+
+
+def _queue(recipient: str) -> str:
+    from app.database.db import SessionLocal
+    from app.models.email_outbox_model import EmailOutbox
+    from app.utils.email_helper import queue_email
+
+    session = SessionLocal()
+    try:
+        queue_email(session, recipient, "subject", "body")
+        session.commit()
+        return session.query(EmailOutbox.id).filter_by(recipient=recipient).scalar()
+    finally:
+        session.close()
+
+
+def _row(outbox_id: str):
+    from app.database.db import SessionLocal
+    from app.models.email_outbox_model import EmailOutbox
+
+    session = SessionLocal()
+    try:
+        return session.get(EmailOutbox, outbox_id)
+    finally:
+        session.close()
+
+
+def test_outbox_delivers_then_backs_off(worker, smtp_server):
+    controller, inbox = smtp_server
+
+    delivered = _queue("delivered@example.com")
+    assert worker.drain_once() >= 1
+    assert any("delivered@example.com" in message.rcpt_tos for message in inbox.messages)
+    row = _row(delivered)
+    assert (row.status, row.attempts, row.locked_by, row.last_error) == ("sent", 1, None, None)
+
+    controller.stop()
+    retried = _queue("retried@example.com")
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+    assert worker.drain_once() == 1
+    row = _row(retried)
+    assert (row.status, row.attempts, row.locked_by) == ("pending", 1, None)
+    assert row.last_error
+    # First retry: backoff_seconds, with +-20% jitter
+    assert before + timedelta(seconds=BACKOFF_SECONDS * 0.8) <= row.next_attempt_at
+    assert row.next_attempt_at <= before + timedelta(seconds=BACKOFF_SECONDS * 1.2 + 5)
+
+
+def _take_over(outbox_id: str) -> None:
+    """Another worker claims the row after this one's lease ran out (own connection, the batch's session stays open)."""
+    from app.database.db import engine
+    from app.models.email_outbox_model import EmailOutbox
+
+    with engine.begin() as conn:
+        conn.execute(update(EmailOutbox).where(EmailOutbox.id == outbox_id).values(locked_by="other-worker"))
+
+
+@pytest.mark.parametrize("smtp_up", [True, False], ids=["sent", "failed"])
+def test_results_never_overwrite_another_workers_claim(worker, smtp_server, smtp_up):
+    from app.database.db import SessionLocal
+
+    controller, _ = smtp_server
+    if not smtp_up:
+        controller.stop()
+    kept, taken = _queue(f"kept-{smtp_up}@example.com"), _queue(f"taken-{smtp_up}@example.com")
+
+    session = SessionLocal()
+    try:
+        batch = [item for item in worker.claim(session) if item.id in (kept, taken)]
+        assert len(batch) == 2
+        _take_over(taken)
+        assert worker.send_batch(session, batch) == (1 if smtp_up else 0)
+    finally:
+        session.close()
+
+    assert (_row(taken).status, _row(taken).locked_by) == ("pending", "other-worker")
+    assert _row(kept).locked_by is None
+    assert _row(kept).status == ("sent" if smtp_up else "pending")
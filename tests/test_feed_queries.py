@@ -0,0 +1,26 @@
+import pytest
+
+
+'''
+The feed hydrates a page with a fixed number of queries: the page of ids,
+the posts with their authors, and one grouped stats query
+(app/services/feed_service.py), whatever the page size.
+'''
+
+FEED_QUERIES = 3
+
+
+@pytest.mark.parametrize("mode", ["", "&cursor="], ids=["offset", "cursor"])
+def test_feed_query_count_does_not_depend_on_page_size(client, auth, max_queries, mode):
+    # Warm the per-worker caches (user snapshot, revocation filter, cached total)
+    assert client.get(f"/api/v1/post/get_all_posts?per_page=5{mode}", headers=auth).status_code == 200
+
+    counts = {}
+    for per_page in (5, 50):
+        with max_queries(FEED_QUERIES) as stats:
+            response = client.get(f"/api/v1/post/get_all_posts?per_page={per_page}{mode}", headers=auth)
+        assert response.status_code == 200
+        assert len(response.get_json()["data"]["post_data"]) == per_page
+        counts[per_page] = stats.count
+
+    assert counts[5] == counts[50] == FEED_QUERIES
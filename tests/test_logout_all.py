@@ -0,0 +1,32 @@
+from conftest import auth_headers
+
+
+'''
+"Logout everywhere" across workers: the token_version bump reaches the
+user cache of a worker that did not handle logout_all through the revocation
+filter's sync (app/services/revocation_filter.py).
+'''
+
+
+def test_logout_all_reaches_other_workers(client, fixtures):
+    from app.services import auth_cache
+    from app.services.revocation_filter import revocation_filter
+
+    user_id, email = fixtures["users"][2]
+    headers = auth_headers(user_id, email)
+    assert client.get("/api/v1/user/profile", headers=headers).status_code == 200
+    stale = auth_cache._user_cache.get(user_id)
+    assert stale is not None
+
+    assert client.post("/api/v1/auth/logout_all", headers=headers).status_code == 200
+    assert client.get("/api/v1/user/profile", headers=headers).status_code == 401
+
+    # Another worker still holds the snapshot from before the bump ...
+    auth_cache._user_cache.set(user_id, stale)
+    assert client.get("/api/v1/user/profile", headers=headers).status_code == 200
+
+    # ... until its next revocation sync
+    revocation_filter.ensure_loaded()
+    revocation_filter.sync()
+    assert client.get("/api/v1/user/profile", headers=headers).status_code == 401
+    assert client.get("/api/v1/user/profile", headers=auth_headers(user_id, email)).status_code == 200
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+from sqlalchemy import select
+from app.database.db import SessionLocal
+from app.models import user_model
+from app.models.user_model import User
+from app.services.password_hasher import PasswordHasher, password_hasher
+
+from conftest import PASSWORD
+
+
+'''
+Bounded bcrypt (app/services/password_hasher.py): a full queue fails fast
+with a 503, and a changed BCRYPT_ROUNDS rewrites the hash at the next login.
+'''
+
+
+@pytest.fixture
+def saturated_hasher(monkeypatch):
+    """A hasher with one worker, no queue, and that worker stuck on a slow hash."""
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=0)
+    release = threading.Event()
+    holder = threading.Thread(target=hasher._run, args=("verify", release.wait))
+    holder.start()
+    while hasher._slots.acquire(blocking=False):        # wait until the slot is really taken
+        hasher._slots.release()
+    monkeypatch.setattr(user_model, "password_hasher", hasher)
+    yield hasher
+    release.set()
+    holder.join()
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/api/v1/auth/login", lambda email: {"email": email, "password": PASSWORD}),
+    ("/api/v1/auth/register", lambda email: {"username": "busyuser", "email": "busy@example.com", "password": PASSWORD}),
+], ids=["login", "register"])
+def test_full_queue_fails_fast_with_503(client, fixtures, saturated_hasher, path, payload):
+    response = client.post(path, json=payload(fixtures["users"][-1][1]))
+    assert response.status_code == 503
+    assert response.get_json()["error_code"] is True
+    assert response.headers["Retry-After"] == "1"
+    assert saturated_hasher.rejected == 1
+
+
+def _stored_hash(user_id: str) -> str:
+    session = SessionLocal()
+    try:
+        return session.execute(select(User._password).where(User.id == user_id)).scalar()
+    finally:
+        session.close()
+
+
+def test_login_rewrites_a_hash_made_with_another_cost(client, fixtures, monkeypatch):
+    user_id, email = fixtures["users"][-1]
+    assert _stored_hash(user_id).startswith("$2b$04$")
+
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200
+    assert _stored_hash(user_id).startswith("$2b$05$")
+
+    # The new hash still verifies, and is left alone at the next login
+    rewritten = _stored_hash(user_id)
+    assert client.post("/api/v1/auth/login", json={"email": email, "password": PASSWORD}).status_code == 200
+    assert _stored_hash(user_id) == rewritten
@@ -0,0 +1,37 @@
+import pytest
+
+
+'''
+Query budgets for the hot endpoints: a statement per row (N+1) fails them.
+
+Each endpoint is called once to warm the per-worker caches (user snapshot,
+revocation filter, cached totals), then again under max_queries() with a
+page size well above the budget.
+'''
+
+# (name, request builder, budget)
+HOT_ENDPOINTS = [
+    ("post.get_all_posts", lambda f: ("GET", "/api/v1/post/get_all_posts?per_page=50", {}), 3),
+    ("post.get_all_posts_cursor", lambda f: ("GET", "/api/v1/post/get_all_posts?per_page=50&cursor=", {}), 3),
+    ("post.get_post_byId", lambda f: ("GET", f"/api/v1/post/get_post_byId/{f['hot_posts'][0]}", {}), 2),
+    ("post.stats", lambda f: ("POST", "/api/v1/post/stats", {"json": {"post_ids": f["hot_posts"]}}), 1),
+    ("comment.get_by_post", lambda f: ("GET", f"/api/v1/comments/get_by_post/{f['commented_posts'][0]}?per_page=50", {}), 3),
+    ("comment.replies", lambda f: ("GET", f"/api/v1/comments/replies/{f['threads'][0]}?per_page=50", {}), 3),
+    ("comment.get_by_user", lambda f: ("GET", f"/api/v1/comments/get_by_user/{f['users'][0][0]}?per_page=50", {}), 1),
+    ("like.count", lambda f: ("GET", f"/api/v1/like/count/{f['hot_posts'][0]}", {}), 1),
+    ("like.is_liked", lambda f: ("GET", f"/api/v1/like/is_liked/{f['hot_posts'][0]}", {}), 2),
+    ("like.likers", lambda f: ("GET", f"/api/v1/like/list_of_users_liked_to_a_post/{f['hot_posts'][0]}", {}), 2),
+    ("like.likers_page", lambda f: ("GET", f"/api/v1/like/list_of_users_liked_to_a_post/{f['hot_posts'][0]}?cursor=&per_page=50", {}), 2),
+]
+
+
+@pytest.mark.parametrize("build, budget", [(b, n) for _, b, n in HOT_ENDPOINTS], ids=[name for name, _, _ in HOT_ENDPOINTS])
+def test_query_budget(client, auth, fixtures, max_queries, build, budget):
+    method, url, options = build(fixtures)
+    warm = client.open(url, method=method, headers=auth, **options)
+    assert warm.status_code == 200, warm.get_data(as_text=True)
+
+    with max_queries(budget):
+        response = client.open(url, method=method, headers=auth, **options)
+        response.get_data()                     # streamed bodies query while they are sent
+    assert response.status_code == 200
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+from check_query_plans import ROUTES, allowed
+from bench_endpoints import Worker, load_fixtures
+
+
+'''
+Query plan regressions (app/utils/query_plans.py), one case per route of
+benchmarks/check_query_plans.py, with its ALLOWED list: a statement that
+scans or temp-sorts more than MIN_ROWS rows of posts, comments, likes or
+token_blacklist fails its route.
+'''
+
+MIN_ROWS = 500
+REQUESTS = 3            # per route: the first call of a route can differ (own post/comment setup)
+
+
+@pytest.fixture(scope="module")
+def plan_checker(app):
+    from app.database.db import engine
+    from app.utils.query_plans import QueryPlanChecker
+
+    with engine.connect() as conn:
+        checker = QueryPlanChecker(conn, MIN_ROWS)
+        conn.commit()
+        assert max(checker.table_rows[table] for table in checker.tables) > MIN_ROWS, "seed more rows"
+        yield checker
+
+
+@pytest.fixture(scope="module")
+def worker(app):
+    from app.database.db import SessionLocal
+
+    session = SessionLocal()
+    try:
+        fixtures = load_fixtures(session)
+    finally:
+        session.close()
+    # The last seeded user: the auth routes below log it out
+    return Worker(app, 0, fixtures["users"][-1], fixtures, seed=7)
+
+
+@pytest.mark.parametrize("name, build", ROUTES, ids=[name for name, _ in ROUTES])
+def test_no_full_scans(plan_checker, worker, name, build):
+    from app.database.db import engine
+    from app.utils.query_plans import capture_statements
+
+    with capture_statements(engine) as captured:
+        for _ in range(REQUESTS):
+            method, path, options = build(worker)
+            keep = options.pop("keep", None)
+            response = worker.client.open(path, method=method, **options)
+            response.get_data()
+            assert response.status_code < 500, response.get_data(as_text=True)
+            if keep is not None and response.status_code < 300:
+                keep.append(response.get_json()["data"]["id"])
+
+    statements = {}
+    for statement, parameters in captured:
+        statements.setdefault(statement, parameters)
+    try:
+        issues = [issue for statement, parameters in statements.items()
+                  for issue in plan_checker.check(statement, parameters)]
+    finally:
+        plan_checker.conn.rollback()
+
+    blocking = [issue for issue in issues if not allowed(name, issue)]
+    assert not blocking, "\n".join(
+        f"{issue.kind} on {issue.table} ({issue.rows} rows): {issue.detail}\n  {' '.join(issue.statement.split())[:300]}"
+        for issue in blocking
+    )
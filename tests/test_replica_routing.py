@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from conftest import DATA_DIR, auth_headers
+
+
+'''
+Read routing with a replica (app/database/db.py, app/utils/use_replica.py),
+on two SQLite files: the primary, seeded, and a replica with the same schema
+but no rows, i.e. a replica lagging behind everything. A read that reaches
+the replica cannot find the post.
+'''
+
+
+@pytest.fixture
+def replica(app):
+    from sqlalchemy import create_engine
+    from app.database import db, migrations
+
+    engine = create_engine(f"sqlite:///{os.path.join(DATA_DIR, 'replica.db')}")
+    migrations.upgrade(engine, echo=lambda line: None)
+    db.replica_engines.append(engine)           # the same list use_replica sees
+    yield engine
+    db.replica_engines.remove(engine)
+    db.recent_writers.clear()
+    engine.dispose()
+
+
+def _post_by_id(client, auth, post_id):
+    return client.get(f"/api/v1/post/get_post_byId/{post_id}", headers=auth)
+
+
+def test_reads_go_to_the_replica(replica, client, auth, fixtures):
+    assert _post_by_id(client, auth, fixtures["hot_posts"][0]).status_code == 404
+
+
+def test_writes_go_to_the_primary(replica, client, auth):
+    from sqlalchemy import text
+
+    response = client.post("/api/v1/post/upload", json={"title": "routed", "content": "to the primary"}, headers=auth)
+    assert response.status_code == 201
+    with replica.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM posts")).scalar() == 0
+
+
+def test_writer_reads_its_own_write_on_any_worker(replica, app, client, auth, fixtures):
+    from app.database.db import recent_writers
+    from app.utils.use_replica import STICKY_COOKIE
+
+    post_id = client.post("/api/v1/post/upload", json={"title": "mine", "content": "x"}, headers=auth).get_json()["data"]["id"]
+    assert client.get_cookie(STICKY_COOKIE) is not None
+
+    # Same worker: the per-worker marker alone is enough
+    assert _post_by_id(app.test_client(), auth, post_id).status_code == 200
+
+    # Another worker (no per-worker marker): the cookie carries it
+    recent_writers.clear()
+    assert _post_by_id(client, auth, post_id).status_code == 200
+
+    # ... and without it the read goes to the lagging replica
+    assert _post_by_id(app.test_client(), auth, post_id).status_code == 404
+
+
+def test_sticky_cookie_is_checked(replica, app, client, auth, fixtures):
+    from app.database.db import recent_writers
+    from app.utils.use_replica import STICKY_COOKIE
+
+    post_id = client.post("/api/v1/post/upload", json={"title": "mine", "content": "x"}, headers=auth).get_json()["data"]["id"]
+    recent_writers.clear()
+    cookie = client.get_cookie(STICKY_COOKIE).value
+
+    forged = app.test_client()
+    forged.set_cookie(STICKY_COOKIE, cookie[:-2] + ("AA" if not cookie.endswith("AA") else "BB"))
+    assert _post_by_id(forged, auth, post_id).status_code == 404
+
+    other_user = app.test_client()
+    other_user.set_cookie(STICKY_COOKIE, cookie)
+    assert _post_by_id(other_user, auth_headers(*fixtures["users"][1]), post_id).status_code == 404
+
+
+def test_one_replica_per_transaction(app, monkeypatch):
+    from itertools import cycle
+    from sqlalchemy import create_engine, literal, select
+    from app.database import db
+
+    replicas = [create_engine("sqlite://"), create_engine("sqlite://")]
+    monkeypatch.setattr(db, "replica_engines", replicas)
+    picks = cycle(replicas)
+    monkeypatch.setattr(db.random, "choice", lambda engines: next(picks))
+
+    token = db.read_from_replica.set(True)
+    session = db.SessionLocal()
+    try:
+        statement = select(literal(1))
+        session.execute(statement)
+        first = session.get_bind(clause=statement)
+        for _ in range(3):
+            session.execute(statement)
+            assert session.get_bind(clause=statement) is first
+        session.rollback()
+        session.execute(statement)
+        assert session.get_bind(clause=statement) is not first     # a new transaction picks again
+    finally:
+        session.close()
+        db.read_from_replica.reset(token)
+
+
+def test_sticky_cookie_needs_a_secret_key(monkeypatch):
+    from flask import Flask
+    from app.utils import use_replica
+
+    monkeypatch.setattr(use_replica, "SECRET_KEY", None)
+    monkeypatch.setattr(use_replica, "_signer", use_replica._signer)
+    with pytest.raises(ValueError):
+        use_replica.init_read_your_writes(Flask(__name__))
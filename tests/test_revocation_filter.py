@@ -0,0 +1,47 @@
+from app.services import revocation_filter as module
+from app.services.revocation_filter import RevocationFilter
+
+
+'''
+The in-process revocation filter (app/services/revocation_filter.py).
+'''
+
+
+def _filter() -> RevocationFilter:
+    return RevocationFilter(capacity=1000, fp_rate=0.001, sync_seconds=0, rebuild_seconds=3600)
+
+
+def test_rebuild_keeps_tokens_revoked_while_it_runs(app, monkeypatch):
+    revocations = _filter()
+    revocations.ensure_loaded()
+
+    # A logout on this worker lands between the rebuild's snapshot and the swap
+    build = module.BloomFilter
+
+    def bloom_with_concurrent_logout(*args):
+        bloom = build(*args)
+        revocations.add("revoked-during-rebuild")
+        return bloom
+
+    monkeypatch.setattr(module, "BloomFilter", bloom_with_concurrent_logout)
+    revocations._rebuild()
+    assert revocations.might_contain("revoked-during-rebuild")
+    assert revocations._added_during_rebuild is None
+
+
+def test_adds_are_immediate(app):
+    revocations = _filter()
+    revocations.ensure_loaded()
+    assert not revocations.might_contain("fresh")
+    revocations.add("fresh")
+    assert revocations.might_contain("fresh")
+
+
+def test_re_adding_a_token_does_not_count_it_twice():
+    bloom = module.BloomFilter(1000, 0.001)
+    bloom.add("token")
+    estimate = bloom.estimated_fp_rate
+    for _ in range(100):
+        bloom.add("token")                      # sync overlap, rebuild re-adds
+    assert bloom.items == 1
+    assert bloom.estimated_fp_rate == estimate
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+from app.utils.response_helper import STREAM_FAILED_MESSAGE, api_response, api_stream_response, ndjson_stream_response
+
+
+'''
+Streamed responses (app/utils/response_helper.py): an error after the first
+chunk has gone out must still leave a body the client can recognise as failed.
+'''
+
+
+def _rows(count: int, fail: bool):
+    for i in range(count):
+        yield {"n": i}
+    if fail:
+        raise RuntimeError("replica went away")
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_api_stream_response_closes_the_envelope(app, fail):
+    with app.test_request_context():
+        response = api_stream_response("ok", _rows(5, fail), "rows", {"total": 5}, chunk_size=2)
+        body = json.loads(b"".join(response.response))
+
+    assert response.status_code == 200
+    assert body["data"] == {"total": 5, "rows": [{"n": i} for i in range(5)]}
+    if fail:
+        assert body["error_code"] is True
+        assert body["message"] == STREAM_FAILED_MESSAGE
+        assert body["error"] == "replica went away"
+    else:
+        assert body["error_code"] is False and body["message"] == "ok" and "error" not in body
+
+
+@pytest.mark.parametrize("list_key", ["a_rows", "m_rows", "z_rows"])
+def test_api_stream_response_bytes_match_api_response(app, list_key):
+    extra = {"b_total": 5, "y_next": None}
+    with app.test_request_context():
+        streamed = b"".join(api_stream_response("ok", _rows(5, False), list_key, extra, chunk_size=2).response)
+        response, _ = api_response(False, "ok", {**extra, list_key: list(_rows(5, False))})
+        assert streamed == response.get_data()
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_ndjson_stream_response_ends_with_an_error_record(app, fail):
+    with app.test_request_context():
+        response = ndjson_stream_response(_rows(5, fail), chunk_size=2)
+        lines = [json.loads(line) for line in b"".join(response.response).splitlines()]
+
+    rows = [{"n": i} for i in range(5)]
+    if fail:
+        assert lines[:-1] == rows
+        assert lines[-1]["error"] is True and "replica went away" in lines[-1]["message"]
+    else:
+        assert lines == rows
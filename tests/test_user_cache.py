@@ -0,0 +1,59 @@
+import pytest
+from app.database.db import SessionLocal
+from app.models.user_model import User
+
+from conftest import auth_headers
+
+
+'''
+The per-worker user snapshot behind token_required (app/services/auth_cache.py):
+after a user changes, the next authenticated request sees the new values.
+'''
+
+
+@pytest.fixture
+def user(fixtures):
+    user_id, email = fixtures["users"][-2]
+    session = SessionLocal()
+    try:
+        username = session.get(User, user_id).username
+    finally:
+        session.close()
+    yield user_id, email, username
+
+    session = SessionLocal()
+    try:
+        session.get(User, user_id).username = username
+        session.commit()
+    finally:
+        session.close()
+
+
+def _profile(client, headers) -> dict:
+    response = client.get("/api/v1/user/profile", headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()["data"]
+
+
+def test_update_route_invalidates_the_snapshot(client, user):
+    user_id, email, username = user
+    headers = auth_headers(user_id, email)
+    assert _profile(client, headers)["username"] == username          # snapshot cached
+
+    response = client.put("/api/v1/user/updated", json={"username": "renamedviaroute"}, headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert _profile(client, headers)["username"] == "renamedviaroute"
+
+
+def test_any_orm_update_invalidates_the_snapshot(client, user):
+    user_id, email, username = user
+    headers = auth_headers(user_id, email)
+    assert _profile(client, headers)["username"] == username
+
+    session = SessionLocal()
+    try:
+        session.get(User, user_id).username = "renamedelsewhere"
+        session.commit()
+    finally:
+        session.close()
+    assert _profile(client, headers)["username"] == "renamedelsewhere"